@@ -1,12 +1,16 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import path
-from django.http import HttpResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from import_export import resources, fields, widgets
 from import_export.admin import ImportExportMixin, ExportMixin
-from .models import Attendance, AttendanceStats
+from import_export.signals import post_export
+from events.models import Event, normalize_title
+from mac_attendance.admin_filters import TextInputFilter
+from mac_attendance.paginators import KeysetPaginationMixin
+from .exports import AttendanceExport, AttendanceStatsExport, streaming_response
+from .models import Attendance, AttendanceStats, StatsRecalculationJob
 from django.core.exceptions import ValidationError
 import pandas as pd
 from datetime import datetime
@@ -66,10 +70,34 @@ class FlexibleDateTimeWidget(widgets.DateTimeWidget):
         raise ValueError(f"No se pudo parsear la fecha: '{value}'. Formatos aceptados: DD/MM/YYYY HH:MM o YYYY-MM-DD HH:MM:SS")
 
 
+def normalize_account_number(value):
+    """Normalizar un número de cuenta de la hoja de cálculo (sin espacios ni guiones, 8 dígitos)"""
+    return str(value).strip().replace(' ', '').replace('-', '')[:8]
+
+
 class StudentWidget(widgets.ForeignKeyWidget):
     """
     Widget para convertir account_number en objeto Student.
+
+    AttendanceResource.before_import precarga los estudiantes de todo el
+    archivo con preload(); sin precarga se consulta la BD por fila.
     """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.students = None
+
+    def preload(self, values):
+        """Cargar en un diccionario {account_number: UserProfile} los estudiantes de la columna"""
+        from authentication.models import UserProfile
+
+        self.students = {
+            student.account_number: student
+            for student in UserProfile.objects.filter(
+                account_number__in={normalize_account_number(value) for value in values if value},
+                user_type='student'
+            )
+        }
+
     def clean(self, value, row=None, **kwargs):
         if not value:
             return None
@@ -77,48 +105,108 @@ class StudentWidget(widgets.ForeignKeyWidget):
         from authentication.models import UserProfile
 
         # Normalizar número de cuenta
-        account_number = str(value).strip().replace(' ', '').replace('-', '')[:8]
+        account_number = normalize_account_number(value)
 
-        try:
-            student = UserProfile.objects.get(account_number=account_number, user_type='student')
-            return student
-        except UserProfile.DoesNotExist:
+        if self.students is not None:
+            student = self.students.get(account_number)
+        else:
+            student = UserProfile.objects.filter(account_number=account_number, user_type='student').first()
+        if student is None:
             raise ValueError(f"Estudiante con cuenta {account_number} no encontrado")
+        return student
 
 
 class EventWidget(widgets.ForeignKeyWidget):
     """
     Widget para convertir event_title en objeto Event.
+
+    Los títulos se comparan normalizados y, si no hay coincidencia exacta, por
+    similitud (ver events/resolver.py); las sustituciones quedan en
+    fuzzy_matches {título: evento} para avisarlas al importar.
+    AttendanceResource.before_import precarga los eventos de todo el archivo
+    con preload(); sin precarga se consulta la BD por fila.
     """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resolver = None
+        self.fuzzy_matches = {}
+
+    def preload(self, values):
+        """Cargar una sola vez los eventos que corresponden a los títulos de la columna"""
+        from events.resolver import EventResolver
+
+        self.resolver = EventResolver.load(values)
+
     def clean(self, value, row=None, **kwargs):
         if not value:
             return None
 
-        from events.models import Event
+        from events.resolver import EventResolver
 
         # Buscar evento por título
         event_title = str(value).strip()
 
-        try:
-            event = Event.objects.get(title=event_title)
-            return event
-        except Event.DoesNotExist:
+        resolver = self.resolver or EventResolver.load([event_title])
+        events = resolver.resolve(event_title)
+        if not events:
             raise ValueError(f"Evento '{event_title}' no encontrado")
+        if len(events) > 1:
+            raise ValueError(f"Múltiples eventos con título '{event_title}'")
+        if resolver.is_fuzzy(event_title, events[0]):
+            self.fuzzy_matches[event_title] = events[0]
+        return events[0]
 
 
 class AssistantWidget(widgets.ForeignKeyWidget):
     """
     Widget para convertir registered_by_account en objeto Assistant.
+
+    AttendanceResource.before_import precarga los asistentes de todo el
+    archivo (y el asistente por defecto) con preload() y les crea de una vez
+    los permisos de asistente que les falten; sin precarga se consulta la BD
+    por fila.
     """
+    DEFAULT_ACCOUNT = '11111111'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.assistants = None
+
+    def preload(self, values):
+        """Cargar en un diccionario {account_number: UserProfile} los asistentes de la columna"""
+        from authentication.models import UserProfile, Asistente
+
+        accounts = {normalize_account_number(value) for value in values if value}
+        accounts.add(self.DEFAULT_ACCOUNT)
+        self.assistants = {
+            assistant.account_number: assistant
+            for assistant in UserProfile.objects.filter(account_number__in=accounts, user_type='assistant')
+        }
+
+        # Verificar/crear permisos de asistente (un INSERT para todos los que falten)
+        with_permissions = set(Asistente.objects.filter(
+            user_profile__in=self.assistants.values()
+        ).values_list('user_profile_id', flat=True))
+        Asistente.objects.bulk_create([
+            Asistente(user_profile=assistant, can_manage_events=True)
+            for assistant in self.assistants.values() if assistant.id not in with_permissions
+        ], ignore_conflicts=True)
+
     def clean(self, value, row=None, **kwargs):
         from authentication.models import UserProfile, Asistente
 
         # Si no hay valor, usar por defecto
         if not value:
-            value = '11111111'
+            value = self.DEFAULT_ACCOUNT
 
         # Normalizar número de cuenta
-        account_number = str(value).strip().replace(' ', '').replace('-', '')[:8]
+        account_number = normalize_account_number(value)
+
+        if self.assistants is not None:
+            assistant = self.assistants.get(account_number) or self.assistants.get(self.DEFAULT_ACCOUNT)
+            if assistant is None:
+                raise ValueError(f"No existe el asistente por defecto ({self.DEFAULT_ACCOUNT})")
+            return assistant
 
         try:
             assistant = UserProfile.objects.get(account_number=account_number, user_type='assistant')
@@ -132,7 +220,7 @@ class AssistantWidget(widgets.ForeignKeyWidget):
             return assistant
         except UserProfile.DoesNotExist:
             # Usar asistente por defecto
-            return UserProfile.objects.get(account_number='11111111', user_type='assistant')
+            return UserProfile.objects.get(account_number=self.DEFAULT_ACCOUNT, user_type='assistant')
 
 
 class AttendanceResource(resources.ModelResource):
@@ -172,6 +260,9 @@ class AttendanceResource(resources.ModelResource):
         import_id_fields = []  # No usar ID para importación
         skip_unchanged = True
         exclude = ('id',)  # Excluir explícitamente el ID de la importación
+        # Las asistencias nuevas se insertan con bulk_create por bloques
+        use_bulk = True
+        batch_size = 1000
 
     def dehydrate_account_number(self, attendance):
         """Obtener número de cuenta del estudiante para exportación"""
@@ -189,66 +280,97 @@ class AttendanceResource(resources.ModelResource):
         """Obtener cuenta del asistente que registró para exportación"""
         return attendance.registered_by.account_number if attendance.registered_by else ''
 
-    def before_import_row(self, row, **kwargs):
-        """
-        Procesar fila antes de importar.
-        Los widgets se encargan de convertir los valores, aquí solo validamos.
-        """
-        # Los widgets personalizados (StudentWidget, EventWidget, AssistantWidget)
-        # se encargan de toda la conversión automáticamente.
-        # Este método se deja para validaciones adicionales si se necesitan en el futuro.
-        pass
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.students_to_update = set()  # Conjunto de estudiantes para actualizar al final
+        self.event_counts = {}  # {event_id: asistencias válidas nuevas} para el contador del evento
+        self.same_day = {}  # {(student_id, fecha): [(event_id, start_time, ...)]}
 
-    def save_instance(self, instance, *args, **kwargs):
+    def before_import(self, dataset, **kwargs):
         """
-        Guardar la instancia usando skip_validation=True para permitir
-        importaciones de asistencias pasadas (fuera de ventana de tiempo)
+        Precargar una sola vez, para todo el archivo, los estudiantes, eventos y
+        asistentes que resuelven los widgets, y las asistencias válidas de esos
+        estudiantes en esas fechas para detectar duplicados en memoria.
         """
-        # Extraer dry_run de kwargs
-        dry_run = kwargs.get('dry_run', False)
-
-        if not dry_run:
-            # Guardar sin actualizar estadísticas (se hará en batch al final)
-            # Temporalmente desactivar la actualización automática
-            if hasattr(instance, '_importing'):
-                instance._importing = True
-            else:
-                # Marcar la instancia como en importación
-                instance._skip_stats_update = True
-
-            # Usar skip_validation=True para permitir importar asistencias históricas
-            # Esto omite la validación de tiempo pero mantiene validación de duplicados
-            instance.save(skip_validation=True)
-
-            # Registrar estudiante para actualización posterior
-            if instance.student:
-                self.students_to_update.add(instance.student.id)
+        for name in ('account_number', 'event_title', 'registered_by_account'):
+            field = self.fields[name]
+            values = dataset[field.column_name] if field.column_name in dataset.headers else []
+            field.widget.preload(values)
+
+        students = self.fields['account_number'].widget.students
+        resolver = self.fields['event_title'].widget.resolver
+        titles = set(dataset['event_title']) if 'event_title' in dataset.headers else set()
+        self.same_day = Attendance._valid_attendances_by_day(
+            [student.id for student in students.values()],
+            {event.date for title in titles if title for event in resolver.resolve(title)}
+        )
+
+    def before_save_instance(self, instance, row, **kwargs):
+        """
+        Celda de hora vacía: el widget asigna None y, con bulk_create, el
+        default del campo ya no se aplica; se usa la hora de la importación.
+        """
+        if instance.timestamp is None:
+            instance.timestamp = tz.now()
+        super().before_save_instance(instance, row, **kwargs)
+
+    def save_instance(self, instance, is_create, row, **kwargs):
+        """
+        Validar duplicados y eventos simultáneos contra las asistencias
+        precargadas (sin validar la ventana de registro, para permitir importar
+        asistencias históricas) y dejar la asistencia para el bulk_create.
+        """
+        if not instance.student_id or not instance.event_id:
+            raise ValidationError("Debe especificar un estudiante y un evento.")
+
+        event = instance.event
+        day = self.same_day.setdefault((instance.student_id, event.date), [])
+        conflict = Attendance.find_conflict(event, day)
+        if conflict:
+            raise ValidationError(conflict)
+
+        # Las filas siguientes del mismo archivo ya ven esta asistencia
+        if instance.is_valid:
+            day.append((event.id, event.start_time, event.end_time, event.is_active, event.slot_id))
+            self.event_counts[event.id] = self.event_counts.get(event.id, 0) + 1
+        # Registrar estudiante para actualización posterior de estadísticas
+        self.students_to_update.add(instance.student_id)
+
+        super().save_instance(instance, is_create, row, **kwargs)
 
     def after_import(self, dataset, result, using_transactions, dry_run, **kwargs):
         """
         Después de importar todas las asistencias, actualizar estadísticas
-        de los estudiantes afectados en batch (más eficiente)
+        de los estudiantes afectados en batch (más eficiente) y el contador de
+        asistentes de los eventos
         """
+        # Avisar en el admin (vista previa y confirmación) de los títulos
+        # asignados por similitud; el admin pasa la petición a import_data
+        request = kwargs.get('request')
+        if request is not None:
+            for title, event in self.fields['event_title'].widget.fuzzy_matches.items():
+                messages.warning(
+                    request,
+                    f'El título "{title}" no coincide exactamente con ningún evento; '
+                    f'se asignó por similitud a "{event.title}" ({event.date}).'
+                )
+
+        if not dry_run and self.event_counts:
+            Event.shift_attendance_count(self.event_counts)
+        self.event_counts.clear()
+
         if not dry_run and self.students_to_update:
             from attendance.models import AttendanceStats
 
             count = len(self.students_to_update)
             print(f'\n[IMPORTACIÓN] Actualizando estadísticas de {count} estudiante(s) afectado(s)...')
 
-            updated = 0
-            for student_id in self.students_to_update:
-                try:
-                    stats, created = AttendanceStats.objects.get_or_create(
-                        student_id=student_id
-                    )
-                    stats.update_stats()
-                    updated += 1
-                except Exception as e:
-                    print(f'Error actualizando estadísticas del estudiante {student_id}: {e}')
+            from authentication.models import UserProfile
+
+            # Una sola consulta agrupada para todos los estudiantes afectados
+            updated = AttendanceStats.recalculate_bulk(
+                UserProfile.objects.filter(pk__in=self.students_to_update)
+            )
 
             print(f'[IMPORTACIÓN] ✓ Estadísticas actualizadas para {updated} estudiante(s)')
 
@@ -280,16 +402,99 @@ class AttendanceStatsResource(resources.ModelResource):
         """Verificar si cumple el requisito mínimo"""
         return 'SÍ' if stats.meets_minimum_requirement() else 'NO'
 
+class StreamingExportMixin:
+    """
+    Reemplaza la generación del archivo de django-import-export (que arma todo
+    el dataset en memoria con tablib y llama dehydrate_* por fila) por la
+    exportación en streaming de exports.py. Se respetan los filtros y la
+    búsqueda del changelist y las columnas elegidas en el formulario.
+    """
+    streaming_export_class = None
+
+    def _do_file_export(self, file_format, request, queryset, export_form=None):
+        columns = None
+        if export_form is not None and hasattr(export_form, 'get_selected_resource_export_fields'):
+            columns = export_form.get_selected_resource_export_fields()
+
+        filename = self.get_export_filename(request, queryset, file_format).rsplit('.', 1)[0]
+        response = streaming_response(
+            self.streaming_export_class(queryset, columns),
+            filename,
+            file_format.get_extension()
+        )
+        post_export.send(sender=None, model=self.model)
+        return response
+
+
+class EventFilter(TextInputFilter):
+    """Evento por título (sin importar acentos ni mayúsculas) o por id"""
+    title = 'evento'
+    parameter_name = 'evento'
+    placeholder = 'Título o id del evento'
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        if self.value().isdigit():
+            return queryset.filter(event_id=int(self.value()))
+        return queryset.filter(event__title_key__contains=normalize_title(self.value()))
+
+
+class RegisteredByFilter(TextInputFilter):
+    """Asistente que registró, por número de cuenta o nombre"""
+    title = 'registrado por'
+    parameter_name = 'registrador'
+    placeholder = 'Número de cuenta o nombre'
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        if self.value().isdigit():
+            return queryset.filter(registered_by__account_number=self.value())
+        return queryset.filter(registered_by__full_name__icontains=self.value())
+
+
+
+class MinimumRequirementFilter(admin.SimpleListFilter):
+    """
+    Estudiantes que cumplen o no el porcentaje mínimo de asistencia. Reemplaza
+    al filtro por valor de attendance_percentage, que listaba cada porcentaje
+    distinto de la tabla (SELECT DISTINCT completo).
+    """
+    title = 'requisito mínimo'
+    parameter_name = 'requisito'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('cumple', 'Cumple el mínimo'),
+            ('no_cumple', 'Debajo del mínimo'),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() not in ('cumple', 'no_cumple'):
+            return queryset
+        from authentication.models import SystemConfiguration
+        minimum = SystemConfiguration.get_config().minimum_attendance_percentage
+        if self.value() == 'cumple':
+            return queryset.filter(attendance_percentage__gte=minimum)
+        return queryset.filter(attendance_percentage__lt=minimum)
+
 @admin.register(Attendance)
-class AttendanceAdmin(ImportExportMixin, admin.ModelAdmin):
+class AttendanceAdmin(KeysetPaginationMixin, StreamingExportMixin, ImportExportMixin, admin.ModelAdmin):
     resource_class = AttendanceResource
+    streaming_export_class = AttendanceExport
     list_display = ['attendee_name', 'attendee_identifier', 'event', 'timestamp', 'registration_method', 'get_registered_by', 'is_valid']
-    list_filter = ['registration_method', 'registered_by', 'event__date', 'is_valid', 'event']
+    # Evento y registrador con campo de texto: sus listas completas consultarían
+    # todos los eventos y todos los perfiles en cada vista
+    list_filter = ['registration_method', RegisteredByFilter, 'event__date', 'is_valid', EventFilter]
     search_fields = ['student__full_name', 'student__account_number', 'event__title',
                      'registered_by__full_name', 'registered_by__account_number']
     ordering = ['-timestamp']
     readonly_fields = ['timestamp', 'attendee_name', 'attendee_identifier']
-    date_hierarchy = 'timestamp'
+    # Páginas por (timestamp, id) sobre el índice y total estimado (ver
+    # mac_attendance/paginators.py); sin date_hierarchy, que consulta las
+    # fechas distintas de todas las asistencias filtradas
+    keyset_field = 'timestamp'
 
     fieldsets = (
         ('Información del Asistente', {
@@ -337,15 +542,17 @@ class AttendanceAdmin(ImportExportMixin, admin.ModelAdmin):
         return request.user.is_superuser
 
 @admin.register(AttendanceStats)
-class AttendanceStatsAdmin(ExportMixin, admin.ModelAdmin):
+class AttendanceStatsAdmin(KeysetPaginationMixin, StreamingExportMixin, ExportMixin, admin.ModelAdmin):
     """
     Admin para estadísticas de asistencia.
     NOTA: Solo permite EXPORTAR, NO importar. Las estadísticas se calculan automáticamente.
     """
     resource_class = AttendanceStatsResource
-    list_display = ['student', 'attended_events', 'total_events', 'attendance_percentage', 'get_cumple_requisito']
+    streaming_export_class = AttendanceStatsExport
+    list_display = ['student', 'attended_events', 'total_events', 'attendance_percentage', 'get_cumple_requisito', 'is_stale']
     ordering = ['-attendance_percentage']
-    list_filter = ['attendance_percentage']
+    keyset_field = 'attendance_percentage'
+    list_filter = [MinimumRequirementFilter, 'is_stale']
     search_fields = ['student__account_number', 'student__full_name']
     actions = ['export_selected_stats', 'export_students_with_certificate', 'update_all_stats']
 
@@ -362,21 +569,8 @@ class AttendanceStatsAdmin(ExportMixin, admin.ModelAdmin):
 
     def export_selected_stats(self, request, queryset):
         """Acción para exportar estadísticas seleccionadas"""
-        resource = AttendanceStatsResource()
-        dataset = resource.export(queryset)
-
-        from import_export.formats.base_formats import XLSX
-        xlsx_format = XLSX()
-        export_data = xlsx_format.export_data(dataset)
-
-        response = HttpResponse(
-            export_data,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="estadisticas_asistencia.xlsx"'
-
         self.message_user(request, f'Se exportaron {queryset.count()} estadísticas.')
-        return response
+        return streaming_response(AttendanceStatsExport(queryset), 'estadisticas_asistencia')
 
     export_selected_stats.short_description = "📊 Exportar estadísticas seleccionadas"
 
@@ -390,36 +584,22 @@ class AttendanceStatsAdmin(ExportMixin, admin.ModelAdmin):
             attendance_percentage__gte=config.minimum_attendance_percentage
         )
 
-        # Crear el recurso y exportar
-        resource = AttendanceStatsResource()
-        dataset = resource.export(qualified_students)
-
-        # Generar archivo Excel
-        from import_export.formats.base_formats import XLSX
-        xlsx_format = XLSX()
-        export_data = xlsx_format.export_data(dataset)
-
-        response = HttpResponse(
-            export_data,
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="estudiantes_con_constancia.xlsx"'
-
         self.message_user(
             request,
             f'Se exportaron {qualified_students.count()} estudiantes que cumplen con el {config.minimum_attendance_percentage}% de asistencia mínima.'
         )
 
-        return response
+        return streaming_response(AttendanceStatsExport(qualified_students), 'estudiantes_con_constancia')
 
     export_students_with_certificate.short_description = "📊 Exportar estudiantes que cumplen requisito para constancia"
 
     def update_all_stats(self, request, queryset):
         """Acción para actualizar estadísticas de los estudiantes seleccionados"""
-        count = 0
-        for stats in queryset:
-            stats.update_stats()
-            count += 1
+        from authentication.models import UserProfile
+
+        count = AttendanceStats.recalculate_bulk(
+            UserProfile.objects.filter(pk__in=queryset.values('student_id'))
+        )
 
         self.message_user(
             request,
@@ -443,4 +623,25 @@ class AttendanceStatsAdmin(ExportMixin, admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         # Solo superusuarios pueden eliminar estadísticas
-        return request.user.is_superuser
\ No newline at end of file
+        return request.user.is_superuser
+
+
+@admin.register(StatsRecalculationJob)
+class StatsRecalculationJobAdmin(admin.ModelAdmin):
+    """
+    Cola de recálculos de estadísticas (solo lectura).
+    Los trabajos se crean automáticamente al modificar eventos y los procesa run_stats_worker.
+    """
+    list_display = ['id', 'status', 'reason', 'requested_at', 'run_after', 'started_at', 'finished_at', 'updated_students']
+    list_filter = ['status']
+    readonly_fields = ['status', 'reason', 'requested_at', 'run_after', 'started_at', 'finished_at',
+                       'updated_students', 'error']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
@@ -0,0 +1,139 @@
+"""
+Exportación en streaming de asistencias y estadísticas.
+
+Las filas se leen con values_list + iterator(chunk_size=...) (cursor del lado
+del servidor en PostgreSQL), ya con los datos de estudiante/evento/asistente
+unidos en la misma consulta, y se escriben conforme se leen:
+  - CSV: directo a un StreamingHttpResponse
+  - XLSX: openpyxl en modo write-only a un archivo temporal que se envía con
+    FileResponse (un XLSX es un ZIP y no se puede generar sobre la marcha)
+
+En ningún momento se tiene el conjunto completo en memoria, así que el uso de
+memoria no depende del número de filas.
+"""
+import csv
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+CHUNK_SIZE = 2000
+CSV_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class TableExport:
+    """
+    Definición de una exportación: encabezados y los campos de values_list
+    (pueden cruzar relaciones, p. ej. 'student__account_number').
+
+    Con columns se exporta solo ese subconjunto de encabezados.
+    """
+    title = 'Datos'
+    headers = ()
+    fields = ()
+
+    def __init__(self, queryset, columns=None):
+        self.queryset = queryset
+        self.columns = [name for name in self.headers if name in columns] if columns else list(self.headers)
+
+    def read_rows(self):
+        """Filas completas (todos los encabezados) como tuplas, en el orden del queryset"""
+        return self.queryset.values_list(*self.fields).iterator(chunk_size=CHUNK_SIZE)
+
+    def rows(self):
+        """Filas con solo las columnas seleccionadas"""
+        if self.columns == list(self.headers):
+            return self.read_rows()
+        positions = [self.headers.index(name) for name in self.columns]
+        return (tuple(row[i] for i in positions) for row in self.read_rows())
+
+
+class AttendanceExport(TableExport):
+    """Asistencias, con las mismas columnas que importa AttendanceResource"""
+    title = 'Asistencias'
+    headers = ('id', 'account_number', 'student_name', 'event_title', 'timestamp',
+               'registered_by_account', 'registration_method', 'notes', 'is_valid')
+    fields = ('id', 'student__account_number', 'student__full_name', 'event__title', 'timestamp',
+              'registered_by__account_number', 'registration_method', 'notes', 'is_valid')
+
+
+class AttendanceStatsExport(TableExport):
+    """Estadísticas de asistencia con la columna de si cumplen el requisito de constancia"""
+    title = 'Estadísticas'
+    headers = ('account_number', 'full_name', 'attended_events', 'total_events',
+               'attendance_percentage', 'cumple_requisito')
+    fields = ('student__account_number', 'student__full_name', 'attended_events', 'total_events',
+              'attendance_percentage')
+
+    def read_rows(self):
+        from authentication.models import SystemConfiguration
+
+        # La configuración se lee una vez por exportación, no por fila
+        minimum = SystemConfiguration.get_config().minimum_attendance_percentage
+        for row in super().read_rows():
+            yield row + ('SÍ' if row[-1] >= minimum else 'NO',)
+
+
+class _Echo:
+    """Objeto tipo archivo para csv.writer que devuelve la línea en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+def _local_datetime(value):
+    """Fecha/hora en la zona local y sin tzinfo (Excel no admite zonas horarias)"""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.replace(tzinfo=None)
+
+
+def _csv_lines(export):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel abra el archivo como UTF-8 (acentos en nombres)
+    yield '\ufeff' + writer.writerow(export.columns)
+    for row in export.rows():
+        yield writer.writerow([
+            _local_datetime(value).strftime(CSV_DATETIME_FORMAT) if isinstance(value, datetime) else value
+            for value in row
+        ])
+
+
+def _xlsx_file(export):
+    """Escribir el XLSX fila por fila en un archivo temporal y devolverlo listo para leer"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(export.title)
+    sheet.append(export.columns)
+    for row in export.rows():
+        sheet.append([_local_datetime(value) if isinstance(value, datetime) else value for value in row])
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def streaming_response(export, filename, file_format='xlsx'):
+    """
+    Respuesta HTTP con la exportación como archivo adjunto.
+
+    Args:
+        export: Instancia de TableExport
+        filename: Nombre del archivo sin extensión
+        file_format: 'xlsx' o 'csv'
+    """
+    if file_format == 'csv':
+        response = StreamingHttpResponse(_csv_lines(export), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+    # FileResponse envía el archivo por bloques y lo cierra (y borra) al terminar
+    return FileResponse(
+        _xlsx_file(export),
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type=XLSX_CONTENT_TYPE
+    )
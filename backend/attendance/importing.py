@@ -0,0 +1,363 @@
+"""
+Importación masiva de asistencias por etapas.
+
+1. Lectura: las filas del Excel se leen en modo read_only (sin cargar el libro completo)
+2. Resolución: eventos (por título normalizado y fecha, con búsqueda aproximada
+   como respaldo) y estudiantes con una consulta __in cada uno, en memoria
+3. Validación: duplicados y eventos simultáneos en memoria, contra las asistencias
+   válidas ya registradas de esos estudiantes en las fechas de los eventos
+   resueltos (una sola consulta)
+4. Inserción: bulk_create por bloques dentro de una sola transacción
+5. Estadísticas: un solo recálculo agrupado para los estudiantes afectados y un
+   UPDATE del contador de asistentes de los eventos
+
+Las filas rechazadas se guardan con su motivo para el reporte.
+"""
+import csv
+import re
+import time
+from datetime import date, datetime
+
+import openpyxl
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from authentication.models import ExternalUser, SystemConfiguration, UserProfile
+from events.models import Event
+from events.resolver import EventResolver
+from .models import Attendance, AttendanceStats
+
+REQUIRED_COLUMNS = ('numero_cuenta', 'nombre_completo', 'titulo_evento', 'fecha_evento')
+OPTIONAL_COLUMNS = ('metodo_registro', 'notas')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+BULK_BATCH_SIZE = 1000
+LOOKUP_BATCH_SIZE = 2000
+ACCOUNT_NUMBER_RE = re.compile(r'^\d{8}$')
+
+
+def read_rows(path, sheet_name):
+    """
+    Leer las filas de la hoja en modo read_only.
+
+    Las columnas se ubican por encabezado (primera fila), no por posición.
+
+    Returns:
+        Generador de diccionarios con row (número de fila en Excel) y las columnas conocidas.
+
+    Raises:
+        ValueError: Si la hoja no existe o faltan encabezados obligatorios
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f'La hoja "{sheet_name}" no existe en el archivo')
+
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        headers = [str(value).lower().strip() if value else '' for value in next(rows, ())]
+        missing = [column for column in REQUIRED_COLUMNS if column not in headers]
+        if missing:
+            raise ValueError(f'Faltan los encabezados: {", ".join(missing)}')
+
+        positions = {
+            column: headers.index(column)
+            for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if column in headers
+        }
+        for row_number, values in enumerate(rows, start=2):
+            if not any(values):
+                continue
+            row = {'row': row_number}
+            for column, position in positions.items():
+                row[column] = values[position] if position < len(values) else None
+            yield row
+    finally:
+        workbook.close()
+
+
+def parse_date(value):
+    """Fecha del evento desde una celda (fecha de Excel o texto YYYY-MM-DD / DD/MM/YYYY)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _normalize_name(name):
+    """Nombre para comparar el de la hoja con el de la BD (sin mayúsculas ni espacios repetidos)"""
+    return ' '.join(str(name or '').casefold().split())
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class AttendanceImporter:
+    """
+    Importador de asistencias por lotes.
+
+    Uso:
+        importer = AttendanceImporter(registered_by, skip_validation=True)
+        created = importer.run(read_rows(path, 'Asistencias'))
+        importer.accepted  # [(fila, Attendance), ...]
+        importer.rejected  # [(fila, motivo), ...]
+        importer.fuzzy_matches  # [(fila, Event), ...] títulos asignados por similitud
+    """
+    METHODS = dict(Attendance.REGISTRATION_METHODS)
+
+    def __init__(self, registered_by, skip_validation=False, dry_run=False, create_students=False):
+        self.registered_by = registered_by
+        self.skip_validation = skip_validation
+        self.dry_run = dry_run
+        self.create_students = create_students
+        self.rejected = []
+        self.accepted = []
+        self.created_students = []
+        self.name_mismatches = []
+        self.fuzzy_matches = []
+        self.affected_students = set()
+        self.timings = {}
+
+    def reject(self, row, reason):
+        self.rejected.append((row, reason))
+
+    def run(self, rows):
+        """
+        Importar las filas leídas con read_rows(). Devuelve el número de
+        asistencias creadas (o que se crearían, con dry_run).
+
+        La duración de cada etapa (en segundos) queda en self.timings.
+        """
+        started = time.perf_counter()
+        rows = self._parse(rows)
+        self._lap('lectura', started)
+        return self.load(rows)
+
+    def load(self, rows):
+        """
+        Importar filas ya normalizadas: diccionarios con row, numero_cuenta,
+        nombre_completo, titulo_evento, fecha_evento (o None para buscar el
+        evento solo por título), metodo_registro, notas y, opcionalmente,
+        timestamp.
+
+        Con dry_run se hace todo (incluso la inserción) y al final se revierte
+        la transacción, así que el resultado es exactamente lo que se guardaría.
+        """
+        with transaction.atomic():
+            started = time.perf_counter()
+            events = self._resolve_events(rows)
+            students = self._resolve_students(rows)
+            self._lap('resolución', started)
+
+            started = time.perf_counter()
+            self.accepted = self._validate(rows, events, students)
+            self._lap('validación', started)
+
+            started = time.perf_counter()
+            Attendance.objects.bulk_create(
+                [attendance for row, attendance in self.accepted],
+                batch_size=BULK_BATCH_SIZE
+            )
+            self._lap('inserción', started)
+
+            # Un solo recálculo agrupado para todos los estudiantes afectados
+            started = time.perf_counter()
+            AttendanceStats.recalculate_bulk(UserProfile.objects.filter(pk__in=self.affected_students))
+            added = {}
+            for row, attendance in self.accepted:
+                added[attendance.event_id] = added.get(attendance.event_id, 0) + 1
+            Event.shift_attendance_count(added)
+            self._lap('estadísticas', started)
+
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        return len(self.accepted)
+
+    def _lap(self, stage, started):
+        self.timings[stage] = time.perf_counter() - started
+
+    def _parse(self, rows):
+        """Normalizar valores y descartar filas incompletas o con datos inválidos"""
+        parsed = []
+        for row in rows:
+            account_number = str(row.get('numero_cuenta') or '').strip()
+            title = str(row.get('titulo_evento') or '').strip()
+            method = str(row.get('metodo_registro') or 'manual').strip().lower()
+
+            if not (account_number and row.get('nombre_completo') and title and row.get('fecha_evento')):
+                self.reject(row, 'Datos incompletos')
+                continue
+
+            event_date = parse_date(row['fecha_evento'])
+            if event_date is None:
+                self.reject(row, f'Formato de fecha inválido ({row["fecha_evento"]})')
+                continue
+
+            if method not in self.METHODS:
+                self.reject(row, f'Método de registro inválido ({method})')
+                continue
+
+            row.update(
+                numero_cuenta=account_number,
+                titulo_evento=title,
+                fecha_evento=event_date,
+                metodo_registro=method,
+                notas=str(row.get('notas') or '').strip()
+            )
+            parsed.append(row)
+        return parsed
+
+    def _resolve_events(self, rows):
+        """
+        Eventos por (título, fecha): una consulta por la llave normalizada e
+        indexada, más otra con los eventos de esas fechas solo si algún título
+        necesita búsqueda aproximada (ver events/resolver.py)
+        """
+        dates = {row['fecha_evento'] for row in rows}
+        return EventResolver.load(
+            {row['titulo_evento'] for row in rows},
+            None if None in dates else dates
+        )
+
+    def _resolve_students(self, rows):
+        """
+        Estudiantes por número de cuenta. Se bloquean (FOR NO KEY UPDATE, en orden de
+        id, como en Attendance.register_batch) para que un registro simultáneo desde
+        el escáner no invalide la detección de duplicados.
+
+        Con create_students se dan de alta (un solo bulk_create) los números de
+        cuenta válidos que no existen, con el nombre de su primera fila.
+        """
+        students = {}
+        for accounts in _chunks({row['numero_cuenta'] for row in rows}, LOOKUP_BATCH_SIZE):
+            students.update(Attendance._lock_students(accounts))
+
+        if self.create_students:
+            missing = {}
+            for row in rows:
+                account_number = row['numero_cuenta']
+                if account_number not in students and ACCOUNT_NUMBER_RE.match(account_number):
+                    missing.setdefault(account_number, str(row['nombre_completo']).strip())
+            taken = set(UserProfile.objects.filter(
+                account_number__in=missing
+            ).values_list('account_number', flat=True))
+            self.created_students = UserProfile.objects.bulk_create([
+                UserProfile(account_number=account_number, user_type='student', full_name=full_name)
+                for account_number, full_name in missing.items() if account_number not in taken
+            ], batch_size=BULK_BATCH_SIZE)
+            students.update({student.account_number: student for student in self.created_students})
+
+        return students
+
+    def _validate(self, rows, events, students):
+        """
+        Detectar en memoria filas sin evento/estudiante, duplicados y eventos simultáneos.
+
+        Returns:
+            Lista de (fila, Attendance) de las filas aceptadas
+        """
+        config = SystemConfiguration.get_config()
+        external_accounts = set(ExternalUser.objects.filter(
+            account_number__in={row['numero_cuenta'] for row in rows if row['numero_cuenta'] not in students}
+        ).values_list('account_number', flat=True))
+
+        # Las fechas salen de los eventos resueltos, no de las filas: hay formatos
+        # sin columna de fecha (fecha_evento es None) y el evento la determina
+        resolved = [(row, events.resolve(row['titulo_evento'], row['fecha_evento'])) for row in rows]
+        dates = {matches[0].date for row, matches in resolved if len(matches) == 1}
+        same_day = {}
+        for student_ids in _chunks([student.id for student in students.values()], LOOKUP_BATCH_SIZE):
+            same_day.update(Attendance._valid_attendances_by_day(student_ids, dates))
+
+        window_errors = {}
+        accepted = []
+        for row, matches in resolved:
+            event = self._match_event(row, matches, events)
+            if event is None:
+                continue
+            student = self._match_student(row, students, external_accounts)
+            if student is None:
+                continue
+            if not self._check_window(row, event, config, window_errors):
+                continue
+
+            day = same_day.setdefault((student.id, event.date), [])
+            conflict = Attendance.find_conflict(event, day)
+            # Con --skip-validation solo se rechazan duplicados, no eventos simultáneos
+            if conflict == Attendance.DUPLICATE_MESSAGE or (conflict and not self.skip_validation):
+                self.reject(row, conflict)
+                continue
+
+            if row['nombre_completo'] and _normalize_name(row['nombre_completo']) != _normalize_name(student.full_name):
+                self.name_mismatches.append((row, student.full_name))
+
+            # Las filas aceptadas cuentan para los duplicados de las siguientes
+            day.append((event.id, event.start_time, event.end_time, event.is_active, event.slot_id))
+            self.affected_students.add(student.id)
+            attendance = Attendance(
+                student=student,
+                event=event,
+                registered_by=self.registered_by,
+                registration_method=row['metodo_registro'],
+                notes=row['notas']
+            )
+            if row.get('timestamp'):
+                attendance.timestamp = row['timestamp']
+            accepted.append((row, attendance))
+        return accepted
+
+    def _match_event(self, row, matches, events):
+        """Evento de la fila entre los candidatos del resolvedor, o None (fila rechazada)"""
+        if not matches:
+            self.reject(row, f'Evento "{row["titulo_evento"]}" del {row["fecha_evento"]} no encontrado')
+            return None
+        if len(matches) > 1:
+            self.reject(row, f'Múltiples eventos con título "{row["titulo_evento"]}" del {row["fecha_evento"]}')
+            return None
+        event = matches[0]
+        if events.is_fuzzy(row['titulo_evento'], event):
+            self.fuzzy_matches.append((row, event))
+        return event
+
+    def _match_student(self, row, students, external_accounts):
+        """Estudiante de la fila, o None (fila rechazada)"""
+        student = students.get(row['numero_cuenta'])
+        if student is None:
+            if row['numero_cuenta'] in external_accounts:
+                self.reject(row, 'Usuario externo: las asistencias solo se registran para estudiantes')
+            else:
+                self.reject(row, f'Estudiante {row["numero_cuenta"]} no encontrado')
+        return student
+
+    def _check_window(self, row, event, config, window_errors):
+        """
+        Validar la ventana de registro del evento (una vez por evento, en
+        window_errors). Devuelve False si la fila se rechazó.
+        """
+        if self.skip_validation:
+            return True
+        if event.id not in window_errors:
+            try:
+                Attendance.validate_registration_window(event, config)
+                window_errors[event.id] = None
+            except ValidationError as e:
+                window_errors[event.id] = e.messages[0]
+        if window_errors[event.id]:
+            self.reject(row, window_errors[event.id])
+            return False
+        return True
+
+    def write_report(self, path):
+        """Guardar las filas rechazadas (fila, datos y motivo) en un CSV"""
+        columns = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+        with open(path, 'w', newline='', encoding='utf-8-sig') as report:
+            writer = csv.writer(report)
+            writer.writerow(('fila',) + columns + ('motivo',))
+            for row, reason in sorted(self.rejected, key=lambda rejected: rejected[0]['row']):
+                writer.writerow([row['row']] + [row.get(column, '') for column in columns] + [reason])
@@ -0,0 +1,207 @@
+"""
+Carga de asistencias desde hojas de cálculo con formatos distintos.
+
+Cada formato se describe con un mapeo declarativo (MAPPINGS o un archivo JSON
+con la misma forma): qué hoja leer y qué columna del archivo corresponde a cada
+campo. La hoja se lee completa con pandas y los números de cuenta, nombres,
+fechas y horas se normalizan por columna (operaciones vectorizadas, no fila por
+fila); después las filas pasan por el mismo núcleo por lotes que
+import_attendance (AttendanceImporter: resolución, validación, bulk_create y
+recálculo de estadísticas).
+
+Campos de un mapeo:
+    sheet: Nombre o índice de la hoja (default: la primera)
+    columns: {campo: columna del archivo} con los campos
+        account_number (obligatorio), full_name, event_title, event_date,
+        timestamp, registration_method, notes
+    notes: Notas por defecto; admite {file} (nombre del archivo)
+
+Si el formato no tiene columna de evento, el evento se indica al ejecutar
+(--evento / --fecha) y aplica a todas las filas.
+"""
+import json
+from pathlib import Path
+
+import pandas as pd
+from django.utils import timezone
+from .models import Attendance
+
+REGISTRATION_METHODS = [method for method, label in Attendance.REGISTRATION_METHODS]
+FIELDS = ('account_number', 'full_name', 'event_title', 'event_date', 'timestamp', 'registration_method', 'notes')
+
+DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S')
+DATETIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S',
+                    '%d-%m-%Y %H:%M', '%d-%m-%Y %H:%M:%S')
+
+MAPPINGS = {
+    # Formato de import_attendance (hoja "Asistencias")
+    'asistencias': {
+        'sheet': 'Asistencias',
+        'columns': {
+            'account_number': 'numero_cuenta',
+            'full_name': 'nombre_completo',
+            'event_title': 'titulo_evento',
+            'event_date': 'fecha_evento',
+            'registration_method': 'metodo_registro',
+            'notes': 'notas',
+        },
+        'notes': 'Importado desde {file}',
+    },
+    # Exportación del registro de asistencia (hoja "Registros"), con la hora de cada registro
+    'registros': {
+        'sheet': 'Registros',
+        'columns': {
+            'account_number': 'Attendee identifier',
+            'full_name': 'Attendee name',
+            'event_title': 'Evento',
+            'timestamp': 'Hora de registro',
+        },
+        'notes': 'Importado desde {file}',
+    },
+    # Lista de asistentes de un solo evento (el evento se indica con --evento)
+    'lista': {
+        'sheet': 0,
+        'columns': {
+            'account_number': 'account_number',
+            'full_name': 'full_name',
+        },
+        'notes': 'Importado desde Excel: {file}',
+    },
+}
+
+
+def load_mapping(name_or_path):
+    """
+    Mapeo por nombre (MAPPINGS) o desde un archivo JSON.
+
+    Raises:
+        ValueError: Si el mapeo no existe o no es válido
+    """
+    if name_or_path in MAPPINGS:
+        mapping = MAPPINGS[name_or_path]
+    else:
+        path = Path(name_or_path)
+        if not path.exists():
+            raise ValueError(
+                f'Mapeo "{name_or_path}" no encontrado; disponibles: {", ".join(MAPPINGS)} o un archivo JSON'
+            )
+        mapping = json.loads(path.read_text(encoding='utf-8'))
+
+    columns = mapping.get('columns') or {}
+    unknown = set(columns) - set(FIELDS)
+    if unknown:
+        raise ValueError(f'Campos desconocidos en el mapeo: {", ".join(sorted(unknown))}')
+    if 'account_number' not in columns:
+        raise ValueError('El mapeo debe indicar la columna de account_number')
+    return mapping
+
+
+def read_frame(path, mapping, sheet=None):
+    """
+    Leer el archivo (Excel o CSV) y devolver un DataFrame con las columnas
+    renombradas a los campos del mapeo.
+
+    Raises:
+        ValueError: Si faltan columnas del mapeo en el archivo
+    """
+    path = Path(path)
+    columns = mapping['columns']
+    # Los números de cuenta como texto, para no perder ceros ni convertirlos a float
+    dtype = {columns['account_number']: str}
+    if path.suffix.lower() == '.csv':
+        frame = pd.read_csv(path, dtype=dtype, encoding='utf-8-sig')
+    else:
+        frame = pd.read_excel(path, sheet_name=mapping.get('sheet', 0) if sheet is None else sheet, dtype=dtype)
+
+    frame.columns = [str(column).strip() for column in frame.columns]
+    missing = [column for column in columns.values() if column not in frame.columns]
+    if missing:
+        raise ValueError(f'Faltan las columnas: {", ".join(missing)} (hay: {", ".join(frame.columns)})')
+
+    frame = frame[list(columns.values())].rename(columns={column: field for field, column in columns.items()})
+    frame = frame.dropna(how='all')
+    # Número de fila en el archivo (encabezado en la fila 1)
+    frame['row'] = frame.index + 2
+    return frame
+
+
+def _text(series):
+    return series.astype('string').str.strip()
+
+
+def _parse_datetimes(series, formats):
+    """Probar cada formato sobre toda la columna; las celdas que ya son fechas se aceptan tal cual"""
+    parsed = pd.to_datetime(series.where(series.map(lambda value: hasattr(value, 'year'))), errors='coerce')
+    text = _text(series)
+    for date_format in formats:
+        parsed = parsed.fillna(pd.to_datetime(text, format=date_format, errors='coerce'))
+    return parsed
+
+
+def normalize(frame, mapping, file_name, event_title=None, event_date=None):
+    """
+    Normalizar las columnas del DataFrame.
+
+    Returns:
+        Tupla (filas, rechazadas): filas en el formato de AttendanceImporter.load()
+        y lista de (fila, motivo) de las que no tienen datos utilizables.
+    """
+    def constant(value):
+        return pd.Series([value] * len(frame), index=frame.index, dtype='object')
+
+    # Números de cuenta: sin espacios, guiones ni ".0" de celdas numéricas; 8 dígitos
+    accounts = (
+        _text(frame['account_number'])
+        .str.replace(r'\.0$', '', regex=True)
+        .str.replace(r'[\s-]', '', regex=True)
+        .str[:8]
+        .fillna('')
+    )
+    names = _text(frame['full_name']).fillna('') if 'full_name' in frame else constant('')
+    titles = _text(frame['event_title']).fillna('') if 'event_title' in frame else constant(event_title or '')
+    methods = (
+        _text(frame['registration_method']).str.lower().fillna('manual') if 'registration_method' in frame
+        else constant('manual')
+    )
+    default_notes = mapping.get('notes', '').format(file=file_name)
+    notes = _text(frame['notes']).fillna(default_notes) if 'notes' in frame else constant(default_notes)
+
+    reasons = constant(None)
+    if 'event_date' in frame:
+        dates = _parse_datetimes(frame['event_date'], DATE_FORMATS)
+        reasons = reasons.mask(dates.isna(), 'Formato de fecha inválido')
+        dates = dates.dt.date
+    else:
+        dates = constant(event_date)
+    if 'timestamp' in frame:
+        timestamps = _parse_datetimes(frame['timestamp'], DATETIME_FORMATS).dt.tz_localize(
+            timezone.get_current_timezone_name(), ambiguous='NaT', nonexistent='NaT'
+        )
+        # Una celda vacía usa la hora de la importación; una con texto ilegible se rechaza
+        reasons = reasons.mask(frame['timestamp'].notna() & timestamps.isna(), 'Formato de hora de registro inválido')
+        timestamps = timestamps.astype('object').where(timestamps.notna(), None)
+    else:
+        timestamps = constant(None)
+    reasons = reasons.mask(~methods.isin(REGISTRATION_METHODS), 'Método de registro inválido')
+    reasons = reasons.mask((accounts == '') | (titles == ''), 'Datos incompletos')
+
+    rows = []
+    rejected = []
+    for row_number, account_number, full_name, title, date, timestamp, method, note, reason in zip(
+        frame['row'], accounts, names, titles, dates, timestamps, methods, notes, reasons
+    ):
+        row = {
+            'row': int(row_number),
+            'numero_cuenta': account_number,
+            'nombre_completo': full_name,
+            'titulo_evento': title,
+            'fecha_evento': date if not pd.isna(date) else None,
+            'metodo_registro': method,
+            'notas': note,
+            'timestamp': timestamp.to_pydatetime() if timestamp is not None else None,
+        }
+        if reason:
+            rejected.append((row, reason))
+        else:
+            rows.append(row)
+    return rows, rejected
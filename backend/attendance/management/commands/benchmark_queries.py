@@ -0,0 +1,214 @@
+"""
+Comando para revisar los planes de ejecución de las consultas más frecuentes.
+
+Ejecuta EXPLAIN ANALYZE (en PostgreSQL; EXPLAIN en otras BD) sobre cada consulta
+caliente del sistema y resume el tipo de recorrido (Seq Scan / Index Scan) y el
+tiempo de ejecución. Con --compare repite cada consulta sin los índices del plan
+de índices: los borra dentro de una transacción que se revierte al final, así
+que la BD no se modifica.
+
+⚠️ --compare bloquea las tablas mientras dura la transacción (DROP INDEX);
+no usarlo en horario de registro.
+
+Uso:
+    python manage.py benchmark_queries
+    python manage.py benchmark_queries --compare
+    python manage.py benchmark_queries --query recent_attendances --plans
+"""
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from attendance.models import Attendance, AttendanceStats
+from authentication.models import UserProfile
+from events.models import Event
+
+
+class _Rollback(Exception):
+    """Se lanza para revertir la transacción donde se borraron los índices"""
+
+
+# Índices y restricciones que forman el plan de índices de las consultas calientes
+INDEXED_MODELS = (Attendance, AttendanceStats, Event, UserProfile)
+INDEXED_CONSTRAINTS = {Attendance: ['unique_valid_attendance_per_event']}
+
+PG_SCAN_RE = re.compile(
+    r'(Seq Scan|Index Only Scan|Index Scan Backward|Index Scan|Bitmap Index Scan)'
+    r'(?: using (\S+))? on (\S+)'
+)
+PG_TIME_RE = re.compile(r'Execution Time: ([\d.]+) ms')
+SQLITE_SCAN_RE = re.compile(r'(SCAN|SEARCH) (\S+)(?: USING (?:COVERING )?INDEX (\S+))?')
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN ANALYZE sobre las consultas más frecuentes y compara con/sin índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Repetir cada consulta sin los índices (dentro de una transacción que se revierte)'
+        )
+        parser.add_argument(
+            '--query',
+            nargs='+',
+            metavar='NOMBRE',
+            help='Ejecutar solo estas consultas'
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Mostrar el plan completo además del resumen'
+        )
+
+    def handle(self, *args, **options):
+        queries = self._hot_queries()
+        if options['query']:
+            unknown = set(options['query']) - {name for name, _, _ in queries}
+            if unknown:
+                raise CommandError(
+                    f'Consultas desconocidas: {", ".join(sorted(unknown))}. '
+                    f'Disponibles: {", ".join(name for name, _, _ in queries)}'
+                )
+            queries = [query for query in queries if query[0] in options['query']]
+
+        self.is_postgres = connection.vendor == 'postgresql'
+        if not self.is_postgres:
+            self.stdout.write(self.style.WARNING(
+                f'BD {connection.vendor}: se usa EXPLAIN sin ANALYZE (sin tiempos de ejecución)\n'
+            ))
+
+        with_indexes = {name: self._explain(queryset, 'con_indices') for name, _, queryset in queries}
+
+        without_indexes = {}
+        if options['compare']:
+            try:
+                with transaction.atomic():
+                    dropped = self._drop_indexes()
+                    self.stdout.write(f'Índices retirados temporalmente: {dropped}\n')
+                    without_indexes = {
+                        name: self._explain(queryset, 'sin_indices') for name, _, queryset in queries
+                    }
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+        for name, description, _ in queries:
+            self.stdout.write(self.style.SUCCESS(f'\n{name}') + f' - {description}')
+            if name in without_indexes:
+                self._report('sin índices', without_indexes[name], options['plans'])
+            self._report('con índices', with_indexes[name], options['plans'])
+
+    def _hot_queries(self):
+        """Consultas calientes con valores de ejemplo tomados de la BD"""
+        today = timezone.localdate()
+        sample = Attendance.objects.values('student_id', 'event_id').first() or {'student_id': 0, 'event_id': 0}
+        account_number = (
+            UserProfile.objects.filter(user_type='student').values_list('account_number', flat=True).first()
+            or '00000000'
+        )
+        event_date = Event.objects.values_list('date', flat=True).first() or today
+
+        return [
+            (
+                'duplicate_check',
+                'Asistencia válida de un estudiante en un evento (escáner)',
+                Attendance.objects.filter(
+                    student_id=sample['student_id'], event_id=sample['event_id'], is_valid=True
+                )
+            ),
+            (
+                'student_day_attendances',
+                'Asistencias válidas del estudiante en el día (eventos simultáneos)',
+                Attendance.objects.filter(
+                    student_id=sample['student_id'], event__date=event_date, is_valid=True
+                ).values_list('event_id', 'event__start_time', 'event__end_time')
+            ),
+            (
+                'event_attendances',
+                'Asistencias de un evento, las más recientes primero',
+                Attendance.objects.filter(event_id=sample['event_id']).order_by('-timestamp')[:50]
+            ),
+            (
+                'recent_attendances',
+                'Últimos registros (get_recent_attendances)',
+                Attendance.objects.order_by('-timestamp')[:5]
+            ),
+            (
+                'open_events',
+                'Eventos activos de ayer a mañana (eventos abiertos para registro)',
+                Event.objects.filter(
+                    is_active=True,
+                    date__range=(today - timedelta(days=1), today + timedelta(days=1))
+                ).order_by('date', 'start_time')
+            ),
+            (
+                'event_agenda',
+                'Agenda de eventos activos en orden cronológico',
+                Event.objects.filter(is_active=True).order_by('date', 'start_time')
+            ),
+            (
+                'student_lookup',
+                'Estudiante por número de cuenta',
+                UserProfile.objects.filter(user_type='student', account_number=account_number)
+            ),
+            (
+                'certificate_stats',
+                'Estadísticas que cumplen el mínimo, por porcentaje',
+                AttendanceStats.objects.filter(attendance_percentage__gte=80.0).order_by('-attendance_percentage')
+            ),
+        ]
+
+    def _explain(self, queryset, label):
+        if self.is_postgres:
+            return queryset.explain(analyze=True, buffers=True)
+        # sqlite3 reutiliza el plan de una sentencia idéntica aunque se hayan
+        # borrado índices; el comentario hace distinta la sentencia de cada pasada
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql} /* {label} */', params)
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def _drop_indexes(self):
+        """
+        Borrar (dentro de la transacción actual) los índices del plan de índices.
+        Las restricciones únicas con condición se crean como índices, así que
+        también se borran con DROP INDEX.
+        """
+        names = []
+        for model in INDEXED_MODELS:
+            names.extend(index.name for index in model._meta.indexes)
+            names.extend(
+                constraint.name for constraint in model._meta.constraints
+                if constraint.name in INDEXED_CONSTRAINTS.get(model, [])
+            )
+
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        return len(names)
+
+    def _report(self, label, plan, show_plan):
+        if self.is_postgres:
+            scans = [
+                f'{scan} using {index} on {table}' if index else f'{scan} on {table}'
+                for scan, index, table in PG_SCAN_RE.findall(plan)
+            ]
+            timing = PG_TIME_RE.search(plan)
+            elapsed = f'{timing.group(1)} ms' if timing else 'sin tiempo'
+        else:
+            scans = [
+                f'{scan} {table} USING INDEX {index}' if index else f'{scan} {table}'
+                for scan, table, index in SQLITE_SCAN_RE.findall(plan)
+            ]
+            elapsed = '-'
+
+        has_seq_scan = any(scan.startswith(('Seq Scan', 'SCAN')) and 'INDEX' not in scan for scan in scans)
+        summary = '; '.join(scans) or 'sin recorridos de tabla'
+        style = self.style.WARNING if has_seq_scan else self.style.SUCCESS
+        self.stdout.write(f'  {label:<12} {style(summary)} | {elapsed}')
+        if show_plan:
+            for line in plan.splitlines():
+                self.stdout.write(f'      {line}')
@@ -0,0 +1,122 @@
+"""
+Comando para verificar que los contadores incrementales de AttendanceStats
+y de asistentes de cada evento coincidan con un recálculo completo.
+
+Las estadísticas y Event.attendance_count se mantienen de forma incremental en
+cada registro o eliminación de asistencia; este comando compara los valores
+guardados contra el cálculo completo (por bloques de horario, y el conteo de
+asistencias válidas de cada evento) y opcionalmente corrige las diferencias.
+
+Uso:
+    python manage.py check_stats_consistency
+    python manage.py check_stats_consistency --fix
+    python manage.py check_stats_consistency --students 12345678 87654321
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Q
+from attendance.models import AttendanceStats
+from authentication.models import UserProfile
+from events.models import Event
+
+PERCENTAGE_TOLERANCE = 0.01
+
+
+class Command(BaseCommand):
+    help = 'Compara las estadísticas guardadas contra un recálculo completo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            nargs='+',
+            metavar='NUMERO_CUENTA',
+            help='Verificar solo los estudiantes con estos números de cuenta'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Guardar los valores recalculados de las estadísticas inconsistentes'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Máximo de diferencias a mostrar en detalle (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        # Los contadores de eventos no dependen de qué estudiantes se revisen
+        if not options['students']:
+            self.check_event_counts(options)
+
+        students = UserProfile.objects.filter(user_type='student', attendancestats__isnull=False)
+        if options['students']:
+            students = students.filter(account_number__in=options['students'])
+
+        stored = {
+            row[0]: row[1:]
+            for row in AttendanceStats.objects.filter(student__in=students).values_list(
+                'student_id', 'student__account_number', 'total_events', 'attended_events',
+                'attendance_percentage', 'is_stale'
+            )
+        }
+
+        mismatches = []
+        for expected in AttendanceStats.compute_bulk(students):
+            account_number, total, attended, percentage, is_stale = stored[expected.student_id]
+            # El porcentaje es un float redondeado en Python o en la BD: se
+            # compara con una tolerancia de una centésima
+            if (total, attended) != (expected.total_events, expected.attended_events) or (
+                round(abs(percentage - expected.attendance_percentage), 4) > PERCENTAGE_TOLERANCE
+            ):
+                mismatches.append((account_number, is_stale, (total, attended, percentage), expected))
+
+        self.stdout.write(f'Estadísticas revisadas: {len(stored)}')
+
+        if not mismatches:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'✓ Todas las estadísticas son consistentes ({elapsed:.2f}s)'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'Estadísticas inconsistentes: {len(mismatches)}'))
+        for account_number, is_stale, current, expected in mismatches[:options['limit']]:
+            stale_note = ' (pendiente de recálculo)' if is_stale else ''
+            self.stdout.write(
+                f'  {account_number}{stale_note}: guardado {current[1]}/{current[0]} ({current[2]}%) '
+                f'→ esperado {expected.attended_events}/{expected.total_events} ({expected.attendance_percentage}%)'
+            )
+        if len(mismatches) > options['limit']:
+            self.stdout.write(f'  ... y {len(mismatches) - options["limit"]} más')
+
+        if options['fix']:
+            # Se recalculan con las filas bloqueadas, no se guardan los valores leídos arriba
+            fixed = AttendanceStats.recalculate_bulk(
+                students.filter(pk__in=[expected.student_id for _, _, _, expected in mismatches])
+            )
+            self.stdout.write(self.style.SUCCESS(f'✓ Se corrigieron {fixed} estadísticas'))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Tiempo: {elapsed:.2f}s')
+
+    def check_event_counts(self, options):
+        """Comparar Event.attendance_count contra el conteo de asistencias válidas"""
+        mismatches = list(Event.objects.annotate(
+            actual=Count('attendance', filter=Q(attendance__is_valid=True))
+        ).exclude(attendance_count=F('actual')).values_list('id', 'title', 'attendance_count', 'actual'))
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('✓ Los contadores de asistentes de los eventos son consistentes'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'Contadores de eventos inconsistentes: {len(mismatches)}'))
+        for event_id, title, stored, actual in mismatches[:options['limit']]:
+            self.stdout.write(f'  #{event_id} {title}: guardado {stored} → esperado {actual}')
+        if len(mismatches) > options['limit']:
+            self.stdout.write(f'  ... y {len(mismatches) - options["limit"]} más')
+
+        if options['fix']:
+            fixed = Event.recount_attendance(Event.objects.filter(pk__in=[row[0] for row in mismatches]))
+            self.stdout.write(self.style.SUCCESS(f'✓ Se corrigieron {fixed} contadores de eventos'))
@@ -0,0 +1,139 @@
+"""
+Comando para detectar asistencias duplicadas y en eventos simultáneos.
+
+Reemplaza a find_duplicate_attendances.py, que comparaba por pares las
+asistencias de cada estudiante. Los conflictos se obtienen con una sola
+consulta (ver Attendance.conflicts()): una asistencia válida está en conflicto
+si el mismo estudiante ya tenía, antes, una asistencia válida en la misma fecha
+al mismo evento (duplicado) o a un evento activo con horario traslapado
+(simultáneo).
+
+Con --fix se invalidan en bloque las asistencias posteriores (se conserva la
+primera registrada) y se recalculan las estadísticas de los estudiantes
+afectados. Con --csv se guarda el detalle de todos los conflictos.
+
+Uso:
+    python manage.py detect_conflicts
+    python manage.py detect_conflicts --fecha 2025-10-21
+    python manage.py detect_conflicts --students 12345678 87654321 --fix
+    python manage.py detect_conflicts --csv conflictos.csv
+"""
+import csv
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = 'Detecta asistencias duplicadas y en eventos simultáneos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            nargs='+',
+            metavar='NUMERO_CUENTA',
+            help='Revisar solo los estudiantes con estos números de cuenta'
+        )
+        parser.add_argument('--fecha', type=str, help='Revisar solo los eventos de esta fecha (YYYY-MM-DD)')
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Invalidar las asistencias posteriores de cada conflicto'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Máximo de conflictos a mostrar en detalle (default: 20)'
+        )
+        parser.add_argument('--csv', type=str, help='Guardar el detalle de todos los conflictos en un CSV')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        conflicts = Attendance.conflicts()
+        if options['students']:
+            conflicts = conflicts.filter(student__account_number__in=options['students'])
+        if options['fecha']:
+            try:
+                event_date = datetime.strptime(options['fecha'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f'Fecha inválida: {options["fecha"]} (formato YYYY-MM-DD)')
+            conflicts = conflicts.filter(event__date=event_date)
+
+        rows = list(conflicts.order_by('event__date', 'student_id', 'timestamp', 'pk').values_list(
+            'pk', 'conflict_with', 'is_duplicate', 'student__account_number', 'student__full_name',
+            'event__date', 'event__title', 'event__start_time', 'event__end_time', 'timestamp'
+        ))
+        earlier = {
+            row[0]: row[1:]
+            for row in Attendance.objects.filter(pk__in={row[1] for row in rows}).values_list(
+                'pk', 'event__title', 'event__start_time', 'event__end_time', 'timestamp'
+            )
+        }
+        elapsed = time.perf_counter() - started
+
+        duplicates = sum(1 for row in rows if row[2])
+        students = {row[3] for row in rows}
+        self._print_conflicts(rows, earlier, options['limit'])
+        if options['csv'] and rows:
+            self._write_csv(options['csv'], rows, earlier)
+
+        # Resumen
+        self.stdout.write('\n' + '='*60)
+        if not rows:
+            self.stdout.write(self.style.SUCCESS(f'No se encontraron conflictos ({elapsed:.2f}s)'))
+            self.stdout.write('='*60)
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f'Conflictos: {len(rows)} ({duplicates} duplicados, {len(rows) - duplicates} simultáneos) '
+            f'de {len(students)} estudiantes ({elapsed:.2f}s)'
+        ))
+        if options['csv']:
+            self.stdout.write(f'Detalle en {options["csv"]}')
+
+        if options['fix']:
+            started = time.perf_counter()
+            invalidated = Attendance.invalidate_conflicts(conflicts)
+            self.stdout.write(self.style.SUCCESS(
+                f'Asistencias invalidadas: {len(invalidated)} ({time.perf_counter() - started:.2f}s)'
+            ))
+        else:
+            self.stdout.write('Ejecuta con --fix para invalidar las asistencias posteriores')
+        self.stdout.write('='*60)
+
+    def _print_conflicts(self, rows, earlier, limit):
+        """Detalle de los primeros conflictos: la asistencia anterior y la posterior"""
+        for (pk, conflict_with, is_duplicate, account_number, full_name,
+                event_date, title, start_time, end_time, timestamp) in rows[:limit]:
+            kind = 'Duplicado' if is_duplicate else 'Simultáneo'
+            first_title, first_start, first_end, first_timestamp = earlier[conflict_with]
+            self.stdout.write(self.style.WARNING(
+                f'{kind}: {account_number} {full_name} ({event_date})\n'
+                f'    #{conflict_with} {first_title} {first_start:%H:%M}-{first_end:%H:%M} '
+                f'registrada {timezone.localtime(first_timestamp):%H:%M:%S}\n'
+                f'    #{pk} {title} {start_time:%H:%M}-{end_time:%H:%M} '
+                f'registrada {timezone.localtime(timestamp):%H:%M:%S}'
+            ))
+        if len(rows) > limit:
+            self.stdout.write(self.style.WARNING(f'... y {len(rows) - limit} conflictos más'))
+
+    def _write_csv(self, path, rows, earlier):
+        """Guardar el detalle de todos los conflictos en un CSV"""
+        with open(path, 'w', newline='', encoding='utf-8-sig') as report:
+            writer = csv.writer(report)
+            writer.writerow((
+                'tipo', 'numero_cuenta', 'nombre_completo', 'fecha', 'asistencia_anterior',
+                'evento_anterior', 'asistencia', 'evento', 'hora_registro'
+            ))
+            for (pk, conflict_with, is_duplicate, account_number, full_name,
+                    event_date, title, start_time, end_time, timestamp) in rows:
+                writer.writerow((
+                    'duplicado' if is_duplicate else 'simultaneo', account_number, full_name,
+                    event_date, conflict_with, earlier[conflict_with][0], pk, title,
+                    timezone.localtime(timestamp).isoformat()
+                ))
@@ -0,0 +1,271 @@
+"""
+Comando para cargar asistencias desde hojas de cálculo con distintos formatos.
+
+Reemplaza a los scripts process_*.py, add_missing_students.py y
+corregir_asistencias.py: el formato del archivo se describe con un mapeo
+declarativo (ver attendance/ingestion.py) y todas las cargas pasan por el mismo
+núcleo por lotes que import_attendance.
+
+Mapeos incluidos:
+  asistencias  numero_cuenta, nombre_completo, titulo_evento, fecha_evento,
+               metodo_registro, notas (hoja "Asistencias")
+  registros    Attendee identifier, Attendee name, Evento, Hora de registro
+               (hoja "Registros")
+  lista        account_number, full_name de un solo evento (requiere --evento)
+
+Cada ejecución guarda un reporte JSON (filas a crear/creadas, rechazadas con
+su motivo, nombres distintos a los de la BD, eventos asignados por similitud
+de título, estudiantes creados y tiempos) en
+logs/ingestion/, o en la ruta de --report. Con --dry-run se ejecuta todo dentro
+de una transacción que se revierte y se muestra la diferencia.
+
+Uso:
+    python manage.py ingest_attendance Registros_Asistencia.xlsx --mapping registros --registrador 11111111 --skip-validation
+    python manage.py ingest_attendance Book7.xlsx --mapping lista --evento "Matemáticas Aplicadas y Computación" --registrador 11111111 --skip-validation --dry-run
+    python manage.py ingest_attendance faltantes.xlsx --mapping lista --evento "Tecnologías IIoT" --registrador 11111111 --create-students
+    python manage.py ingest_attendance archivo.csv --mapping mi_formato.json --registrador 11111111
+"""
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+from attendance.importing import AttendanceImporter
+from attendance.ingestion import load_mapping, normalize, read_frame
+from authentication.models import UserProfile
+
+DIFF_LINES = 20
+
+
+class Command(BaseCommand):
+    help = 'Carga asistencias desde una hoja de cálculo usando un mapeo de columnas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='Ruta al archivo Excel o CSV')
+        parser.add_argument(
+            '--mapping',
+            type=str,
+            default='asistencias',
+            help='Nombre del mapeo (asistencias, registros, lista) o ruta a un JSON (default: asistencias)'
+        )
+        parser.add_argument('--sheet', type=str, help='Hoja a leer (default: la del mapeo)')
+        parser.add_argument(
+            '--registrador',
+            type=str,
+            required=True,
+            help='Número de cuenta del asistente que realiza la carga'
+        )
+        parser.add_argument('--evento', type=str, help='Título del evento, para mapeos sin columna de evento')
+        parser.add_argument('--fecha', type=str, help='Fecha del evento (YYYY-MM-DD), si el título se repite')
+        parser.add_argument(
+            '--skip-validation',
+            action='store_true',
+            help='Omitir validación de horarios (para cargar asistencias históricas)'
+        )
+        parser.add_argument(
+            '--create-students',
+            action='store_true',
+            help='Dar de alta a los estudiantes que no existen (con el nombre del archivo)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar lo que se haría sin guardar cambios'
+        )
+        parser.add_argument('--report', type=str, help='Ruta del reporte JSON (default: logs/ingestion/)')
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f'Archivo no encontrado: {path}')
+
+        try:
+            registrador = UserProfile.objects.get(account_number=options['registrador'], user_type='assistant')
+        except UserProfile.DoesNotExist:
+            raise CommandError(f'No se encontró un asistente con número de cuenta: {options["registrador"]}')
+
+        started_at = timezone.now()
+        started = time.perf_counter()
+        frame, rows, rejected = self._read(path, options)
+        reading = time.perf_counter() - started
+
+        importer = AttendanceImporter(
+            registrador,
+            skip_validation=options['skip_validation'],
+            dry_run=options['dry_run'],
+            create_students=options['create_students']
+        )
+        importer.timings['lectura'] = reading
+        for row, reason in rejected:
+            importer.reject(row, reason)
+
+        try:
+            importer.load(rows)
+        except IntegrityError as e:
+            # Otro proceso registró la misma asistencia durante la carga
+            raise CommandError(f'Error al guardar las asistencias, no se cargó nada: {e}')
+        elapsed = time.perf_counter() - started
+
+        importer.rejected.sort(key=lambda rejected_row: rejected_row[0]['row'])
+        self._print_diff(importer)
+
+        report = self._build_report(path, options, registrador, importer, started_at, elapsed, len(frame))
+        report_path = Path(options['report']) if options['report'] else (
+            settings.LOGS_DIR / 'ingestion' / f'{started_at:%Y%m%d_%H%M%S}_{path.stem}.json'
+        )
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+        self._print_summary(importer, options, report, report_path)
+
+    def _read(self, path, options):
+        """Leer el archivo con el mapeo y normalizar sus filas: (frame, filas, rechazadas)"""
+        event_date = None
+        if options['fecha']:
+            try:
+                event_date = datetime.strptime(options['fecha'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f'Fecha inválida: {options["fecha"]} (formato YYYY-MM-DD)')
+
+        try:
+            mapping = load_mapping(options['mapping'])
+            if 'event_title' not in mapping['columns'] and not options['evento']:
+                raise CommandError(f'El mapeo "{options["mapping"]}" no tiene columna de evento; indica --evento')
+
+            frame = read_frame(path, mapping, options['sheet'])
+            rows, rejected = normalize(frame, mapping, path.name, options['evento'], event_date)
+        except ValueError as e:
+            raise CommandError(str(e))
+        return frame, rows, rejected
+
+    def _build_report(self, path, options, registrador, importer, started_at, elapsed, total_rows):
+        """Reporte JSON de la carga: parámetros, tiempos y el detalle de cada fila"""
+        return {
+            'file': str(path.resolve()),
+            'mapping': options['mapping'],
+            'event': options['evento'],
+            'dry_run': options['dry_run'],
+            'skip_validation': options['skip_validation'],
+            'registered_by': registrador.account_number,
+            'started_at': started_at.isoformat(),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows': total_rows,
+            'rows_per_second': round(total_rows / elapsed) if elapsed else None,
+            'timings': {stage: round(seconds, 3) for stage, seconds in importer.timings.items()},
+            'created': len(importer.accepted),
+            'rejected': len(importer.rejected),
+            'students_created': [
+                {'account_number': student.account_number, 'full_name': student.full_name}
+                for student in importer.created_students
+            ],
+            'diff': {
+                'add': [
+                    {
+                        'row': row['row'],
+                        'account_number': attendance.student.account_number,
+                        'event_id': attendance.event.id,
+                        'event': attendance.event.title,
+                        'date': attendance.event.date.isoformat(),
+                        'timestamp': attendance.timestamp.isoformat(),
+                    }
+                    for row, attendance in importer.accepted
+                ],
+                'reject': [
+                    {
+                        'row': row['row'],
+                        'account_number': row['numero_cuenta'],
+                        'event': row['titulo_evento'],
+                        'reason': reason,
+                    }
+                    for row, reason in importer.rejected
+                ],
+                'name_mismatches': [
+                    {
+                        'row': row['row'],
+                        'account_number': row['numero_cuenta'],
+                        'file_name': row['nombre_completo'],
+                        'db_name': db_name,
+                    }
+                    for row, db_name in importer.name_mismatches
+                ],
+                'fuzzy_matches': [
+                    {
+                        'row': row['row'],
+                        'file_title': row['titulo_evento'],
+                        'event_id': event.id,
+                        'event': event.title,
+                        'date': event.date.isoformat(),
+                    }
+                    for row, event in importer.fuzzy_matches
+                ],
+            },
+        }
+
+    def _print_summary(self, importer, options, report, report_path):
+        """Resumen final: conteos de cada tipo de fila, velocidad y ruta del reporte"""
+        self.stdout.write('\n' + '='*60)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Modo de prueba: no se guardó ningún cambio'))
+            self.stdout.write(self.style.SUCCESS(f'Asistencias a crear: {len(importer.accepted)}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Asistencias creadas: {len(importer.accepted)}'))
+        if importer.created_students:
+            verb = 'a crear' if options['dry_run'] else 'creados'
+            self.stdout.write(self.style.SUCCESS(f'Estudiantes {verb}: {len(importer.created_students)}'))
+        if importer.rejected:
+            self.stdout.write(self.style.WARNING(f'Filas rechazadas: {len(importer.rejected)}'))
+        if importer.name_mismatches:
+            self.stdout.write(self.style.WARNING(f'Nombres distintos a los de la BD: {len(importer.name_mismatches)}'))
+        if importer.fuzzy_matches:
+            self.stdout.write(self.style.WARNING(f'Eventos asignados por similitud: {len(importer.fuzzy_matches)}'))
+        self.stdout.write(
+            f'Filas procesadas: {report["rows"]} en {report["elapsed_seconds"]:.2f}s '
+            f'({report["rows_per_second"] or 0:,} filas/s)'
+        )
+        self.stdout.write('  ' + ', '.join(
+            f'{stage}: {seconds:.2f}s' for stage, seconds in importer.timings.items()
+        ))
+        self.stdout.write(f'Reporte: {report_path}')
+        self.stdout.write('='*60)
+
+    def _print_diff(self, importer):
+        """Primeras filas de cada tipo de cambio; el detalle completo queda en el reporte"""
+        sections = [
+            (
+                self.style.SUCCESS,
+                [
+                    f'+ Fila {row["row"]}: {attendance.student.account_number} {attendance.student.full_name} '
+                    f'→ {attendance.event.title} ({attendance.event.date})'
+                    for row, attendance in importer.accepted
+                ]
+            ),
+            (
+                self.style.WARNING,
+                [f'- Fila {row["row"]}: {reason}' for row, reason in importer.rejected]
+            ),
+            (
+                self.style.NOTICE,
+                [
+                    f'~ Fila {row["row"]}: {row["numero_cuenta"]} "{row["nombre_completo"]}" en el archivo, '
+                    f'"{db_name}" en la BD'
+                    for row, db_name in importer.name_mismatches
+                ]
+            ),
+            (
+                self.style.NOTICE,
+                [
+                    f'? Fila {row["row"]}: "{row["titulo_evento"]}" asignado por similitud a '
+                    f'"{event.title}" ({event.date})'
+                    for row, event in importer.fuzzy_matches
+                ]
+            ),
+        ]
+        for style, lines in sections:
+            for line in lines[:DIFF_LINES]:
+                self.stdout.write(style(line))
+            if len(lines) > DIFF_LINES:
+                self.stdout.write(style(f'  ... y {len(lines) - DIFF_LINES} más'))
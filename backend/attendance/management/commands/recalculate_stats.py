@@ -1,35 +1,110 @@
-from django.core.management.base import BaseCommand
-from attendance.models import AttendanceStats
+"""
+Comando para recalcular las estadísticas de asistencia usando bloques de horario.
+
+El cálculo se hace en bloque: una consulta agrupada obtiene los bloques asistidos
+de todos los estudiantes y el resultado se escribe con un upsert por lotes.
+
+Uso:
+    python manage.py recalculate_stats
+    python manage.py recalculate_stats --students 12345678 87654321
+    python manage.py recalculate_stats --since 2025-10-20
+    python manage.py recalculate_stats --dry-run
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from attendance.models import Attendance, AttendanceStats
 from authentication.models import UserProfile
+from events.models import EventSlot
 
 
 class Command(BaseCommand):
     help = 'Recalcula las estadísticas de asistencia de todos los estudiantes usando bloques de horario'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            nargs='+',
+            metavar='NUMERO_CUENTA',
+            help='Recalcular solo los estudiantes con estos números de cuenta'
+        )
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Recalcular solo estudiantes con asistencias registradas desde esta fecha (YYYY-MM-DD o ISO 8601)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Calcular y mostrar cuántas estadísticas cambiarían, sin guardar'
+        )
+
     def handle(self, *args, **options):
+        started = time.perf_counter()
         self.stdout.write('Recalculando estadísticas de asistencia...\n')
 
-        # Obtener todos los estudiantes
-        students = UserProfile.objects.filter(user_type='student')
-        total_students = students.count()
+        # Reconstruir el índice de bloques por si hubo cambios directos en la BD
+        if options['dry_run']:
+            total_slots = EventSlot.objects.count()
+            self.stdout.write(f'[DRY-RUN] Usando el índice actual: {total_slots} bloques de horario\n')
+        else:
+            total_slots = EventSlot.rebuild()
+            self.stdout.write(f'Índice de bloques reconstruido: {total_slots} bloques de horario\n')
 
-        self.stdout.write(f'Se encontraron {total_students} estudiantes\n')
+        students = UserProfile.objects.filter(user_type='student')
 
-        updated = 0
-        for student in students:
-            # Obtener o crear las estadísticas
-            stats, created = AttendanceStats.objects.get_or_create(student=student)
+        if options['students']:
+            students = students.filter(account_number__in=options['students'])
 
-            # Actualizar con la nueva lógica
-            stats.update_stats()
+        if options['since']:
+            since = self._parse_since(options['since'])
+            students = students.filter(
+                pk__in=Attendance.objects.filter(timestamp__gte=since).values('student_id')
+            )
 
-            updated += 1
+        if options['dry_run']:
+            computed = AttendanceStats.compute_bulk(students)
+            self.stdout.write(f'Se calcularon las estadísticas de {len(computed)} estudiantes\n')
+            current = {
+                student_id: (total, attended, percentage)
+                for student_id, total, attended, percentage in AttendanceStats.objects.filter(
+                    student__in=students
+                ).values_list('student_id', 'total_events', 'attended_events', 'attendance_percentage')
+            }
+            changed = sum(
+                1 for stats in computed
+                if current.get(stats.student_id) != (
+                    stats.total_events, stats.attended_events, stats.attendance_percentage
+                )
+            )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.WARNING(
+                f'\n[DRY-RUN] {changed} de {len(computed)} estadísticas cambiarían. '
+                f'No se guardó nada ({elapsed:.2f}s)'
+            ))
+            return
 
-            if updated % 10 == 0:
-                self.stdout.write(f'Procesados {updated}/{total_students} estudiantes...')
+        # Calcular y guardar con las filas bloqueadas, para no pisar escaneos concurrentes
+        updated = AttendanceStats.recalculate_bulk(students)
+        elapsed = time.perf_counter() - started
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nEstadisticas recalculadas exitosamente para {updated} estudiantes'
+                f'\nEstadisticas recalculadas exitosamente para {updated} estudiantes en {elapsed:.2f}s'
             )
         )
+
+    def _parse_since(self, value):
+        """Interpretar --since como fecha o fecha/hora"""
+        since = parse_datetime(value)
+        if since is None:
+            date = parse_date(value)
+            if date is None:
+                raise CommandError(f'Fecha inválida para --since: {value}')
+            since = datetime.combine(date, datetime.min.time())
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
@@ -0,0 +1,70 @@
+"""
+Worker que procesa la cola de recálculo de estadísticas (StatsRecalculationJob).
+
+La cola vive en la base de datos, así que no requiere un broker externo. Se pueden
+ejecutar varios workers: cada trabajo se toma con SELECT ... FOR UPDATE SKIP LOCKED.
+
+Uso:
+    python manage.py run_stats_worker
+    python manage.py run_stats_worker --once
+    python manage.py run_stats_worker --interval 10
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from attendance.models import StatsRecalculationJob
+
+
+class Command(BaseCommand):
+    help = 'Procesa en segundo plano los recálculos de estadísticas encolados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Procesar los trabajos listos y terminar'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Segundos entre revisiones de la cola (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        self.stdout.write(f'Worker de estadísticas iniciado (revisando cada {interval}s)')
+
+        try:
+            while True:
+                close_old_connections()
+                processed = self.process_ready_jobs()
+
+                if options['once']:
+                    self.stdout.write(f'Trabajos procesados: {processed}')
+                    break
+
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('\nWorker detenido')
+
+    def process_ready_jobs(self):
+        """Ejecutar todos los trabajos cuyo tiempo de espera ya venció"""
+        processed = 0
+        while True:
+            job = StatsRecalculationJob.claim_next()
+            if job is None:
+                return processed
+
+            started = time.perf_counter()
+            ok = job.run()
+            elapsed = time.perf_counter() - started
+            processed += 1
+
+            if ok:
+                self.stdout.write(self.style.SUCCESS(
+                    f'✓ Recálculo #{job.pk}: {job.updated_students} estudiantes en {elapsed:.2f}s'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ Recálculo #{job.pk} falló: {job.error}'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_alter_attendance_external_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsRecalculationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Terminado'), ('failed', 'Fallido')], db_index=True, default='pending', max_length=10, verbose_name='Estado')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Motivo')),
+                ('requested_at', models.DateTimeField(auto_now_add=True, verbose_name='Solicitado')),
+                ('run_after', models.DateTimeField(verbose_name='Ejecutar después de')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('updated_students', models.IntegerField(default=0, verbose_name='Estudiantes actualizados')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+            options={
+                'verbose_name': 'Recálculo de estadísticas',
+                'verbose_name_plural': 'Recálculos de estadísticas',
+                'ordering': ['-requested_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='attendancestats',
+            name='is_stale',
+            field=models.BooleanField(default=False, help_text='Los eventos cambiaron y el recálculo en segundo plano aún no termina', verbose_name='Pendiente de recalcular'),
+        ),
+    ]
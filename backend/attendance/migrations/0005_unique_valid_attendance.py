@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:55
+
+from django.db import migrations, models
+
+
+def invalidate_duplicate_attendances(apps, schema_editor):
+    """
+    Antes de crear la restricción única, dejar solo la primera asistencia válida
+    de cada (estudiante, evento). Las repetidas se marcan como no válidas; el
+    bloque sigue cubierto por la primera, así que las estadísticas no cambian.
+    """
+    Attendance = apps.get_model('attendance', 'Attendance')
+
+    duplicates = Attendance.objects.filter(
+        is_valid=True,
+        student__isnull=False
+    ).values('student_id', 'event_id').annotate(
+        total=models.Count('id'),
+        first_id=models.Min('id')
+    ).filter(total__gt=1)
+
+    for row in duplicates:
+        Attendance.objects.filter(
+            student_id=row['student_id'],
+            event_id=row['event_id'],
+            is_valid=True
+        ).exclude(pk=row['first_id']).update(is_valid=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_statsrecalculationjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(invalidate_duplicate_attendances, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_valid', True)), fields=('student', 'event'), name='unique_valid_attendance_per_event'),
+        ),
+    ]
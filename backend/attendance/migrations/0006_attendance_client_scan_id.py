@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_unique_valid_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='client_scan_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='ID de escaneo del cliente'),
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Hora de registro'),
+        ),
+    ]
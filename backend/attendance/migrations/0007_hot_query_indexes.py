@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_client_scan_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['event', '-timestamp'], name='attendance__event_i_c8b0a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['-timestamp'], name='attendance__timesta_ac9191_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancestats',
+            index=models.Index(fields=['attendance_percentage'], name='attendance__attenda_5899a8_idx'),
+        ),
+    ]
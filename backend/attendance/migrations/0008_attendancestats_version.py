@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancestats',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Aumenta con cada cambio de las estadísticas; se usa como ETag', verbose_name='Versión'),
+        ),
+    ]
@@ -1,7 +1,11 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce, Round
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from datetime import datetime, time as dt_time, timedelta
+from django.utils.http import quote_etag
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
 from authentication.models import UserProfile
 from events.models import Event
 
@@ -24,7 +28,8 @@ class Attendance(models.Model):
         verbose_name="Evento"
     )
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         verbose_name="Hora de registro"
     )
     registered_by = models.ForeignKey(
@@ -49,132 +54,741 @@ class Attendance(models.Model):
         default=True,
         verbose_name="Asistencia válida"
     )
+    # UUID generado por el navegador para cada escaneo; permite reenviar la
+    # cola sin conexión sin crear duplicados
+    client_scan_id = models.UUIDField(
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="ID de escaneo del cliente"
+    )
     
     class Meta:
         verbose_name = "Asistencia"
         verbose_name_plural = "Asistencias"
         ordering = ['-timestamp']
-    
-    def clean(self):
-        # Validar que haya un estudiante
-        if not self.student:
-            raise ValidationError("Debe especificar un estudiante.")
+        indexes = [
+            # Asistencias de un evento, las más recientes primero (admin, reportes)
+            models.Index(fields=['event', '-timestamp']),
+            # Últimos registros (get_recent_attendances, filtros por fecha del admin)
+            models.Index(fields=['-timestamp']),
+        ]
+        # La restricción única parcial (student, event) WHERE is_valid también
+        # sirve como índice para las búsquedas de duplicados del escáner
+        constraints = [
+            # Respaldo en la BD contra registros duplicados concurrentes
+            # (dos escáneres leyendo la misma credencial al mismo tiempo)
+            models.UniqueConstraint(
+                fields=['student', 'event'],
+                condition=models.Q(is_valid=True),
+                name='unique_valid_attendance_per_event'
+            ),
+        ]
 
-        # Validar que el registrador sea un asistente
-        if self.registered_by.user_type != 'assistant':
-            raise ValidationError("Solo los asistentes pueden registrar asistencias.")
+    DUPLICATE_MESSAGE = "Este estudiante ya tiene asistencia registrada para este evento."
+    OVERLAP_MESSAGE = "El estudiante ya tiene asistencia registrada en un evento simultáneo."
+    CAPACITY_MESSAGE = "El evento ya alcanzó su capacidad máxima."
 
-        # Validar que el evento esté en curso (entre start_time y end_time)
-        from authentication.models import SystemConfiguration
-        config = SystemConfiguration.get_config()
-
-        now = timezone.now()
-        event_date = self.event.date
-        event_start = datetime.combine(event_date, self.event.start_time)
-        event_end = datetime.combine(event_date, self.event.end_time)
-
-        # Hacer timezone-aware si es necesario
-        if timezone.is_naive(event_start):
-            event_start = timezone.make_aware(event_start)
-        if timezone.is_naive(event_end):
-            event_end = timezone.make_aware(event_end)
+    @staticmethod
+    def validate_registration_window(event, config, now=None):
+        """Validar que el momento del registro esté dentro de la ventana configurada del evento"""
+        if now is None:
+            now = timezone.now()
+        event_date = event.date
 
         # Usar configuración global del sistema
-        registration_start = event_start - timedelta(minutes=config.minutes_before_event)
-        registration_end = event_start + timedelta(minutes=config.minutes_after_start)
+        registration_start, registration_end = event.registration_window(config)
 
         if now < registration_start:
             raise ValidationError(
                 f"No se puede registrar asistencia antes del evento. "
-                f"El evento inicia el {event_date.strftime('%d/%m/%Y')} a las {self.event.start_time.strftime('%H:%M')}. "
+                f"El evento inicia el {event_date.strftime('%d/%m/%Y')} a las {event.start_time.strftime('%H:%M')}. "
                 f"Puedes registrar desde {config.minutes_before_event} minutos antes."
             )
 
         if now > registration_end:
             raise ValidationError(
                 f"No se puede registrar asistencia después del tiempo límite. "
-                f"El evento inició el {event_date.strftime('%d/%m/%Y')} a las {self.event.start_time.strftime('%H:%M')}. "
+                f"El evento inició el {event_date.strftime('%d/%m/%Y')} a las {event.start_time.strftime('%H:%M')}. "
                 f"El tiempo límite de registro es {config.minutes_after_start} minutos después del inicio."
             )
 
-        # Validar que no haya duplicados
-        existing = Attendance.objects.filter(
-            student=self.student,
-            event=self.event,
+    @staticmethod
+    def find_conflict(event, same_day):
+        """
+        Buscar entre las asistencias válidas del estudiante en el día del evento
+        un duplicado o un evento simultáneo.
+
+        Args:
+            event: Evento que se quiere registrar
+            same_day: Iterable de tuplas (event_id, start_time, end_time, is_active, slot_id)
+                de las asistencias válidas del estudiante en esa fecha
+
+        Returns:
+            Mensaje de error, o None si no hay conflicto.
+        """
+        for event_id, start_time, end_time, is_active, slot_id in same_day:
+            if event_id == event.id:
+                return Attendance.DUPLICATE_MESSAGE
+            if is_active and start_time < event.end_time and end_time > event.start_time:
+                return Attendance.OVERLAP_MESSAGE
+        return None
+
+    def _student_day_attendances(self):
+        """Asistencias válidas del estudiante en la fecha del evento (una sola consulta)"""
+        same_day = Attendance.objects.filter(
+            student_id=self.student_id,
+            event__date=self.event.date,
             is_valid=True
         )
         if self.pk:
-            existing = existing.exclude(pk=self.pk)
-        if existing.exists():
-            raise ValidationError("Este estudiante ya tiene asistencia registrada para este evento.")
-
-        # Validar eventos simultáneos
-        if self.student:
-            overlapping_events = Event.objects.filter(
-                date=self.event.date,
-                start_time__lt=self.event.end_time,
-                end_time__gt=self.event.start_time,
-                is_active=True
-            ).exclude(id=self.event.id)
-            
-            existing_attendance = Attendance.objects.filter(
-                student=self.student,
-                event__in=overlapping_events,
-                is_valid=True
-            ).exists()
-            
-            if existing_attendance:
-                raise ValidationError(
-                    "El estudiante ya tiene asistencia registrada en un evento simultáneo."
+            same_day = same_day.exclude(pk=self.pk)
+        return same_day.values_list(
+            'event_id', 'event__start_time', 'event__end_time', 'event__is_active', 'event__slot_id'
+        )
+
+    def validate_conflicts(self):
+        """Validar duplicados y eventos simultáneos del estudiante"""
+        if not self.student_id:
+            return
+        conflict = self.find_conflict(self.event, self._student_day_attendances())
+        if conflict:
+            raise ValidationError(conflict)
+
+    def clean(self):
+        # Validar que haya un estudiante
+        if not self.student:
+            raise ValidationError("Debe especificar un estudiante.")
+
+        # Validar que el registrador sea un asistente
+        if self.registered_by.user_type != 'assistant':
+            raise ValidationError("Solo los asistentes pueden registrar asistencias.")
+
+        # Validar que el evento esté en curso (dentro de la ventana de registro)
+        from authentication.models import SystemConfiguration
+        self.validate_registration_window(self.event, SystemConfiguration.get_config())
+
+        # Validar duplicados y eventos simultáneos
+        self.validate_conflicts()
+
+    @classmethod
+    def register(cls, event_id, account_number, registered_by, registration_method='manual'):
+        """
+        Registrar la asistencia de un escaneo en una sola transacción.
+
+        Camino rápido del escáner: una consulta para el evento, una para el
+        estudiante (que además lo bloquea con SELECT ... FOR NO KEY UPDATE para
+        serializar escaneos simultáneos del mismo estudiante), una para sus
+        asistencias del día, el INSERT, el UPDATE incremental de estadísticas
+        (o su INSERT en el primer escaneo, con los datos que ya trajo la
+        consulta del estudiante) y el del contador de asistentes del evento.
+        Cada lectura valida algo distinto (ventana, estudiante, duplicados y
+        simultáneos) y cada escritura toca una tabla distinta, así que son seis
+        consultas. La restricción única parcial
+        (student, event) WHERE is_valid respalda la validación de duplicados en
+        la BD.
+
+        Con enforce_event_capacity el contador se incrementa con un UPDATE
+        condicional (ver Event.reserve_seats), sin contar asistencias. Va al
+        final para que la fila del evento, que comparten todos los escáneres,
+        quede bloqueada el menor tiempo posible.
+
+        Raises:
+            Event.DoesNotExist: El evento no existe o no está activo
+            UserProfile.DoesNotExist: No hay estudiante con ese número de cuenta
+            ValidationError: Fuera de la ventana de registro, duplicado, evento
+                simultáneo o evento lleno
+        """
+        from authentication.models import SystemConfiguration
+        config = SystemConfiguration.get_config()
+
+        with transaction.atomic():
+            event = Event.objects.get(id=event_id, is_active=True)
+            cls.validate_registration_window(event, config)
+
+            # FOR NO KEY UPDATE no bloquea las llaves foráneas de otras
+            # inserciones, solo a otro registro del mismo estudiante. La misma
+            # consulta dice si ya tiene estadísticas (y con qué crearlas si no)
+            student = UserProfile.objects.select_for_update(no_key=True).only(
+                'id', 'account_number', 'full_name', 'user_type'
+            ).annotate(
+                **AttendanceStats.scan_annotations()
+            ).get(account_number=account_number, user_type='student')
+
+            attendance = cls(
+                student=student,
+                event=event,
+                registered_by=registered_by,
+                registration_method=registration_method
+            )
+            same_day = list(attendance._student_day_attendances())
+            conflict = cls.find_conflict(event, same_day)
+            if conflict:
+                raise ValidationError(conflict)
+
+            # Ya validada arriba; las estadísticas se ajustan aquí sin volver a
+            # consultar si el bloque ya estaba cubierto
+            attendance._prevalidated = True
+            attendance._skip_stats_update = True
+            try:
+                attendance.save()
+            except IntegrityError:
+                raise ValidationError(cls.DUPLICATE_MESSAGE)
+            attendance._skip_stats_update = False
+
+            slot_covered = any(row[4] == event.slot_id for row in same_day)
+            delta = 0 if event.slot_id is None or slot_covered else 1
+            if not student.has_stats:
+                AttendanceStats.create_for_scan(student, delta)
+            elif delta:
+                AttendanceStats.shift_attended([student.id], delta)
+
+            if not config.enforce_event_capacity:
+                Event.shift_attendance_count({event.id: 1})
+            elif not Event.reserve_seats(event.id):
+                raise ValidationError(cls.CAPACITY_MESSAGE)
+
+        return attendance
+
+    @staticmethod
+    def _lock_students(account_numbers):
+        """
+        Obtener y bloquear (FOR NO KEY UPDATE, en orden de id para evitar
+        interbloqueos entre lotes) a los estudiantes de una lista de números de cuenta.
+
+        Returns:
+            Diccionario {account_number: UserProfile}
+        """
+        return {
+            student.account_number: student
+            for student in UserProfile.objects.select_for_update(no_key=True).filter(
+                account_number__in=set(account_numbers),
+                user_type='student'
+            ).only('id', 'account_number', 'full_name', 'user_type').order_by('id')
+        }
+
+    @staticmethod
+    def _lock_available_seats(event_ids):
+        """
+        Bloquear (FOR NO KEY UPDATE, en orden de id) las filas de los eventos y
+        leer cuántos lugares les quedan según su contador de asistentes.
+
+        Se llama después de bloquear a los estudiantes, en el mismo orden que
+        register(), para evitar interbloqueos.
+
+        Returns:
+            Diccionario {event_id: lugares disponibles}
+        """
+        return {
+            event_id: max(max_capacity - attendance_count, 0)
+            for event_id, max_capacity, attendance_count in Event.objects.select_for_update(no_key=True).filter(
+                pk__in=set(event_ids)
+            ).order_by('id').values_list('id', 'max_capacity', 'attendance_count')
+        }
+
+    @staticmethod
+    def _valid_attendances_by_day(student_ids, dates):
+        """
+        Asistencias válidas de varios estudiantes en varias fechas, en una sola consulta.
+
+        Returns:
+            Diccionario {(student_id, fecha): [(event_id, start_time, end_time, is_active, slot_id), ...]}
+            con el formato que espera find_conflict()
+        """
+        by_day = {}
+        for student_id, event_date, *row in Attendance.objects.filter(
+            student_id__in=student_ids,
+            event__date__in=set(dates),
+            is_valid=True
+        ).values_list(
+            'student_id', 'event__date', 'event_id', 'event__start_time', 'event__end_time',
+            'event__is_active', 'event__slot_id'
+        ):
+            by_day.setdefault((student_id, event_date), []).append(tuple(row))
+        return by_day
+
+    @classmethod
+    def conflicts(cls):
+        """
+        Asistencias válidas que el registro habría rechazado: las que tienen una
+        asistencia válida anterior (por timestamp, luego id) del mismo estudiante
+        en la misma fecha, al mismo evento (duplicado) o a un evento activo con
+        horario traslapado (simultáneo), con el criterio de find_conflict().
+
+        Es una sola consulta: la tabla se cruza consigo misma con un EXISTS
+        correlacionado que usa el índice (student, event) de la restricción única,
+        sin comparar pares en Python.
+
+        Returns:
+            QuerySet anotado con event_date, conflict_with (id de la primera
+            asistencia anterior en conflicto) e is_duplicate.
+        """
+        earlier = cls.objects.filter(
+            models.Q(timestamp__lt=models.OuterRef('timestamp')) |
+            models.Q(timestamp=models.OuterRef('timestamp'), pk__lt=models.OuterRef('pk')),
+            student_id=models.OuterRef('student_id'),
+            event__date=models.OuterRef('event__date'),
+            is_valid=True
+        )
+        duplicates = earlier.filter(event_id=models.OuterRef('event_id'))
+        conflicting = earlier.filter(
+            models.Q(event_id=models.OuterRef('event_id')) |
+            models.Q(
+                event__is_active=True,
+                event__start_time__lt=models.OuterRef('event__end_time'),
+                event__end_time__gt=models.OuterRef('event__start_time')
+            )
+        )
+        return cls.objects.filter(
+            models.Exists(conflicting),
+            is_valid=True
+        ).annotate(
+            event_date=models.F('event__date'),
+            conflict_with=models.Subquery(conflicting.order_by('timestamp', 'pk').values('pk')[:1]),
+            is_duplicate=models.Exists(duplicates)
+        )
+
+    @classmethod
+    def invalidate_conflicts(cls, conflicts=None):
+        """
+        Invalidar en bloque las asistencias en conflicto y recalcular las
+        estadísticas de los estudiantes afectados.
+
+        Las asistencias de cada (estudiante, fecha) con conflictos se recorren en
+        orden de registro y se conserva cada una que no choque con las ya
+        conservadas, como lo habría hecho el registro: en una cadena A-B-C donde
+        solo B choca con A y C con B, se invalida B y C se conserva.
+
+        Args:
+            conflicts: Resultado (o subconjunto) de conflicts(); default: todos
+
+        Returns:
+            Lista de ids de las asistencias invalidadas
+        """
+        if conflicts is None:
+            conflicts = cls.conflicts()
+        days = set(conflicts.values_list('student_id', 'event_date'))
+        if not days:
+            return []
+
+        kept = {}
+        invalid = []
+        deltas = {}
+        for pk, student_id, event_date, *row in cls.objects.filter(
+            student_id__in={student_id for student_id, event_date in days},
+            event__date__in={event_date for student_id, event_date in days},
+            is_valid=True
+        ).order_by('timestamp', 'pk').values_list(
+            'pk', 'student_id', 'event__date', 'event_id', 'event__start_time', 'event__end_time',
+            'event__is_active', 'event__slot_id'
+        ):
+            if (student_id, event_date) not in days:
+                continue
+            day = kept.setdefault((student_id, event_date), [])
+            event = Event(id=row[0], start_time=row[1], end_time=row[2])
+            if cls.find_conflict(event, day):
+                invalid.append(pk)
+                deltas[row[0]] = deltas.get(row[0], 0) - 1
+            else:
+                day.append(tuple(row))
+
+        with transaction.atomic():
+            # UPDATE directo: no pasa por save() ni por las señales, las
+            # estadísticas se recalculan una vez al final
+            for start in range(0, len(invalid), 1000):
+                cls.objects.filter(pk__in=invalid[start:start + 1000]).update(is_valid=False)
+            Event.shift_attendance_count(deltas)
+            AttendanceStats.recalculate_bulk(
+                UserProfile.objects.filter(pk__in={student_id for student_id, event_date in days})
+            )
+        return invalid
+
+    @classmethod
+    def register_batch(cls, event_id, account_numbers, registered_by, registration_method='manual'):
+        """
+        Registrar en bloque una cola de escaneos para un mismo evento.
+
+        Se resuelve todo con consultas por lote: los estudiantes con un solo
+        account_number__in (bloqueados en orden de id), sus asistencias del día en
+        una sola consulta para detectar duplicados y eventos simultáneos, un
+        bulk_create para las nuevas asistencias y un solo UPDATE de estadísticas
+        y otro del contador de asistentes del evento. Con enforce_event_capacity
+        se registran, en orden, solo los que caben en los lugares disponibles.
+
+        Raises:
+            Event.DoesNotExist: El evento no existe o no está activo
+            ValidationError: El evento está fuera de la ventana de registro
+
+        Returns:
+            Lista con un resultado por cada número de cuenta recibido, en el mismo
+            orden: {'account_number', 'status', 'message', ...}. status es
+            'registered', 'duplicate', 'conflict', 'not_found' o 'full'.
+        """
+        from authentication.models import SystemConfiguration
+        config = SystemConfiguration.get_config()
+
+        with transaction.atomic():
+            event = Event.objects.get(id=event_id, is_active=True)
+            cls.validate_registration_window(event, config)
+
+            students = cls._lock_students(account_numbers)
+            same_day = cls._valid_attendances_by_day(
+                [student.id for student in students.values()], [event.date]
+            )
+
+            results = []
+            new_attendances = []
+            seen = set()
+            for account_number in account_numbers:
+                student = students.get(account_number)
+                rejection = cls._check_batch_account(account_number, student, event, same_day, seen)
+                if rejection is not None:
+                    results.append(rejection)
+                    continue
+
+                seen.add(account_number)
+                new_attendances.append(cls(
+                    student=student,
+                    event=event,
+                    registered_by=registered_by,
+                    registration_method=registration_method
+                ))
+                results.append(None)
+
+            if config.enforce_event_capacity and new_attendances:
+                available = cls._lock_available_seats([event.id]).get(event.id, 0)
+                pending = [index for index, result in enumerate(results) if result is None]
+                for index in pending[available:]:
+                    results[index] = {
+                        'account_number': account_numbers[index],
+                        'status': 'full',
+                        'message': cls.CAPACITY_MESSAGE
+                    }
+                new_attendances = new_attendances[:available]
+
+            rejected = cls._bulk_create_each_on_conflict(new_attendances)
+            saved = [attendance for attendance in new_attendances if attendance not in rejected]
+
+            # Un solo UPDATE para los estudiantes que cubren el bloque por primera vez
+            if event.slot_id is not None:
+                AttendanceStats.shift_attended([
+                    attendance.student_id for attendance in saved
+                    if not any(row[4] == event.slot_id for row in same_day.get((attendance.student_id, event.date), []))
+                ], 1)
+            else:
+                AttendanceStats.create_missing([attendance.student_id for attendance in saved])
+            Event.shift_attendance_count({event.id: len(saved)})
+
+        created = iter(new_attendances)
+        for index, result in enumerate(results):
+            if result is None:
+                attendance = next(created)
+                if attendance in rejected:
+                    results[index] = {
+                        'account_number': attendance.student.account_number,
+                        'status': 'duplicate',
+                        'message': cls.DUPLICATE_MESSAGE
+                    }
+                    continue
+                results[index] = {
+                    'account_number': attendance.student.account_number,
+                    'status': 'registered',
+                    'message': f'Asistencia registrada para {attendance.student.full_name}',
+                    'attendance_id': attendance.id,
+                    'student_name': attendance.student.full_name
+                }
+        return results
+
+    @classmethod
+    def _bulk_create_each_on_conflict(cls, attendances):
+        """
+        Insertar las asistencias de un lote con un solo bulk_create. Si choca con
+        una restricción única (otra asistencia guardada entre la validación y el
+        INSERT), insertarlas una por una, cada una en su propio savepoint, para
+        que solo se rechacen las duplicadas y no el lote completo.
+
+        Returns:
+            Lista de las asistencias que no se guardaron.
+        """
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(attendances)
+            return []
+        except IntegrityError:
+            pass
+
+        rejected = []
+        for attendance in attendances:
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create([attendance])
+            except IntegrityError:
+                rejected.append(attendance)
+        return rejected
+
+    @classmethod
+    def _check_batch_account(cls, account_number, student, event, same_day, seen):
+        """
+        Validar un número de cuenta de un lote: que el estudiante exista y que no
+        tenga ya asistencia al evento (en la BD o antes en el mismo lote) ni a
+        uno simultáneo.
+
+        Returns:
+            Resultado con status y message si no se registra, o None.
+        """
+        if student is None:
+            return {
+                'account_number': account_number,
+                'status': 'not_found',
+                'message': f'Estudiante con número de cuenta {account_number} no encontrado'
+            }
+
+        if account_number in seen:
+            conflict = cls.DUPLICATE_MESSAGE
+        else:
+            conflict = cls.find_conflict(event, same_day.get((student.id, event.date), []))
+        if conflict:
+            return {
+                'account_number': account_number,
+                'status': 'duplicate' if conflict == cls.DUPLICATE_MESSAGE else 'conflict',
+                'message': conflict
+            }
+        return None
+
+    @classmethod
+    def sync_scans(cls, scans, registered_by, registration_method='manual'):
+        """
+        Ingerir de forma idempotente escaneos guardados sin conexión en el cliente.
+
+        Cada escaneo trae un client_scan_id (UUID generado en el navegador) y la
+        hora original del escaneo. Los escaneos ya sincronizados se reconocen por
+        su client_scan_id, así que reenviar la cola tras una reconexión no crea
+        duplicados. La ventana de registro se valida con la hora del escaneo, no
+        con la hora de llegada al servidor, dentro de los límites
+        OFFLINE_SCAN_MAX_AGE_HOURS y OFFLINE_SCAN_CLOCK_SKEW_SECONDS.
+
+        Args:
+            scans: Lista de diccionarios con client_scan_id (UUID), event_id,
+                account_number y scanned_at (datetime con zona horaria)
+
+        Returns:
+            Lista con un resultado por escaneo, en el mismo orden:
+            {'client_scan_id', 'account_number', 'status', 'message', ...}.
+            status es 'registered', 'already_synced', 'duplicate', 'conflict',
+            'not_found', 'rejected' o 'full' (evento lleno, solo con
+            enforce_event_capacity). Todos son definitivos: el cliente puede
+            quitar de su cola cualquier escaneo que tenga resultado.
+        """
+        from authentication.models import SystemConfiguration
+        config = SystemConfiguration.get_config()
+
+        now = timezone.now()
+        allowed_range = (
+            now - timedelta(hours=settings.OFFLINE_SCAN_MAX_AGE_HOURS),
+            now + timedelta(seconds=settings.OFFLINE_SCAN_CLOCK_SKEW_SECONDS)
+        )
+
+        with transaction.atomic():
+            events = Event.objects.filter(is_active=True).in_bulk({scan['event_id'] for scan in scans})
+
+            # Bloquear primero a los estudiantes: un reenvío concurrente del mismo
+            # escaneo espera aquí y después ya ve su client_scan_id sincronizado
+            students = cls._lock_students([scan['account_number'] for scan in scans])
+            synced = dict(cls.objects.filter(
+                client_scan_id__in=[scan['client_scan_id'] for scan in scans]
+            ).values_list('client_scan_id', 'id'))
+            same_day = cls._valid_attendances_by_day(
+                [student.id for student in students.values()],
+                [event.date for event in events.values()]
+            )
+            available = cls._lock_available_seats(events) if config.enforce_event_capacity else None
+
+            results = []
+            pending = []
+            added = {}
+            for scan in scans:
+                result = {
+                    'client_scan_id': str(scan['client_scan_id']),
+                    'account_number': scan['account_number']
+                }
+                results.append(result)
+                event = events.get(scan['event_id'])
+                student = students.get(scan['account_number'])
+
+                rejection = cls._check_scan(scan, event, student, synced, config, allowed_range)
+                if rejection is None:
+                    day = same_day.setdefault((student.id, event.date), [])
+                    rejection = cls._check_scan_conflict(event, day, available, added)
+                if rejection is not None:
+                    result.update(rejection)
+                    continue
+
+                added[event.id] = added.get(event.id, 0) + 1
+                covers_slot = event.slot_id is not None and not any(row[4] == event.slot_id for row in day)
+                # Los siguientes escaneos del mismo lote ya ven esta asistencia
+                day.append((event.id, event.start_time, event.end_time, event.is_active, event.slot_id))
+                synced[scan['client_scan_id']] = None
+
+                pending.append((cls(
+                    student=student,
+                    event=event,
+                    registered_by=registered_by,
+                    registration_method=registration_method,
+                    timestamp=scan['scanned_at'],
+                    client_scan_id=scan['client_scan_id']
+                ), result, covers_slot))
+
+            rejected = cls._bulk_create_each_on_conflict([attendance for attendance, _, _ in pending])
+
+            newly_covered = {}
+            missing_stats = []
+            for attendance, result, covers_slot in pending:
+                if attendance in rejected:
+                    added[attendance.event_id] -= 1
+                    result.update(cls._rejected_scan(attendance))
+                    continue
+                if covers_slot:
+                    newly_covered[attendance.student_id] = newly_covered.get(attendance.student_id, 0) + 1
+                elif attendance.event.slot_id is None:
+                    missing_stats.append(attendance.student_id)
+                result.update(
+                    status='registered',
+                    message=f'Asistencia registrada para {attendance.student.full_name}',
+                    student_name=attendance.student.full_name,
+                    attendance_id=attendance.id
                 )
-    
+
+            AttendanceStats.shift_attended_by_student(newly_covered)
+            AttendanceStats.create_missing(missing_stats)
+            Event.shift_attendance_count(added)
+
+        return results
+
+    @classmethod
+    def _rejected_scan(cls, attendance):
+        """
+        Resultado de un escaneo que chocó con una restricción única al
+        insertarse: ya sincronizado (un reenvío concurrente guardó el mismo
+        client_scan_id) o duplicado.
+        """
+        attendance_id = cls.objects.filter(
+            client_scan_id=attendance.client_scan_id
+        ).values_list('id', flat=True).first()
+        if attendance_id is not None:
+            return {
+                'status': 'already_synced',
+                'message': 'Este escaneo ya estaba sincronizado',
+                'attendance_id': attendance_id
+            }
+        return {'status': 'duplicate', 'message': cls.DUPLICATE_MESSAGE}
+
+    @classmethod
+    def _check_scan(cls, scan, event, student, synced, config, allowed_range):
+        """
+        Validar un escaneo sin conexión antes de buscar conflictos: que no esté
+        ya sincronizado, que existan el evento y el estudiante, y que la hora del
+        escaneo esté dentro de allowed_range y de la ventana de registro.
+
+        Returns:
+            Diccionario con status y message si el escaneo no se registra, o None.
+        """
+        if scan['client_scan_id'] in synced:
+            return {
+                'status': 'already_synced',
+                'message': 'Este escaneo ya estaba sincronizado',
+                'attendance_id': synced[scan['client_scan_id']]
+            }
+        if event is None:
+            return {'status': 'not_found', 'message': 'Evento no encontrado'}
+        oldest_allowed, newest_allowed = allowed_range
+        if not oldest_allowed <= scan['scanned_at'] <= newest_allowed:
+            return {'status': 'rejected', 'message': 'La hora del escaneo está fuera del rango permitido'}
+        try:
+            cls.validate_registration_window(event, config, now=scan['scanned_at'])
+        except ValidationError as e:
+            return {'status': 'rejected', 'message': ' '.join(e.messages)}
+        if student is None:
+            return {
+                'status': 'not_found',
+                'message': f'Estudiante con número de cuenta {scan["account_number"]} no encontrado'
+            }
+        return None
+
+    @classmethod
+    def _check_scan_conflict(cls, event, day, available, added):
+        """
+        Buscar un duplicado o evento simultáneo en las asistencias del día del
+        estudiante y, con cupo (available), que al evento le queden lugares.
+
+        Returns:
+            Diccionario con status y message si el escaneo no se registra, o None.
+        """
+        conflict = cls.find_conflict(event, day)
+        if conflict:
+            return {
+                'status': 'duplicate' if conflict == cls.DUPLICATE_MESSAGE else 'conflict',
+                'message': conflict
+            }
+        if available is not None and added.get(event.id, 0) >= available.get(event.id, 0):
+            return {'status': 'full', 'message': cls.CAPACITY_MESSAGE}
+        return None
+
     def save(self, *args, **kwargs):
         # Permitir omitir validación de tiempo para importaciones históricas
         skip_validation = kwargs.pop('skip_validation', False)
 
-        if not skip_validation:
+        if self.__dict__.pop('_prevalidated', False):
+            # Ya validada por Attendance.register()
+            pass
+        elif not skip_validation:
             # Validación completa
             self.clean()
         else:
             # Aún en importaciones históricas, validar duplicados y eventos simultáneos
-            # Validar que no haya duplicados
-            existing = Attendance.objects.filter(
-                student=self.student,
-                event=self.event,
-                is_valid=True
-            )
-            if self.pk:
-                existing = existing.exclude(pk=self.pk)
-            if existing.exists():
-                raise ValidationError("Este estudiante ya tiene asistencia registrada para este evento.")
-
-            # Validar eventos simultáneos
-            if self.student:
-                overlapping_events = Event.objects.filter(
-                    date=self.event.date,
-                    start_time__lt=self.event.end_time,
-                    end_time__gt=self.event.start_time,
-                    is_active=True
-                ).exclude(id=self.event.id)
-
-                existing_attendance = Attendance.objects.filter(
-                    student=self.student,
-                    event__in=overlapping_events,
-                    is_valid=True
-                ).exists()
-
-                if existing_attendance:
-                    raise ValidationError(
-                        "El estudiante ya tiene asistencia registrada en un evento simultáneo."
-                    )
+            self.validate_conflicts()
+
+        # Para ediciones (correcciones desde el admin) se necesita el estado anterior
+        previous = None
+        update_stats = not getattr(self, '_skip_stats_update', False)
+        if update_stats and not self._state.adding:
+            previous = Attendance.objects.filter(pk=self.pk).values('student_id', 'event_id', 'is_valid').first()
 
         super().save(*args, **kwargs)
 
-        # Actualizar estadísticas del estudiante
+        # Actualizar estadísticas del estudiante de forma incremental
         # (omitir si se está importando - se actualizará en batch al final)
-        if not getattr(self, '_skip_stats_update', False):
-            self.update_student_stats()
-    
+        if update_stats:
+            self._apply_stats_change(previous)
+
+    def _apply_stats_change(self, previous):
+        """
+        Ajustar los contadores de estadísticas y de asistentes del evento según
+        cómo cambió esta asistencia
+        """
+        if previous is None:
+            # Asistencia nueva
+            if self.is_valid:
+                AttendanceStats.apply_attendance_change(self.student_id, self.event.slot_id, 1, exclude_pk=self.pk)
+                Event.shift_attendance_count({self.event_id: 1})
+            return
+
+        deltas = {previous['event_id']: -1 if previous['is_valid'] else 0}
+        deltas[self.event_id] = deltas.get(self.event_id, 0) + (1 if self.is_valid else 0)
+        Event.shift_attendance_count(deltas)
+
+        if previous['student_id'] != self.student_id or previous['event_id'] != self.event_id:
+            # Reasignación de estudiante o evento (poco común): recalcular completo
+            for student_id in {previous['student_id'], self.student_id}:
+                stats, created = AttendanceStats.objects.get_or_create(student_id=student_id)
+                stats.update_stats()
+            return
+
+        if previous['is_valid'] != self.is_valid:
+            # Asistencia invalidada o revalidada
+            delta = 1 if self.is_valid else -1
+            AttendanceStats.apply_attendance_change(self.student_id, self.event.slot_id, delta, exclude_pk=self.pk)
+
     def update_student_stats(self):
         """Actualizar las estadísticas de asistencia del estudiante"""
         stats, created = AttendanceStats.objects.get_or_create(
@@ -223,70 +837,296 @@ class AttendanceStats(models.Model):
         auto_now=True,
         verbose_name="Última actualización"
     )
+    is_stale = models.BooleanField(
+        default=False,
+        verbose_name="Pendiente de recalcular",
+        help_text="Los eventos cambiaron y el recálculo en segundo plano aún no termina"
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Versión",
+        help_text="Aumenta con cada cambio de las estadísticas; se usa como ETag"
+    )
     
     class Meta:
         verbose_name = "Estadísticas de asistencia"
         verbose_name_plural = "Estadísticas de asistencia"
+        indexes = [
+            # Filtro de constancias (porcentaje >= mínimo) y orden por porcentaje
+            models.Index(fields=['attendance_percentage']),
+        ]
     
     def update_stats(self):
         """Actualizar las estadísticas de asistencia"""
-        from events.models import Event  # Importar aquí para evitar circular imports
+        from events.models import EventSlot  # Importar aquí para evitar circular imports
 
-        # Obtener todos los eventos activos
-        all_events = Event.objects.filter(is_active=True).order_by('date', 'start_time')
+        # Los eventos activos ya están agrupados en bloques de horario (EventSlot),
+        # el total de "bloques" es la cantidad de slots del índice
+        total_slots = EventSlot.objects.count()
 
-        # Agrupar eventos por bloques de horario (misma fecha y horarios que se solapan)
-        event_slots = {}  # {(fecha, hora_inicio, hora_fin): [lista de eventos]}
+        # Contar cuántos bloques distintos tienen al menos una asistencia válida
+        attended_slots = Attendance.objects.filter(
+            student_id=self.student_id,
+            is_valid=True,
+            event__slot__isnull=False
+        ).aggregate(
+            slots=models.Count('event__slot', distinct=True)
+        )['slots']
 
-        for event in all_events:
-            # Crear una clave única para el bloque horario
-            slot_key = (event.date, event.start_time, event.end_time)
+        self.total_events = total_slots
+        self.attended_events = attended_slots
+        self.is_stale = False
+        self.version = models.F('version') + 1 if self.pk else 1
 
-            # Buscar si hay un slot existente que se solape con este evento
-            found_slot = False
-            for existing_slot in list(event_slots.keys()):
-                existing_date, existing_start, existing_end = existing_slot
+        self.attendance_percentage = self.percentage(attended_slots, total_slots)
 
-                # Verificar si es el mismo día y hay solapamiento de horarios
-                if event.date == existing_date:
-                    # Hay solapamiento si el inicio de uno es menor al fin del otro
-                    if (event.start_time < existing_end and event.end_time > existing_start):
-                        event_slots[existing_slot].append(event)
-                        found_slot = True
-                        break
+        self.save()
+        self.refresh_from_db(fields=['version'])
 
-            # Si no encontramos un slot existente, crear uno nuevo
-            if not found_slot:
-                event_slots[slot_key] = [event]
+    @classmethod
+    def for_student(cls, account_number):
+        """
+        Estadísticas de un estudiante para mostrarlas.
 
-        # El total de "bloques" es la cantidad de slots únicos
-        total_slots = len(event_slots)
+        Devuelve la fila guardada (los contadores se mantienen de forma incremental);
+        solo se recalcula si está marcada como desactualizada o si aún no existe.
 
-        # Obtener asistencias del estudiante
-        student_attendances = Attendance.objects.filter(
-            student=self.student,
-            is_valid=True
-        ).values_list('event_id', flat=True)
+        Raises:
+            UserProfile.DoesNotExist: si no hay un estudiante con ese número de cuenta
+        """
+        stats = cls.objects.filter(
+            student__account_number=account_number,
+            student__user_type='student'
+        ).first()
 
-        # Contar cuántos bloques tiene asistencia
-        attended_slots = 0
-        for slot_events in event_slots.values():
-            # Si asistió a al menos uno de los eventos del bloque, cuenta
-            event_ids = [e.id for e in slot_events]
-            if any(event_id in student_attendances for event_id in event_ids):
-                attended_slots += 1
+        if stats is None:
+            student = UserProfile.objects.get(account_number=account_number, user_type='student')
+            stats, created = cls.objects.get_or_create(student=student)
+            stats.update_stats()
+        elif stats.is_stale:
+            stats.update_stats()
+        return stats
 
-        self.total_events = total_slots
-        self.attended_events = attended_slots
+    @staticmethod
+    def percentage(attended, total):
+        """
+        Porcentaje de asistencia con dos decimales.
 
-        # Calcular porcentaje
-        if total_slots > 0:
-            self.attendance_percentage = round((attended_slots / total_slots) * 100, 2)
-        else:
-            self.attendance_percentage = 0.0
+        Redondea la mitad hacia arriba, como Round() en la base de datos
+        (shift_attended), en lugar del redondeo al par de round().
+        """
+        if total <= 0:
+            return 0.0
+        value = Decimal(attended * 100) / Decimal(total)
+        return float(value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
 
-        self.save()
+    @property
+    def etag(self):
+        """ETag de la versión actual de las estadísticas"""
+        return quote_etag(f'stats-{self.student_id}-{self.version}')
     
+    @classmethod
+    def apply_attendance_change(cls, student_id, slot_id, delta, exclude_pk=None):
+        """
+        Mantener los contadores de forma incremental cuando se agrega (+1) o se
+        quita (-1) una asistencia válida en un bloque de horario.
+
+        El bloque solo cuenta una vez: se ajusta attended_events únicamente si no
+        queda otra asistencia válida del estudiante en el mismo bloque. El ajuste
+        y el porcentaje se calculan en un solo UPDATE con expresiones F().
+
+        Returns:
+            True si el bloque quedó cubierto o descubierto por este cambio.
+        """
+        if slot_id is None:
+            # Evento inactivo: no forma parte de ningún bloque, pero el estudiante
+            # sí debe tener estadísticas
+            if delta > 0:
+                cls.create_missing([student_id])
+            return False
+
+        others = Attendance.objects.filter(student_id=student_id, is_valid=True, event__slot_id=slot_id)
+        if exclude_pk is not None:
+            others = others.exclude(pk=exclude_pk)
+        if others.exists():
+            return False
+
+        cls.shift_attended([student_id], delta)
+        return True
+
+    @classmethod
+    def shift_attended(cls, student_ids, delta):
+        """
+        Sumar delta a los bloques asistidos y recalcular el porcentaje en un solo
+        UPDATE con expresiones F(). A los estudiantes que aún no tienen
+        estadísticas, si el cambio es positivo, se les crean con un cálculo completo.
+
+        Args:
+            student_ids: Lista de ids de UserProfile a ajustar
+            delta: +1 al cubrir un bloque, -1 al descubrirlo
+        """
+        attended = models.F('attended_events') + delta
+        updated = cls.objects.filter(student_id__in=student_ids).update(
+            attended_events=attended,
+            version=models.F('version') + 1,
+            attendance_percentage=models.Case(
+                models.When(
+                    total_events__gt=0,
+                    then=Round(attended * 100.0 / models.F('total_events'), 2)
+                ),
+                default=models.Value(0.0),
+                output_field=models.FloatField()
+            ),
+            last_updated=timezone.now()
+        )
+
+        if updated < len(student_ids) and delta > 0:
+            # Primera asistencia de algunos estudiantes: crear sus estadísticas completas
+            cls.create_missing(student_ids)
+
+    @classmethod
+    def create_missing(cls, student_ids):
+        """Crear, con un cálculo completo, las estadísticas de los estudiantes que aún no las tienen"""
+        if not student_ids:
+            return
+        missing = set(student_ids) - set(
+            cls.objects.filter(student_id__in=student_ids).values_list('student_id', flat=True)
+        )
+        if missing:
+            cls.save_bulk(cls.compute_bulk(UserProfile.objects.filter(pk__in=missing)))
+
+    @classmethod
+    def scan_annotations(cls):
+        """
+        Anotaciones para la consulta del estudiante en Attendance.register():
+        si ya tiene estadísticas (has_stats) y, para crearlas sin otro cálculo
+        completo, sus bloques asistidos (attended_slots) y el total de bloques
+        (total_slots).
+        """
+        from events.models import EventSlot
+
+        attended = Attendance.objects.filter(
+            student_id=models.OuterRef('pk'),
+            is_valid=True,
+            event__slot__isnull=False
+        ).order_by().values('student_id').annotate(
+            slots=models.Count('event__slot', distinct=True)
+        ).values('slots')
+        total = EventSlot.objects.order_by().annotate(
+            total=models.Func(models.F('id'), function='COUNT')
+        ).values('total')
+        return {
+            'has_stats': models.Exists(cls.objects.filter(student_id=models.OuterRef('pk'))),
+            'attended_slots': Coalesce(models.Subquery(attended), 0),
+            'total_slots': models.Subquery(total),
+        }
+
+    @classmethod
+    def create_for_scan(cls, student, delta):
+        """
+        Crear con un solo INSERT las estadísticas de un estudiante leído con
+        scan_annotations(), sumando delta por el bloque que cubre el escaneo.
+        """
+        attended = student.attended_slots + delta
+        return cls.objects.create(
+            student_id=student.id,
+            total_events=student.total_slots,
+            attended_events=attended,
+            attendance_percentage=cls.percentage(attended, student.total_slots),
+            version=1
+        )
+
+    @classmethod
+    def shift_attended_by_student(cls, deltas):
+        """
+        Sumar a cada estudiante sus bloques nuevos ({student_id: delta}), con un
+        UPDATE por cada cantidad distinta de bloques (normalmente uno).
+        """
+        by_delta = {}
+        for student_id, delta in deltas.items():
+            by_delta.setdefault(delta, []).append(student_id)
+        for delta, student_ids in by_delta.items():
+            cls.shift_attended(student_ids, delta)
+
+    @classmethod
+    def compute_bulk(cls, students=None):
+        """
+        Calcular las estadísticas de varios estudiantes sin guardarlas.
+
+        Usa una consulta para el total de bloques y una sola consulta agrupada
+        (COUNT DISTINCT de bloques por estudiante) para las asistencias, en lugar
+        de recalcular estudiante por estudiante. La misma consulta lee la versión
+        actual de cada fila para que save_bulk guarde la siguiente.
+
+        Args:
+            students: QuerySet de UserProfile a calcular (por defecto, todos los estudiantes)
+
+        Returns:
+            Lista de instancias AttendanceStats (sin guardar) con los valores calculados.
+        """
+        from events.models import EventSlot
+
+        if students is None:
+            students = UserProfile.objects.all()
+
+        total_slots = EventSlot.objects.count()
+
+        attended_by_student = students.filter(user_type='student').annotate(
+            slots=models.Count(
+                'attendance__event__slot',
+                distinct=True,
+                filter=models.Q(attendance__is_valid=True)
+            )
+        ).values_list('pk', 'slots', 'attendancestats__version')
+
+        results = []
+        for student_id, attended_slots, version in attended_by_student.iterator(chunk_size=2000):
+            results.append(cls(
+                student_id=student_id,
+                total_events=total_slots,
+                attended_events=attended_slots,
+                attendance_percentage=cls.percentage(attended_slots, total_slots),
+                version=(version or 0) + 1
+            ))
+        return results
+
+    @classmethod
+    def save_bulk(cls, results, batch_size=1000):
+        """
+        Guardar estadísticas calculadas con compute_bulk.
+
+        Las filas se escriben con un upsert (bulk_create con update_conflicts), así
+        que también se crean las estadísticas de estudiantes que aún no las tenían.
+        """
+        cls.objects.bulk_create(
+            results,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['student'],
+            update_fields=[
+                'total_events', 'attended_events', 'attendance_percentage', 'is_stale', 'version', 'last_updated'
+            ]
+        )
+        return len(results)
+
+    @classmethod
+    def recalculate_bulk(cls, students=None):
+        """
+        Recalcular y guardar las estadísticas de varios estudiantes. Devuelve cuántos se actualizaron.
+
+        Las filas existentes se bloquean (SELECT ... FOR UPDATE, en orden de id)
+        antes de leer los conteos: un shift_attended concurrente (un escaneo)
+        espera a que termine el recálculo y se suma a los valores nuevos, en
+        lugar de que el upsert lo sobrescriba con conteos leídos antes.
+        """
+        if students is None:
+            students = UserProfile.objects.all()
+        with transaction.atomic():
+            list(cls.objects.select_for_update().filter(student__in=students).order_by('pk').values_list(
+                'pk', flat=True
+            ))
+            return cls.save_bulk(cls.compute_bulk(students))
+
     def meets_minimum_requirement(self):
         """Verifica si cumple con el requisito mínimo de asistencia global"""
         from authentication.models import SystemConfiguration
@@ -294,4 +1134,155 @@ class AttendanceStats(models.Model):
         return self.attendance_percentage >= config.minimum_attendance_percentage
     
     def __str__(self):
-        return f"Stats: {self.student.full_name} - {self.attendance_percentage}%"
\ No newline at end of file
+        return f"Stats: {self.student.full_name} - {self.attendance_percentage}%"
+
+
+class StatsRecalculationJob(models.Model):
+    """
+    Cola en base de datos para recalcular estadísticas en segundo plano.
+
+    Los cambios en eventos encolan un único trabajo pendiente; cambios seguidos
+    solo posponen ese mismo trabajo (debounce), así que importar 50 eventos
+    produce un solo recálculo. El comando run_stats_worker procesa la cola.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pendiente'),
+        ('running', 'En proceso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        db_index=True,
+        verbose_name="Estado"
+    )
+    reason = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Motivo"
+    )
+    requested_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Solicitado"
+    )
+    run_after = models.DateTimeField(
+        verbose_name="Ejecutar después de"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Inicio"
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Fin"
+    )
+    updated_students = models.IntegerField(
+        default=0,
+        verbose_name="Estudiantes actualizados"
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Error"
+    )
+
+    class Meta:
+        verbose_name = "Recálculo de estadísticas"
+        verbose_name_plural = "Recálculos de estadísticas"
+        ordering = ['-requested_at']
+
+    @classmethod
+    def enqueue(cls, reason=''):
+        """
+        Solicitar un recálculo de todas las estadísticas.
+
+        Si ya hay un trabajo pendiente se pospone su ejecución en lugar de crear
+        otro, sin pasar del tiempo máximo de espera desde que se solicitó.
+        Además marca todas las estadísticas como desactualizadas.
+        """
+        now = timezone.now()
+        debounce = timedelta(seconds=settings.STATS_RECALC_DEBOUNCE_SECONDS)
+        max_wait = timedelta(seconds=settings.STATS_RECALC_MAX_WAIT_SECONDS)
+
+        with transaction.atomic():
+            job = cls.objects.select_for_update().filter(status='pending').order_by('requested_at').first()
+            if job is None:
+                job = cls.objects.create(reason=reason[:255], run_after=now + debounce)
+            else:
+                job.run_after = min(now + debounce, job.requested_at + max_wait)
+                job.save(update_fields=['run_after'])
+
+            AttendanceStats.objects.filter(is_stale=False).update(
+                is_stale=True,
+                version=models.F('version') + 1
+            )
+
+        return job
+
+    @classmethod
+    def claim_next(cls):
+        """
+        Tomar el siguiente trabajo listo para ejecutarse.
+
+        Los demás trabajos pendientes que ya vencieron se marcan como terminados,
+        porque el recálculo completo también los cubre.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            due = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', run_after__lte=now)
+                .order_by('run_after')
+            )
+            if not due:
+                return None
+
+            job, merged = due[0], due[1:]
+            job.status = 'running'
+            job.started_at = now
+            job.save(update_fields=['status', 'started_at'])
+
+            if merged:
+                cls.objects.filter(pk__in=[other.pk for other in merged]).update(
+                    status='done', started_at=now, finished_at=now, reason='Combinado con otro recálculo'
+                )
+        return job
+
+    def run(self):
+        """
+        Reconstruir el índice de bloques de horario (EventSlot) y ejecutar el
+        recálculo completo de las estadísticas existentes.
+
+        Las señales de Event solo encolan el trabajo, así que guardar o eliminar
+        muchos eventos seguidos reconstruye los bloques una sola vez, aquí.
+        """
+        from events.models import EventSlot
+
+        try:
+            with transaction.atomic():
+                EventSlot.rebuild()
+                self.updated_students = AttendanceStats.recalculate_bulk(
+                    UserProfile.objects.filter(attendancestats__isnull=False)
+                )
+                # Si un evento cambió durante el recálculo, enqueue() ya dejó otro
+                # trabajo pendiente y marcó las filas; el upsert con los datos
+                # leídos antes no debe quitar esa marca
+                if StatsRecalculationJob.objects.filter(status='pending').exists():
+                    AttendanceStats.objects.filter(is_stale=False).update(
+                        is_stale=True,
+                        version=models.F('version') + 1
+                    )
+            self.status = 'done'
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'updated_students', 'error', 'finished_at'])
+        return self.status == 'done'
+
+    def __str__(self):
+        return f"Recálculo #{self.pk} ({self.get_status_display()})"
@@ -1,64 +1,51 @@
 """
 Señales para mantener las estadísticas de asistencia actualizadas.
 """
+from django.db.models import QuerySet
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from events.models import Event
-from attendance.models import Attendance, AttendanceStats
+from attendance.models import Attendance, AttendanceStats, StatsRecalculationJob
 
 
 @receiver(post_delete, sender=Event)
 def update_stats_on_event_delete(sender, instance, **kwargs):
     """
-    Cuando se elimina un evento, actualizar las estadísticas de TODOS los estudiantes.
-    Esto es necesario porque el total de eventos cambia para todos.
+    Cuando se elimina un evento, el total de bloques cambia para TODOS los estudiantes.
+    El recálculo (con la reconstrucción de los bloques de horario) se encola para
+    el worker en segundo plano (run_stats_worker).
     """
-    print(f"[SIGNAL] Evento '{instance.title}' eliminado. Actualizando estadísticas de todos los estudiantes...")
-
-    # Actualizar todas las estadísticas existentes
-    stats = AttendanceStats.objects.all()
-    count = 0
-    for stat in stats:
-        stat.update_stats()
-        count += 1
-
-    print(f"[SIGNAL] Se actualizaron las estadísticas de {count} estudiantes.")
+    job = StatsRecalculationJob.enqueue(reason=f"Evento eliminado: {instance.title}")
+    print(f"[SIGNAL] Evento '{instance.title}' eliminado. Recálculo de estadísticas encolado (#{job.pk}).")
 
 
 @receiver(post_delete, sender=Attendance)
-def update_stats_on_attendance_delete(sender, instance, **kwargs):
+def update_stats_on_attendance_delete(sender, instance, origin=None, **kwargs):
     """
-    Cuando se elimina una asistencia, actualizar las estadísticas del estudiante.
+    Cuando se elimina una asistencia, actualizar las estadísticas del estudiante
+    y el contador de asistentes del evento de forma incremental.
     """
-    if instance.student:
-        print(f"[SIGNAL] Asistencia eliminada para {instance.student.full_name}. Actualizando estadísticas...")
+    # Si la asistencia se borra en cascada por eliminar su evento, el recálculo
+    # completo encolado por update_stats_on_event_delete ya la cubre
+    if isinstance(origin, Event) or (isinstance(origin, QuerySet) and origin.model is Event):
+        return
 
-        # Verificar si existe el registro de estadísticas
-        try:
-            stats = AttendanceStats.objects.get(student=instance.student)
-            stats.update_stats()
-            print(f"[SIGNAL] Estadísticas actualizadas para {instance.student.full_name}")
-        except AttendanceStats.DoesNotExist:
-            print(f"[SIGNAL] No existen estadísticas para {instance.student.full_name}")
+    if instance.is_valid:
+        # Solo se descuenta el bloque si no queda otra asistencia válida en él
+        slot_id = Event.objects.filter(pk=instance.event_id).values_list('slot_id', flat=True).first()
+        AttendanceStats.apply_attendance_change(instance.student_id, slot_id, -1)
+        Event.shift_attendance_count({instance.event_id: -1})
 
 
 @receiver(post_save, sender=Event)
 def update_stats_on_event_save(sender, instance, created, **kwargs):
     """
-    Cuando se crea o modifica un evento, actualizar las estadísticas de TODOS los estudiantes
-    si el evento es activo (ya que afecta el total de eventos).
-    Solo actualizar si es un evento nuevo o si cambió el estado de is_active.
+    Cuando se crea o modifica un evento (fecha, horario o estado), el total de bloques
+    puede cambiar para TODOS los estudiantes. El recálculo se encola con debounce, así
+    que una importación de muchos eventos genera un solo recálculo. Cualquier cambio
+    en fecha, horario o estado puede mover el evento de bloque: el mismo trabajo
+    reconstruye los bloques antes de recalcular (ver StatsRecalculationJob.run).
     """
-    if created or (hasattr(instance, '_state') and instance._state.adding is False):
-        # Verificar si es un evento nuevo o si cambió is_active
-        if created:
-            print(f"[SIGNAL] Nuevo evento '{instance.title}' creado. Actualizando estadísticas de todos los estudiantes...")
-
-            # Actualizar todas las estadísticas existentes
-            stats = AttendanceStats.objects.all()
-            count = 0
-            for stat in stats:
-                stat.update_stats()
-                count += 1
-
-            print(f"[SIGNAL] Se actualizaron las estadísticas de {count} estudiantes.")
+    action = 'creado' if created else 'modificado'
+    job = StatsRecalculationJob.enqueue(reason=f"Evento {action}: {instance.title}")
+    print(f"[SIGNAL] Evento '{instance.title}' {action}. Recálculo de estadísticas encolado (#{job.pk}).")
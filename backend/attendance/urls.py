@@ -3,6 +3,8 @@ from . import views
 
 urlpatterns = [
     path('', views.register_attendance, name='register_attendance'),
+    path('batch/', views.register_attendance_batch, name='register_attendance_batch'),
+    path('sync/', views.sync_scans, name='sync_scans'),
     path('stats/', views.get_student_stats, name='student_stats'),
     path('recent/', views.get_recent_attendances, name='recent_attendances'),
     path('my/', views.get_my_attendances, name='my_attendances'),
@@ -1,8 +1,14 @@
+import uuid
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
 from django_ratelimit.decorators import ratelimit
 from authentication.models import UserProfile
 from events.models import Event
@@ -40,57 +46,211 @@ def register_attendance(request):
             'error': 'Se requiere event_id y account_number'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    # Buscar evento
+    # Validar y registrar en una sola transacción
     try:
-        event = Event.objects.get(id=event_id, is_active=True)
+        attendance = Attendance.register(
+            event_id=event_id,
+            account_number=account_number,
+            registered_by=registrar_profile,
+            registration_method='manual'
+        )
     except Event.DoesNotExist:
         return Response({
             'error': 'Evento no encontrado'
         }, status=status.HTTP_404_NOT_FOUND)
-    
-    # Buscar estudiante
-    try:
-        student_profile = UserProfile.objects.get(
-            account_number=account_number,
-            user_type='student'
-        )
     except UserProfile.DoesNotExist:
         return Response({
             'error': f'Estudiante con número de cuenta {account_number} no encontrado'
         }, status=status.HTTP_404_NOT_FOUND)
+    except ValidationError as e:
+        return Response({
+            'error': ' '.join(e.messages)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'error': f'Error al crear asistencia: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        'message': f'Asistencia registrada para {attendance.student.full_name}',
+        'attendance_id': attendance.id,
+        'event': attendance.event.title,
+        'registered_by': registrar_profile.full_name
+    }, status=status.HTTP_201_CREATED)
+
+# Máximo de números de cuenta por lote (una cola de escaneos de unos minutos)
+BATCH_MAX_SIZE = 500
+
+
+def get_assistant_profile(request):
+    """
+    Perfil del asistente autenticado para los endpoints de registro.
 
-    # Verificar si ya tiene asistencia
-    if Attendance.objects.filter(student=student_profile, event=event, is_valid=True).exists():
+    Returns:
+        Tupla (perfil, None), o (None, respuesta 403) si el usuario no es asistente
+    """
+    try:
+        registrar_profile = request.user.userprofile
+    except UserProfile.DoesNotExist:
+        return None, Response({
+            'error': 'Usuario sin perfil válido'
+        }, status=status.HTTP_403_FORBIDDEN)
+    if registrar_profile.user_type != 'assistant':
+        return None, Response({
+            'error': 'Solo los asistentes pueden registrar asistencias'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return registrar_profile, None
+
+
+def parse_offline_scan(scan):
+    """
+    Validar el formato de un escaneo de la cola sin conexión.
+
+    Returns:
+        Diccionario con client_scan_id (UUID), event_id, account_number y
+        scanned_at (con zona horaria), o None si al escaneo le falta algún dato
+    """
+    if not isinstance(scan, dict):
+        return None
+    try:
+        client_scan_id = uuid.UUID(str(scan.get('client_scan_id')))
+        event_id = int(scan.get('event_id'))
+        scanned_at = parse_datetime(str(scan.get('scanned_at')))
+    except (TypeError, ValueError):
+        return None
+    account_number = str(scan.get('account_number') or '').strip()
+    if scanned_at is None or not account_number:
+        return None
+
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at)
+    return {
+        'client_scan_id': client_scan_id,
+        'event_id': event_id,
+        'account_number': account_number,
+        'scanned_at': scanned_at
+    }
+
+
+def batch_response(results, label):
+    """Respuesta de un lote: cuántos se registraron y el resultado de cada elemento"""
+    registered = sum(1 for result in results if result['status'] == 'registered')
+    return Response({
+        'message': f'{registered} de {len(results)} {label}',
+        'registered': registered,
+        'total': len(results),
+        'results': results
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='30/m', method='POST', block=True)
+def register_attendance_batch(request):
+    """Registrar en bloque una cola de escaneos - Solo asistentes: 30 lotes por minuto"""
+    registrar_profile, error = get_assistant_profile(request)
+    if error:
+        return error
+
+    event_id = request.data.get('event_id')
+    account_numbers = request.data.get('account_numbers')
+
+    if not event_id or not isinstance(account_numbers, list) or not account_numbers:
         return Response({
-            'error': 'El estudiante ya tiene asistencia registrada para este evento'
+            'error': 'Se requiere event_id y una lista account_numbers'
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    # Crear asistencia
     try:
-        attendance = Attendance.objects.create(
-            student=student_profile,
-            event=event,
+        event_id = int(event_id)
+    except (TypeError, ValueError):
+        return Response({
+            'error': 'event_id debe ser un número entero'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(account_numbers) > BATCH_MAX_SIZE:
+        return Response({
+            'error': f'El lote no puede tener más de {BATCH_MAX_SIZE} números de cuenta'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    account_numbers = [str(account_number).strip() for account_number in account_numbers]
+
+    try:
+        results = Attendance.register_batch(
+            event_id=event_id,
+            account_numbers=account_numbers,
             registered_by=registrar_profile,
             registration_method='manual'
         )
+    except Event.DoesNotExist:
+        return Response({
+            'error': 'Evento no encontrado'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except ValidationError as e:
+        return Response({
+            'error': ' '.join(e.messages)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return batch_response(results, 'asistencias registradas')
+
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='30/m', method='POST', block=True)
+def sync_scans(request):
+    """Sincronizar la cola de escaneos sin conexión - Solo asistentes: 30 lotes por minuto"""
+    registrar_profile, error = get_assistant_profile(request)
+    if error:
+        return error
+
+    scans = request.data.get('scans')
+    if not isinstance(scans, list) or not scans:
         return Response({
-            'message': f'Asistencia registrada para {student_profile.full_name}',
-            'attendance_id': attendance.id,
-            'event': event.title,
-            'registered_by': registrar_profile.full_name
-        }, status=status.HTTP_201_CREATED)
+            'error': 'Se requiere una lista scans'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    except Exception as e:
+    if len(scans) > BATCH_MAX_SIZE:
         return Response({
-            'error': f'Error al crear asistencia: {str(e)}'
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            'error': f'El lote no puede tener más de {BATCH_MAX_SIZE} escaneos'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validar el formato de cada escaneo; los inválidos se responden sin llegar al modelo
+    results = [None] * len(scans)
+    valid_scans = []
+    for index, scan in enumerate(scans):
+        parsed = parse_offline_scan(scan)
+        if parsed is None:
+            scan = scan if isinstance(scan, dict) else {}
+            results[index] = {
+                'client_scan_id': scan.get('client_scan_id'),
+                'account_number': str(scan.get('account_number') or '').strip(),
+                'status': 'invalid',
+                'message': 'Se requiere client_scan_id, event_id, account_number y scanned_at (ISO 8601)'
+            }
+        else:
+            valid_scans.append((index, parsed))
+
+    if valid_scans:
+        synced = Attendance.sync_scans(
+            [scan for _, scan in valid_scans],
+            registered_by=registrar_profile,
+            registration_method='manual'
+        )
+        for (index, _), result in zip(valid_scans, synced):
+            results[index] = result
+
+    return batch_response(results, 'escaneos registrados')
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='30/m', method='GET', block=True)
 def get_student_stats(request):
-    """Obtener estadísticas de estudiante: 30 consultas por minuto"""
+    """
+    Obtener estadísticas de estudiante: 30 consultas por minuto.
+
+    Es de solo lectura: devuelve las estadísticas guardadas con un ETag de su
+    versión, así el navegador revalida con If-None-Match y recibe 304 si no cambiaron.
+    """
     account_number = request.GET.get('account_number')
 
     if not account_number:
@@ -117,22 +277,23 @@ def get_student_stats(request):
         }, status=status.HTTP_403_FORBIDDEN)
 
     try:
-        student_profile = UserProfile.objects.get(
-            account_number=account_number,
-            user_type='student'
-        )
-        stats, created = AttendanceStats.objects.get_or_create(
-            student=student_profile
-        )
-        stats.update_stats()
+        # Se sirve la fila guardada; solo se recalcula si está desactualizada
+        stats = AttendanceStats.for_student(account_number)
+    except UserProfile.DoesNotExist:
+        return Response({'error': 'Estudiante no encontrado'}, status=404)
 
-        return Response({
+    # Si el cliente ya tiene esta versión, responder 304 sin cuerpo
+    response = get_conditional_response(request, etag=stats.etag)
+    if response is None:
+        response = Response({
             'total_events': stats.total_events,
             'attended_events': stats.attended_events,
-            'attendance_percentage': stats.attendance_percentage
+            'attendance_percentage': stats.attendance_percentage,
+            'is_stale': stats.is_stale
         })
-    except UserProfile.DoesNotExist:
-        return Response({'error': 'Estudiante no encontrado'}, status=404)
+    response['ETag'] = stats.etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
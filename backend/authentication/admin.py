@@ -1,12 +1,20 @@
+from datetime import timedelta
+
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
 from django.contrib.auth.models import User, Group
 from django import forms
-from django.utils.html import format_html
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from django.utils.text import Truncator
 from django.http import HttpResponse
 from import_export import resources, fields
 from import_export.admin import ImportExportModelAdmin
 from import_export.widgets import ForeignKeyWidget
 from .models import UserProfile, Asistente, ExternalUser, SystemConfiguration, Student, AssistantProfile
+from mac_attendance.paginators import KeysetPaginationMixin
 from .audit import AuditLog
 
 # Ocultar modelos de Django que no se usan
@@ -350,7 +358,9 @@ admin.site.register(AssistantProfile, AssistantProfileAdmin)
 
 @admin.register(Asistente)
 class AsistenteAdmin(admin.ModelAdmin):
-    list_display = ['get_asistente_info', 'get_numero_cuenta', 'get_registros_realizados', 'ver_alumnos_registrados', 'can_manage_events']
+    list_display = ['get_asistente_info', 'get_numero_cuenta', 'get_registros_realizados', 'get_ultimo_registro',
+                    'ver_alumnos_registrados', 'can_manage_events']
+    list_select_related = ['user_profile']
     list_filter = ['can_manage_events']
     search_fields = ['user_profile__full_name', 'user_profile__account_number']
     readonly_fields = ['user_profile', 'get_registros_realizados', 'get_ultimos_registros']
@@ -388,6 +398,22 @@ class AsistenteAdmin(admin.ModelAdmin):
         return obj.user_profile.account_number
     get_numero_cuenta.short_description = 'Número de Cuenta'
 
+    def get_queryset(self, request):
+        """
+        Total de registros y fecha del último como subconsultas por asistente,
+        en la misma consulta del listado (sin una consulta por fila)
+        """
+        from attendance.models import Attendance
+
+        registros = Attendance.objects.filter(registered_by=OuterRef('user_profile_id'))
+        return super().get_queryset(request).annotate(
+            total_registros=Coalesce(
+                Subquery(registros.values('registered_by').annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            ultimo_registro=Subquery(registros.order_by('-timestamp').values('timestamp')[:1])
+        )
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """Filtrar el campo user_profile para mostrar solo asistentes"""
         if db_field.name == "user_profile":
@@ -396,38 +422,46 @@ class AsistenteAdmin(admin.ModelAdmin):
 
     def get_registros_realizados(self, obj):
         """Muestra el total de registros realizados por este asistente"""
-        from attendance.models import Attendance
-        count = Attendance.objects.filter(registered_by=obj.user_profile).count()
-        return f"📊 {count} registros"
+        return f"📊 {obj.total_registros} registros"
     get_registros_realizados.short_description = 'Total de registros'
+    get_registros_realizados.admin_order_field = 'total_registros'
+
+    def get_ultimo_registro(self, obj):
+        """Fecha y hora del último registro realizado por este asistente"""
+        if not obj.ultimo_registro:
+            return '-'
+        return timezone.localtime(obj.ultimo_registro).strftime('%d/%m/%Y %H:%M')
+    get_ultimo_registro.short_description = 'Último registro'
+    get_ultimo_registro.admin_order_field = 'ultimo_registro'
 
     def get_ultimos_registros(self, obj):
         """Muestra los últimos 5 registros realizados por este asistente"""
-        from django.utils.html import format_html
         from attendance.models import Attendance
 
         registros = Attendance.objects.filter(
             registered_by=obj.user_profile
-        ).select_related('student', 'external_user', 'event').order_by('-timestamp')[:5]
+        ).select_related('student', 'event').order_by('-timestamp')[:5]
 
         if not registros:
             return "Sin registros"
 
-        html = '<table style="width:100%; border-collapse: collapse;">'
-        html += '<tr style="background-color: #f0f0f0;"><th>Fecha</th><th>Asistente</th><th>Evento</th></tr>'
-
-        for reg in registros:
-            attendee = reg.student.full_name if reg.student else reg.external_user.full_name
-            html += f'''
-            <tr style="border-bottom: 1px solid #ddd;">
-                <td>{reg.timestamp.strftime("%d/%m/%Y %H:%M")}</td>
-                <td>{attendee}</td>
-                <td>{reg.event.title[:30]}...</td>
-            </tr>
-            '''
-
-        html += '</table>'
-        return format_html(html)
+        return format_html(
+            '<table style="width:100%; border-collapse: collapse;">'
+            '<tr style="background-color: #f0f0f0;"><th>Fecha</th><th>Estudiante</th><th>Evento</th></tr>'
+            '{}</table>',
+            format_html_join(
+                '',
+                '<tr style="border-bottom: 1px solid #ddd;"><td>{}</td><td>{}</td><td>{}</td></tr>',
+                (
+                    (
+                        timezone.localtime(reg.timestamp).strftime('%d/%m/%Y %H:%M'),
+                        reg.student.full_name,
+                        Truncator(reg.event.title).chars(30),
+                    )
+                    for reg in registros
+                )
+            )
+        )
     get_ultimos_registros.short_description = 'Últimos 5 registros'
 
     def ver_alumnos_registrados(self, obj):
@@ -435,7 +469,7 @@ class AsistenteAdmin(admin.ModelAdmin):
         from django.utils.html import format_html
         from django.urls import reverse
 
-        url = reverse('admin:attendance_attendance_changelist') + f'?registered_by__id__exact={obj.user_profile.id}'
+        url = reverse('admin:attendance_attendance_changelist') + f'?registrador={obj.user_profile.account_number}'
         return format_html(
             '<a class="button" href="{}" style="background-color: #417690; color: white; padding: 5px 10px; text-decoration: none; border-radius: 3px;">📋 Ver Alumnos</a>',
             url
@@ -443,26 +477,44 @@ class AsistenteAdmin(admin.ModelAdmin):
     ver_alumnos_registrados.short_description = 'Alumnos Registrados'
 
     def ver_reporte_registros(self, request, queryset):
-        """Acción para ver reporte detallado de registros de asistentes seleccionados"""
+        """
+        Acción para ver reporte detallado de registros de asistentes seleccionados.
+
+        Los totales de todos los asistentes salen de una sola consulta agrupada
+        y sus registros de otra, sin consultas por asistente.
+        """
         from django.shortcuts import render
         from attendance.models import Attendance
-        from django.db.models import Count, Q
-
-        asistentes_data = []
 
-        for asistente in queryset:
-            registros = Attendance.objects.filter(registered_by=asistente.user_profile)
+        asistentes = list(queryset.select_related('user_profile'))
+        registros = Attendance.objects.filter(
+            registered_by__in=[asistente.user_profile_id for asistente in asistentes]
+        )
 
-            estudiantes = registros.filter(student__isnull=False).select_related('student', 'event').order_by('-timestamp')
-            externos = registros.filter(external_user__isnull=False).select_related('external_user', 'event').order_by('-timestamp')
+        totales = {
+            row['registered_by']: row
+            for row in registros.values('registered_by').annotate(
+                total=Count('pk'),
+                total_estudiantes=Count('student', distinct=True),
+                total_eventos=Count('event', distinct=True),
+            )
+        }
+        por_asistente = {}
+        for registro in registros.select_related('student', 'event').only(
+            'timestamp', 'registration_method', 'registered_by_id',
+            'student__full_name', 'student__account_number', 'event__title'
+        ).order_by('registered_by', '-timestamp'):
+            por_asistente.setdefault(registro.registered_by_id, []).append(registro)
 
+        asistentes_data = []
+        for asistente in asistentes:
+            total = totales.get(asistente.user_profile_id, {})
             asistentes_data.append({
                 'asistente': asistente,
-                'total': registros.count(),
-                'estudiantes': estudiantes,
-                'externos': externos,
-                'total_estudiantes': estudiantes.count(),
-                'total_externos': externos.count(),
+                'total': total.get('total', 0),
+                'total_estudiantes': total.get('total_estudiantes', 0),
+                'total_eventos': total.get('total_eventos', 0),
+                'registros': por_asistente.get(asistente.user_profile_id, []),
             })
 
         context = {
@@ -553,15 +605,60 @@ class ExternalUserAdmin(ImportExportModelAdmin):
     get_approved_by.short_description = 'Procesado por'
 
 
+class AuditLogPeriodFilter(admin.SimpleListFilter):
+    """
+    Periodo de los registros de auditoría. Sin elegir uno se muestran los
+    últimos 7 días, para que el listado no recorra toda la tabla; "Todo el
+    historial" quita el límite.
+    """
+    title = 'periodo'
+    parameter_name = 'periodo'
+    DEFAULT = '7'
+    ALL = 'todo'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('1', 'Últimas 24 horas'),
+            ('7', 'Últimos 7 días'),
+            ('30', 'Últimos 30 días'),
+            ('90', 'Últimos 90 días'),
+            (self.ALL, 'Todo el historial'),
+        ]
+
+    def value(self):
+        return super().value() or self.DEFAULT
+
+    def choices(self, changelist):
+        # Sin opción "Todos": el periodo por defecto ya es una de las opciones
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.value() == str(lookup),
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        if self.value() == self.ALL:
+            return queryset
+        try:
+            days = int(self.value())
+        except ValueError:
+            raise IncorrectLookupParameters(f'Periodo inválido: {self.value()}')
+        return queryset.filter(timestamp__gte=timezone.now() - timedelta(days=days))
+
+
 @admin.register(AuditLog)
-class AuditLogAdmin(admin.ModelAdmin):
+class AuditLogAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     list_display = ['timestamp', 'category', 'severity', 'action', 'username', 'ip_address', 'success', 'message']
-    list_filter = ['category', 'severity', 'action', 'success', 'timestamp']
+    list_filter = [AuditLogPeriodFilter, 'category', 'severity', 'action', 'success']
     search_fields = ['username', 'ip_address', 'message', 'path']
     readonly_fields = ['timestamp', 'category', 'severity', 'action', 'user', 'username',
                       'ip_address', 'user_agent', 'path', 'method', 'message',
                       'details', 'success', 'status_code']
-    date_hierarchy = 'timestamp'
+    # Páginas por (timestamp, id) sobre el índice y total estimado (ver
+    # mac_attendance/paginators.py); sin date_hierarchy, que consulta las
+    # fechas distintas de toda la tabla
+    keyset_field = 'timestamp'
 
     def has_add_permission(self, request):
         # No permitir crear logs manualmente desde el admin
@@ -597,6 +694,10 @@ class SystemConfigurationAdmin(admin.ModelAdmin):
                 <em>Estos valores se aplican automáticamente a todos los eventos del sistema.</em>
             '''
         }),
+        ('Capacidad de los Eventos', {
+            'fields': ('enforce_event_capacity',),
+            'description': '👥 Si se activa, el escáner rechaza los registros de un evento que ya alcanzó su capacidad máxima.'
+        }),
         ('Información de Auditoría', {
             'fields': ('updated_at', 'updated_by'),
             'classes': ('collapse',)
@@ -1,10 +1,28 @@
 """
 Sistema de auditoría para registrar eventos de seguridad
 """
-from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection, models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import atexit
+import gzip
 import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
 
 
 class AuditLog(models.Model):
@@ -111,6 +129,12 @@ class AuditLog(models.Model):
             success: Si la operación fue exitosa
             status_code: Código HTTP de respuesta
             **details: Datos adicionales a guardar en JSON
+
+        Returns:
+            El AuditLog creado. Con AUDIT_LOG_ASYNC el registro solo se encola
+            (ver AuditWriter) y la instancia se devuelve sin guardar: pk es None
+            hasta que el hilo de fondo la inserta poco después, así que no debe
+            usarse como llave foránea ni buscarse en la BD justo después.
         """
         # Extraer información del request
         ip_address = None
@@ -141,7 +165,7 @@ class AuditLog(models.Model):
         sanitized_details = cls._sanitize_details(details)
 
         # Crear el log
-        return cls.objects.create(
+        log = cls(
             category=category,
             severity=severity,
             action=action,
@@ -156,6 +180,11 @@ class AuditLog(models.Model):
             success=success,
             status_code=status_code,
         )
+        if settings.AUDIT_LOG_ASYNC:
+            audit_writer.enqueue(log)
+        else:
+            log.save()
+        return log
 
     @staticmethod
     def _sanitize_details(details):
@@ -180,6 +209,46 @@ class AuditLog(models.Model):
 
         return sanitized
 
+    @classmethod
+    def archive(cls, cutoff, archive_dir, batch_size=5000):
+        """
+        Mover los registros anteriores a cutoff a archivos gzip JSONL mensuales
+        (audit_AAAA-MM.jsonl.gz en archive_dir), por lotes.
+
+        Cada lote se toma de los más antiguos (índice de timestamp, sin OFFSET),
+        se agrega a su archivo como un miembro gzip nuevo (gzip los lee como un
+        solo archivo) sincronizado al disco y solo entonces se borra de la tabla:
+        una interrupción puede dejar registros archivados dos veces, no perderlos.
+
+        Returns:
+            Diccionario {'AAAA-MM': registros archivados}
+        """
+        fields = [field.attname for field in cls._meta.concrete_fields]
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        archived = {}
+        while True:
+            rows = list(
+                cls.objects.filter(timestamp__lt=cutoff).order_by('timestamp', 'pk').values(*fields)[:batch_size]
+            )
+            if not rows:
+                return archived
+
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(timezone.localtime(row['timestamp']).strftime('%Y-%m'), []).append(row)
+            for month, month_rows in by_month.items():
+                lines = ''.join(
+                    json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for row in month_rows
+                )
+                with open(archive_dir / f'audit_{month}.jsonl.gz', 'ab') as raw:
+                    with gzip.GzipFile(fileobj=raw, mode='wb') as archive_file:
+                        archive_file.write(lines.encode('utf-8'))
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                archived[month] = archived.get(month, 0) + len(month_rows)
+
+            cls.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+
     @classmethod
     def get_user_activity(cls, user, days=30):
         """
@@ -219,4 +288,278 @@ class AuditLog(models.Model):
             category='SECURITY',
             severity__in=[severity, 'ERROR', 'CRITICAL'],
             timestamp__gte=cutoff
-        )
\ No newline at end of file
+        )
+
+class AuditWriter:
+    """
+    Escritura de AuditLog por lotes en un hilo de fondo (uno por proceso).
+
+    AuditLog.log() solo encola el registro; el hilo lo inserta con bulk_create
+    junto con los demás al juntar AUDIT_LOG_BATCH_SIZE registros o cuando el
+    más antiguo lleva AUDIT_LOG_FLUSH_INTERVAL_MS en la cola. Así una ráfaga de
+    logins al inicio de una sesión no compite, INSERT por INSERT, con el
+    registro de asistencias.
+
+    Si la inserción falla (BD caída) o la cola está llena, los registros se
+    agregan a un archivo JSONL por proceso en AUDIT_LOG_SPOOL_DIR (con fsync)
+    y se reinsertan al iniciar el hilo y tras la siguiente escritura exitosa.
+    Un archivo se toma para reinsertarlo renombrándolo a .replaying; si el
+    proceso muere a mitad, el archivo queda con esa extensión para revisarlo.
+    La escritura y el renombrado de un archivo se hacen con un flock sobre él,
+    así que un proceso no toma el archivo de otro mientras este escribe (sin
+    fcntl, en Windows, cada proceso solo reinserta su propio archivo).
+    Al terminar el proceso se escribe lo que quede en la cola.
+
+    Uso:
+        audit_writer.enqueue(AuditLog(...))
+        audit_writer.stats()  # contadores y retraso de escritura
+    """
+    _STOP = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._spooled_since_replay = False
+        self.counters = {
+            'enqueued': 0,
+            'written': 0,
+            'spooled': 0,
+            'replayed': 0,
+            'dropped': 0,
+            'flush_errors': 0,
+        }
+        self.last_flush_at = None
+        self.last_flush_lag_ms = None
+        self.max_flush_lag_ms = 0.0
+
+    def enqueue(self, log):
+        """Encolar un AuditLog sin guardar; nunca bloquea la petición"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.monotonic(), log))
+        except queue.Full:
+            self._spool([log])
+            return
+        self._count('enqueued')
+
+    def stats(self):
+        """Contadores del proceso, tamaño de la cola y retraso (ms) entre encolar y escribir"""
+        spool_dir = settings.AUDIT_LOG_SPOOL_DIR
+        with self._lock:
+            return {
+                'async': settings.AUDIT_LOG_ASYNC,
+                'pid': os.getpid(),
+                'running': self._pid == os.getpid() and self._thread.is_alive(),
+                'queue_size': self._queue.qsize() if self._pid == os.getpid() else 0,
+                **self.counters,
+                'last_flush_at': self.last_flush_at,
+                'last_flush_lag_ms': self.last_flush_lag_ms,
+                'max_flush_lag_ms': round(self.max_flush_lag_ms, 1),
+                'spool_files': len(list(spool_dir.glob('*.jsonl'))) if spool_dir.exists() else 0,
+            }
+
+    def stop(self, timeout=5.0):
+        """Escribir lo que quede en la cola y detener el hilo (se llama al terminar el proceso)"""
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+        # La BD no respondió a tiempo: lo pendiente va al spool
+        pending = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._STOP:
+                pending.append(item[1])
+        if pending:
+            self._spool(pending)
+
+    def _ensure_started(self):
+        # Tras un fork (gunicorn) el hilo y la cola del proceso padre no sirven
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=settings.AUDIT_LOG_QUEUE_SIZE)
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def _run(self):
+        self._replay_spool()
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._flush(batch)
+        connection.close()
+
+    def _next_batch(self):
+        """Esperar el primer registro y juntar más hasta el tamaño del lote o el intervalo"""
+        first = self._queue.get()
+        if first is self._STOP:
+            return [], True
+
+        batch = [first]
+        deadline = first[0] + settings.AUDIT_LOG_FLUSH_INTERVAL_MS / 1000
+        while len(batch) < settings.AUDIT_LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, batch):
+        logs = [log for enqueued_at, log in batch]
+        close_old_connections()
+        try:
+            AuditLog.objects.bulk_create(logs)
+        except Exception:
+            logger.exception('No se pudieron guardar %d registros de auditoría; se envían al spool', len(logs))
+            self._count('flush_errors')
+            self._spool(logs)
+            # La conexión puede haber quedado inservible; la siguiente escritura abre otra
+            connection.close()
+            return
+
+        lag_ms = (time.monotonic() - batch[0][0]) * 1000
+        with self._lock:
+            self.counters['written'] += len(logs)
+            self.last_flush_at = timezone.now()
+            self.last_flush_lag_ms = round(lag_ms, 1)
+            self.max_flush_lag_ms = max(self.max_flush_lag_ms, lag_ms)
+        if self._spooled_since_replay:
+            self._replay_spool()
+
+    def _spool(self, logs):
+        """Agregar registros al archivo JSONL del proceso"""
+        records = []
+        for log in logs:
+            record = {
+                field.attname: getattr(log, field.attname)
+                for field in AuditLog._meta.concrete_fields if not field.primary_key
+            }
+            # DjangoJSONEncoder recorta la hora a milisegundos
+            record['timestamp'] = log.timestamp.isoformat()
+            records.append(record)
+        lines = ''.join(json.dumps(record, cls=DjangoJSONEncoder) + '\n' for record in records)
+        spool_dir = settings.AUDIT_LOG_SPOOL_DIR
+        try:
+            with self._lock:
+                spool_dir.mkdir(parents=True, exist_ok=True)
+                path = spool_dir / f'{os.getpid()}.jsonl'
+                while True:
+                    with open(path, 'a', encoding='utf-8') as spool:
+                        # Si otro proceso tomó el archivo mientras se esperaba
+                        # el bloqueo, se escribe en uno nuevo
+                        if not self._lock_spool_file(spool, path):
+                            continue
+                        spool.write(lines)
+                        spool.flush()
+                        os.fsync(spool.fileno())
+                        break
+                self._spooled_since_replay = True
+        except OSError:
+            logger.exception('No se pudieron guardar %d registros de auditoría en el spool', len(logs))
+            self._count('dropped', len(logs))
+            return
+        self._count('spooled', len(logs))
+
+    def _replay_spool(self):
+        """Reinsertar los registros de los archivos del spool (de este u otros procesos)"""
+        self._spooled_since_replay = False
+        spool_dir = settings.AUDIT_LOG_SPOOL_DIR
+        if not spool_dir.exists():
+            return
+
+        for path in sorted(spool_dir.glob('*.jsonl')):
+            replaying = self._claim_spool_file(path)
+            if replaying is None:
+                continue
+
+            try:
+                logs = []
+                with open(replaying, encoding='utf-8') as spool:
+                    for line in spool:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Línea incompleta si el proceso murió mientras escribía
+                            self._count('dropped')
+                            continue
+                        record['timestamp'] = parse_datetime(record['timestamp'])
+                        logs.append(AuditLog(**record))
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create(logs, batch_size=settings.AUDIT_LOG_BATCH_SIZE)
+            except Exception:
+                logger.exception('No se pudo reinsertar el spool de auditoría %s', path.name)
+                replaying.rename(spool_dir / f'{uuid.uuid4().hex}.jsonl')
+                connection.close()
+                return
+            replaying.unlink()
+            self._count('replayed', len(logs))
+
+    @staticmethod
+    def _lock_spool_file(spool, path):
+        """
+        Bloquear (flock exclusivo, hasta cerrar el archivo) un archivo abierto
+        del spool. Devuelve False si, al obtener el bloqueo, la ruta ya no
+        corresponde a ese archivo porque otro proceso lo tomó para reinsertarlo.
+        """
+        if fcntl is None:
+            return True
+        fcntl.flock(spool.fileno(), fcntl.LOCK_EX)
+        try:
+            return os.stat(path).st_ino == os.fstat(spool.fileno()).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _claim_spool_file(self, path):
+        """
+        Tomar un archivo del spool para reinsertarlo, renombrándolo a .replaying.
+
+        El renombrado se hace con el bloqueo del archivo: un proceso que esté
+        escribiendo en él termina antes, y los que esperaban el bloqueo ven que
+        ya no es su archivo y empiezan otro. Los archivos de reinserciones
+        fallidas (nombre aleatorio) ya no tienen quien escriba en ellos.
+
+        Returns:
+            Ruta del archivo renombrado, o None si otro proceso lo tomó antes
+        """
+        other_process = path.stem.isdigit() and path.stem != str(os.getpid())
+        if fcntl is None and other_process:
+            # Sin flock no se puede saber si su proceso sigue escribiendo
+            return None
+
+        replaying = path.with_name(f'{uuid.uuid4().hex}.replaying')
+        try:
+            with self._lock, open(path, encoding='utf-8') as spool:
+                if not self._lock_spool_file(spool, path):
+                    return None
+                path.rename(replaying)
+        except FileNotFoundError:
+            return None
+        return replaying
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.stop)
@@ -0,0 +1,97 @@
+"""
+Comando para archivar y eliminar los registros de auditoría antiguos.
+
+Los registros con más de --days días (default: AUDIT_LOG_RETENTION_DAYS) se
+mueven por lotes a archivos gzip JSONL, uno por mes (audit_AAAA-MM.jsonl.gz), en
+--archive-dir (default: AUDIT_LOG_ARCHIVE_DIR), y se eliminan de la tabla. Si
+el archivo del mes ya existe se le agregan los registros. Pensado para
+ejecutarse a diario desde cron.
+
+Para consultar un archivo:
+    zcat logs/audit_archive/audit_2025-03.jsonl.gz | grep LOGIN_FAILED
+
+Uso:
+    python manage.py prune_audit_logs
+    python manage.py prune_audit_logs --days 90
+    python manage.py prune_audit_logs --dry-run
+    python manage.py prune_audit_logs --archive-dir /respaldos/auditoria
+"""
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from authentication.audit import AuditLog
+
+
+class Command(BaseCommand):
+    help = 'Archiva en gzip JSONL y elimina los registros de auditoría antiguos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_DAYS,
+            help=f'Conservar en la tabla los registros de los últimos N días '
+                 f'(default: {settings.AUDIT_LOG_RETENTION_DAYS})'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            type=str,
+            default=str(settings.AUDIT_LOG_ARCHIVE_DIR),
+            help='Directorio de los archivos (default: AUDIT_LOG_ARCHIVE_DIR)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Registros por lote (default: 5000)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Mostrar cuántos registros se archivarían sin modificar nada'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days debe ser al menos 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser al menos 1')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        archive_dir = Path(options['archive_dir'])
+        started = time.perf_counter()
+
+        if options['dry_run']:
+            pending = AuditLog.objects.filter(timestamp__lt=cutoff).aggregate(
+                oldest=Min('timestamp'), newest=Max('timestamp')
+            )
+            count = AuditLog.objects.filter(timestamp__lt=cutoff).count()
+            self.stdout.write(self.style.WARNING('Modo de prueba: no se modificó nada'))
+            if count:
+                self.stdout.write(
+                    f'Registros a archivar: {count} '
+                    f'(del {timezone.localtime(pending["oldest"]):%Y-%m-%d} '
+                    f'al {timezone.localtime(pending["newest"]):%Y-%m-%d}) en {archive_dir}'
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS(f'No hay registros anteriores al {cutoff:%Y-%m-%d}'))
+            return
+
+        archived = AuditLog.archive(cutoff, archive_dir, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        for month, count in sorted(archived.items()):
+            self.stdout.write(f'  {archive_dir / f"audit_{month}.jsonl.gz"}: {count} registros')
+        total = sum(archived.values())
+        if total:
+            self.stdout.write(self.style.SUCCESS(
+                f'Registros archivados y eliminados: {total} en {elapsed:.2f}s '
+                f'({total / elapsed if elapsed else 0:,.0f} registros/s)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'No hay registros anteriores al {cutoff:%Y-%m-%d}'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0014_alter_externaluser_account_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['user_type', 'account_number'], name='authenticat_user_ty_0724aa_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='systemconfiguration',
+            name='enforce_event_capacity',
+            field=models.BooleanField(default=False, help_text='Rechazar registros de asistencia cuando el evento ya alcanzó su capacidad máxima', verbose_name='Respetar capacidad de los eventos'),
+        ),
+    ]
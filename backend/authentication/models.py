@@ -1,4 +1,9 @@
+import time
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -32,6 +37,12 @@ class UserProfile(models.Model):
         verbose_name="Nombre completo"
     )
 
+    class Meta:
+        indexes = [
+            # Búsqueda de estudiantes/asistentes por número de cuenta y listados por tipo
+            models.Index(fields=['user_type', 'account_number']),
+        ]
+
     def __str__(self):
         return f"{self.account_number} - {self.full_name}"
 
@@ -155,6 +166,12 @@ class SystemConfiguration(models.Model):
         help_text="Tiempo límite en minutos después del inicio del evento para registrar asistencia (0-120)"
     )
 
+    enforce_event_capacity = models.BooleanField(
+        default=False,
+        verbose_name="Respetar capacidad de los eventos",
+        help_text="Rechazar registros de asistencia cuando el evento ya alcanzó su capacidad máxima"
+    )
+
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
     updated_by = models.ForeignKey(
         UserProfile,
@@ -174,18 +191,63 @@ class SystemConfiguration(models.Model):
             raise ValidationError("Solo puede existir una configuración del sistema.")
         super().save(*args, **kwargs)
 
+    # Caché de la configuración: una copia local por proceso, validada contra
+    # una versión en la caché compartida (ver get_config / invalidate_cache)
+    CACHE_VERSION_KEY = 'system_config:version'
+    CACHE_KEY = 'system_config:{version}'
+    _local_cache = {'version': None, 'config': None, 'checked_at': 0.0}
+
     @classmethod
     def get_config(cls):
-        """Obtener o crear la configuración del sistema"""
-        config, created = cls.objects.get_or_create(
-            pk=1,
-            defaults={
-                'minimum_attendance_percentage': 80.0,
-                'minutes_before_event': 10,
-                'minutes_after_start': 25
-            }
-        )
-        return config
+        """
+        Obtener o crear la configuración del sistema.
+
+        Se lee de una copia local del proceso; cada SYSTEM_CONFIG_LOCAL_TTL
+        segundos se compara con la versión de la caché compartida para detectar
+        cambios hechos en otros procesos. Solo se consulta la BD cuando la
+        versión cambió, así que en las rutas calientes (cada escaneo, cada fila
+        del admin de estadísticas) no hay consultas. El objeto devuelto es
+        compartido: no modificarlo; para editar, usar SystemConfiguration.objects.
+        """
+        local = cls._local_cache
+        now = time.monotonic()
+        if local['config'] is not None and now - local['checked_at'] < settings.SYSTEM_CONFIG_LOCAL_TTL:
+            return local['config']
+
+        version = cache.get(cls.CACHE_VERSION_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            cache.add(cls.CACHE_VERSION_KEY, version, None)
+            version = cache.get(cls.CACHE_VERSION_KEY, version)
+
+        if local['config'] is None or local['version'] != version:
+            key = cls.CACHE_KEY.format(version=version)
+            config = cache.get(key)
+            if config is None:
+                config, created = cls.objects.get_or_create(
+                    pk=1,
+                    defaults={
+                        'minimum_attendance_percentage': 80.0,
+                        'minutes_before_event': 10,
+                        'minutes_after_start': 25
+                    }
+                )
+                cache.set(key, config, None)
+            local['config'] = config
+            local['version'] = version
+
+        local['checked_at'] = now
+        return local['config']
+
+    @classmethod
+    def invalidate_cache(cls):
+        """
+        Publicar una nueva versión para que todos los procesos recarguen la
+        configuración. Se llama desde las señales post_save/post_delete; llamarla
+        a mano tras un QuerySet.update() sobre la configuración.
+        """
+        cache.set(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+        cls._local_cache.update(version=None, config=None, checked_at=0.0)
 
     def __str__(self):
         return f"Configuración del Sistema - Asistencia mínima: {self.minimum_attendance_percentage}%"
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SystemConfiguration
+
+
+@receiver(post_save, sender=SystemConfiguration)
+@receiver(post_delete, sender=SystemConfiguration)
+def invalidate_system_config_cache(sender, instance, **kwargs):
+    """
+    Invalidar la configuración en caché cuando se modifica.
+
+    Se espera al commit: si otro proceso recargara antes, guardaría el valor
+    anterior bajo la versión nueva.
+    """
+    transaction.on_commit(SystemConfiguration.invalidate_cache)
+    print("[SIGNAL] Configuración del sistema actualizada - caché invalidada")
@@ -9,4 +9,5 @@ urlpatterns = [
     path('token/refresh/', views.refresh_token, name='token_refresh'),
     path('token/verify/', views.verify_token, name='token_verify'),
     path('system-config/', views.get_system_config, name='system_config'),
+    path('audit-writer/', views.audit_writer_stats, name='audit_writer_stats'),
 ]
\ No newline at end of file
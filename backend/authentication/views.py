@@ -1,6 +1,6 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
@@ -9,7 +9,7 @@ from django_ratelimit.decorators import ratelimit
 from django_ratelimit.exceptions import Ratelimited
 from .models import UserProfile, Asistente
 from .serializers import LoginSerializer, UserSerializer
-from .audit import AuditLog
+from .audit import AuditLog, audit_writer
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -132,5 +132,12 @@ def get_system_config(request):
     return Response({
         'minimum_attendance_percentage': config.minimum_attendance_percentage,
         'minutes_before_event': config.minutes_before_event,
-        'minutes_after_start': config.minutes_after_start
-    })
\ No newline at end of file
+        'minutes_after_start': config.minutes_after_start,
+        'enforce_event_capacity': config.enforce_event_capacity
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def audit_writer_stats(request):
+    """Estado de la escritura de auditoría en segundo plano de este proceso (solo staff)"""
+    return Response(audit_writer.stats())
@@ -27,12 +27,12 @@ class EventResource(resources.ModelResource):
 @admin.register(Event)
 class EventAdmin(ImportExportModelAdmin):
     resource_class = EventResource
-    list_display = ['title', 'speaker', 'date', 'start_time', 'modality', 'location', 'is_active']
+    list_display = ['title', 'speaker', 'date', 'start_time', 'modality', 'location', 'attendance_count', 'max_capacity', 'is_active']
     list_filter = ['event_type', 'modality', 'date', 'is_active']
     search_fields = ['title', 'speaker', 'location']
     date_hierarchy = 'date'
     ordering = ['date', 'start_time']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'attendance_count']
     actions = ['export_selected_events']
 
     def get_import_formats(self):
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'events'
+
+    def ready(self):
+        """
+        Importar señales cuando la aplicación esté lista.
+        """
+        import events.signals  # noqa
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from events.models import group_events_into_slots
+
+
+def build_event_slots(apps, schema_editor):
+    """Construir el índice inicial de bloques de horario con los eventos activos"""
+    Event = apps.get_model('events', 'Event')
+    EventSlot = apps.get_model('events', 'EventSlot')
+
+    events = list(Event.objects.filter(is_active=True).order_by('date', 'start_time', 'end_time', 'id'))
+
+    for anchor, members in group_events_into_slots(events):
+        slot = EventSlot.objects.create(
+            date=anchor.date,
+            start_time=anchor.start_time,
+            end_time=anchor.end_time,
+        )
+        Event.objects.filter(pk__in=[event.pk for event in members]).update(slot=slot)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_remove_event_created_by'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('start_time', models.TimeField(verbose_name='Hora de inicio')),
+                ('end_time', models.TimeField(verbose_name='Hora de fin')),
+            ],
+            options={
+                'verbose_name': 'Bloque de horario',
+                'verbose_name_plural': 'Bloques de horario',
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='slot',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='events.eventslot', verbose_name='Bloque de horario'),
+        ),
+        migrations.RunPython(build_event_slots, migrations.RunPython.noop),
+    ]
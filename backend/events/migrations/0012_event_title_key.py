@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+from events.models import normalize_title
+
+
+def fill_title_keys(apps, schema_editor):
+    """Calcular la llave normalizada de los eventos existentes"""
+    Event = apps.get_model('events', 'Event')
+
+    events = list(Event.objects.only('id', 'title'))
+    for event in events:
+        event.title_key = normalize_title(event.title)
+    Event.objects.bulk_update(events, ['title_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='title_key',
+            field=models.CharField(default='', editable=False, help_text='Título sin acentos, mayúsculas ni espacios repetidos (ver normalize_title)', max_length=200, verbose_name='Título normalizado'),
+        ),
+        migrations.RunPython(fill_title_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['title_key', 'date'], name='events_even_title_k_45a31a_idx'),
+        ),
+    ]
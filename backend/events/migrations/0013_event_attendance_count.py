@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:00
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_attendance_counts(apps, schema_editor):
+    """Contar las asistencias válidas de los eventos existentes (un solo UPDATE)"""
+    Event = apps.get_model('events', 'Event')
+    Attendance = apps.get_model('attendance', 'Attendance')
+
+    Event.objects.update(attendance_count=Coalesce(models.Subquery(
+        Attendance.objects.filter(event_id=models.OuterRef('pk'), is_valid=True)
+        .order_by().values('event_id').annotate(total=models.Count('id')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_event_title_key'),
+        ('attendance', '0008_attendancestats_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendance_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Asistentes registrados'),
+        ),
+        migrations.RunPython(fill_attendance_counts, migrations.RunPython.noop),
+    ]
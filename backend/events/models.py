@@ -1,8 +1,133 @@
-from django.db import models
+import unicodedata
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from authentication.models import UserProfile
 
+
+def group_events_into_slots(events):
+    """
+    Agrupar eventos en bloques de horario (misma fecha y horarios que se solapan).
+
+    Los eventos deben venir ordenados por (date, start_time). Cada bloque queda
+    definido por su primer evento (ancla); un evento se une al primer bloque abierto
+    del mismo día cuyo horario ancla se solape con el suyo. Como los eventos llegan
+    ordenados por hora de inicio, los bloques cuyo fin ya pasó se descartan del
+    barrido, así que cada evento solo se compara con los bloques aún abiertos.
+
+    Returns:
+        Lista de tuplas (evento_ancla, [eventos del bloque]) en orden cronológico.
+    """
+    slots = []
+    open_slots = []
+    current_date = None
+
+    for event in events:
+        if event.date != current_date:
+            current_date = event.date
+            open_slots = []
+
+        # Descartar bloques que terminaron antes de que inicie este evento
+        open_slots = [slot for slot in open_slots if slot[0].end_time > event.start_time]
+
+        for anchor, members in open_slots:
+            if event.start_time < anchor.end_time and event.end_time > anchor.start_time:
+                members.append(event)
+                break
+        else:
+            slot = (event, [event])
+            slots.append(slot)
+            open_slots.append(slot)
+
+    return slots
+
+
+def normalize_title(title):
+    """
+    Llave de búsqueda de un título: sin acentos, sin distinguir mayúsculas y con
+    los espacios colapsados, para que "  Introducción a la IA" y "introduccion a
+    la ia" (como suelen venir en las hojas de cálculo) sean el mismo evento.
+    """
+    decomposed = unicodedata.normalize('NFKD', title or '')
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.casefold().split())
+
+
+class EventSlot(models.Model):
+    """
+    Índice precalculado de bloques de horario.
+
+    Las estadísticas de asistencia cuentan bloques (eventos simultáneos cuentan
+    como uno solo). El agrupamiento es el mismo para todos los estudiantes, así que
+    se guarda aquí y se reconstruye en el recálculo que encolan los cambios de eventos.
+    """
+    date = models.DateField(verbose_name="Fecha")
+    start_time = models.TimeField(verbose_name="Hora de inicio")
+    end_time = models.TimeField(verbose_name="Hora de fin")
+
+    class Meta:
+        ordering = ['date', 'start_time']
+        verbose_name = "Bloque de horario"
+        verbose_name_plural = "Bloques de horario"
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Reconstruir el índice de bloques a partir de los eventos activos.
+
+        Reutiliza los bloques cuyo horario ancla no cambió y solo actualiza los
+        eventos que cambiaron de bloque. Devuelve el número total de bloques.
+        """
+        events = list(
+            Event.objects.filter(is_active=True)
+            .order_by('date', 'start_time', 'end_time', 'id')
+            .only('id', 'date', 'start_time', 'end_time', 'slot_id')
+        )
+        groups = group_events_into_slots(events)
+
+        with transaction.atomic():
+            existing = {
+                (slot.date, slot.start_time, slot.end_time): slot
+                for slot in cls.objects.select_for_update()
+            }
+
+            assignments = []
+            new_slots = []
+            for anchor, members in groups:
+                key = (anchor.date, anchor.start_time, anchor.end_time)
+                slot = existing.pop(key, None)
+                if slot is None:
+                    slot = cls(date=anchor.date, start_time=anchor.start_time, end_time=anchor.end_time)
+                    new_slots.append(slot)
+                assignments.append((slot, members))
+
+            cls.objects.bulk_create(new_slots)
+
+            changed = []
+            for slot, members in assignments:
+                for event in members:
+                    if event.slot_id != slot.pk:
+                        event.slot_id = slot.pk
+                        changed.append(event)
+            Event.objects.bulk_update(changed, ['slot'], batch_size=500)
+
+            # Los eventos inactivos no pertenecen a ningún bloque
+            Event.objects.filter(is_active=False, slot__isnull=False).update(slot=None)
+
+            if existing:
+                cls.objects.filter(pk__in=[slot.pk for slot in existing.values()]).delete()
+
+        return len(groups)
+
+    def __str__(self):
+        return f"Bloque {self.date} {self.start_time}-{self.end_time}"
+
+
 class Event(models.Model):
     EVENT_TYPES = (
         ('conference', 'Conferencia'),
@@ -21,6 +146,13 @@ class Event(models.Model):
         max_length=200,
         verbose_name="Título de la ponencia"
     )
+    title_key = models.CharField(
+        max_length=200,
+        editable=False,
+        default='',
+        verbose_name="Título normalizado",
+        help_text="Título sin acentos, mayúsculas ni espacios repetidos (ver normalize_title)"
+    )
     description = models.TextField(
         verbose_name="Descripción"
     )
@@ -52,6 +184,13 @@ class Event(models.Model):
         default=100,
         verbose_name="Capacidad máxima"
     )
+    # Asistencias válidas del evento, mantenido con UPDATE ... F() en cada alta,
+    # invalidación o baja de asistencias (ver shift_attendance_count)
+    attendance_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Asistentes registrados"
+    )
     is_active = models.BooleanField(
         default=True,
         verbose_name="Evento activo"
@@ -74,11 +213,32 @@ class Event(models.Model):
         help_text="Código de sala/reunión"
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última actualización")
+    slot = models.ForeignKey(
+        EventSlot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='events',
+        verbose_name="Bloque de horario"
+    )
     
+    # Versión de la agenda en la caché compartida; cambia con cada alta, edición
+    # o baja de eventos (ver events/signals.py)
+    CACHE_VERSION_KEY = 'events:version'
+
     class Meta:
         ordering = ['date', 'start_time']
         verbose_name = "Evento/Ponencia"
         verbose_name_plural = "Eventos/Ponencias"
+        indexes = [
+            # Agenda de eventos activos en orden cronológico, eventos abiertos
+            # para registro y reconstrucción de bloques de horario
+            models.Index(fields=['is_active', 'date', 'start_time']),
+            # Resolución de títulos de eventos al importar (events/resolver.py)
+            models.Index(fields=['title_key', 'date']),
+        ]
     
     def clean(self):
         # Validar que la hora de fin sea después de la hora de inicio
@@ -108,8 +268,145 @@ class Event(models.Model):
         skip_validation = kwargs.pop('skip_validation', False)
         if not skip_validation:
             self.clean()
+
+        self.title_key = normalize_title(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'title_key'}
+        elif update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Al editar no sobrescribir el contador con el valor leído al cargar
+            # el evento: los escáneres lo pudieron cambiar mientras tanto
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'attendance_count'
+            ]
         super().save(*args, **kwargs)
+
+    @classmethod
+    def shift_attendance_count(cls, deltas):
+        """
+        Ajustar el contador de asistentes de varios eventos.
+
+        Args:
+            deltas: Diccionario {event_id: cambio} (positivo al registrar,
+                negativo al invalidar o eliminar asistencias)
+
+        Se hace un UPDATE ... SET attendance_count = attendance_count + N por
+        cada cambio distinto (normalmente uno), sin pasar por save() ni por las
+        señales de eventos.
+        """
+        by_delta = {}
+        for event_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(event_id)
+        for delta, event_ids in by_delta.items():
+            cls.objects.filter(pk__in=event_ids).update(
+                attendance_count=models.F('attendance_count') + delta
+            )
+
+    @classmethod
+    def reserve_seats(cls, event_id, seats=1):
+        """
+        Sumar asistentes al contador del evento solo si caben en su capacidad.
+
+        Es un solo UPDATE condicional (sin COUNT): la fila del evento queda
+        bloqueada hasta el fin de la transacción, así que dos escáneres no
+        pueden ocupar el último lugar a la vez.
+
+        Returns:
+            True si se reservaron los lugares, False si el evento está lleno
+        """
+        return bool(cls.objects.filter(
+            pk=event_id,
+            attendance_count__lte=models.F('max_capacity') - seats
+        ).update(attendance_count=models.F('attendance_count') + seats))
+
+    @classmethod
+    def recount_attendance(cls, events=None):
+        """
+        Recalcular el contador de asistentes desde las asistencias válidas.
+
+        Para corregir el contador tras modificar asistencias fuera de los
+        caminos normales (SQL directo, QuerySet.update() en scripts). Devuelve
+        el número de eventos actualizados.
+        """
+        from attendance.models import Attendance
+        if events is None:
+            events = cls.objects.all()
+        return events.update(attendance_count=Coalesce(models.Subquery(
+            Attendance.objects.filter(event_id=models.OuterRef('pk'), is_valid=True)
+            .order_by().values('event_id').annotate(total=models.Count('id')).values('total')
+        ), 0))
+
+    @property
+    def available_seats(self):
+        """Lugares disponibles según el contador de asistentes (nunca negativo)"""
+        return max(self.max_capacity - self.attendance_count, 0)
     
+    @classmethod
+    def cache_version(cls):
+        """Versión actual de la agenda en la caché compartida (para construir llaves de caché)"""
+        version = cache.get(cls.CACHE_VERSION_KEY)
+        if version is None:
+            cache.add(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(cls.CACHE_VERSION_KEY)
+        return version
+
+    @classmethod
+    def invalidate_cache(cls):
+        """
+        Publicar una nueva versión de la agenda para invalidar las cachés de eventos.
+        Se llama desde las señales post_save/post_delete; llamarla a mano tras
+        un bulk_create o QuerySet.update() sobre eventos.
+        """
+        cache.set(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+
+    def registration_window(self, config):
+        """Inicio y fin (con zona horaria) de la ventana de registro de asistencia"""
+        event_start = datetime.combine(self.date, self.start_time)
+        if timezone.is_naive(event_start):
+            event_start = timezone.make_aware(event_start)
+        return (
+            event_start - timedelta(minutes=config.minutes_before_event),
+            event_start + timedelta(minutes=config.minutes_after_start)
+        )
+
+    @classmethod
+    def open_for_registration(cls, now=None):
+        """
+        Eventos activos cuya ventana de registro contiene la hora actual del servidor.
+
+        Solo consulta los eventos de ayer, hoy y mañana (índice por fecha y hora
+        de inicio), porque una ventana puede cruzar la medianoche.
+
+        Returns:
+            Tupla (eventos abiertos, momento del siguiente cambio): el siguiente
+            cambio es cuando se abre o se cierra la próxima ventana, o la siguiente
+            medianoche local, lo que ocurra primero. Hasta entonces el resultado
+            no cambia salvo que se modifiquen los eventos o la configuración.
+        """
+        from authentication.models import SystemConfiguration
+        config = SystemConfiguration.get_config()
+
+        if now is None:
+            now = timezone.now()
+        today = timezone.localdate(now)
+        next_change = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+
+        open_events = []
+        for event in cls.objects.filter(
+            is_active=True,
+            date__range=(today - timedelta(days=1), today + timedelta(days=1))
+        ).order_by('date', 'start_time'):
+            opens_at, closes_at = event.registration_window(config)
+            if opens_at <= now <= closes_at:
+                open_events.append(event)
+                next_change = min(next_change, closes_at + timedelta(seconds=1))
+            elif opens_at > now:
+                next_change = min(next_change, opens_at)
+
+        return open_events, next_change
+
     @property
     def duration_minutes(self):
         """Duración del evento en minutos"""
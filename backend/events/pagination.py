@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+
+
+class EventCursorPagination(CursorPagination):
+    """
+    Paginación por cursor en orden cronológico (date, start_time, id).
+
+    Es opcional: solo se pagina si la petición trae ?cursor= o ?page_size=,
+    así los clientes que esperan la lista completa siguen funcionando.
+    """
+    ordering = ('date', 'start_time', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not {self.cursor_query_param, self.page_size_query_param} & set(request.query_params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,100 @@
+"""
+Resolución de títulos de eventos escritos a mano (hojas de cálculo de asistencias).
+
+Los títulos se comparan por su llave normalizada (Event.title_key, ver
+normalize_title), indexada junto con la fecha. Los eventos se cargan una vez
+por importación y cada fila se resuelve en memoria:
+  1. Coincidencia exacta de la llave (y de la fecha, si se indica)
+  2. Si no hay, la llave más parecida con difflib (títulos con erratas o
+     palabras de más), solo entre los eventos de esa fecha cuando se conoce.
+     No se acepta si otra llave también pasa el umbral (ambigua) o si los
+     números del título no coinciden ("parte 3" no es "parte 2", "2025" no es
+     "2024"). Quien llama debe informar las sustituciones (ver is_fuzzy)
+"""
+import difflib
+import re
+
+from .models import Event, normalize_title
+
+# Similitud mínima (0-1) para aceptar un título aproximado
+FUZZY_CUTOFF = 0.85
+
+
+def _numbers(key):
+    """Números de un título (partes, grupos, años), que no deben confundirse por similitud"""
+    return re.findall(r'\d+', key)
+
+
+class EventResolver:
+    """
+    Índice en memoria {llave: [eventos]} para resolver títulos de eventos.
+
+    Uso:
+        resolver = EventResolver.load(titles, dates)
+        events = resolver.resolve('Introduccion a la IA ', date(2025, 10, 21))
+    """
+
+    def __init__(self, events, fuzzy=True, cutoff=FUZZY_CUTOFF):
+        self.fuzzy = fuzzy
+        self.cutoff = cutoff
+        self.by_key = {}
+        self.keys_by_date = {}
+        for event in events:
+            self.by_key.setdefault(event.title_key, []).append(event)
+            self.keys_by_date.setdefault(event.date, set()).add(event.title_key)
+        self.fuzzy_matches = {}
+
+    @classmethod
+    def load(cls, titles, dates=None, fuzzy=True, cutoff=FUZZY_CUTOFF):
+        """
+        Cargar los eventos que pueden corresponder a los títulos (y fechas) dados.
+
+        Sin búsqueda aproximada es una sola consulta por (title_key, date). Con
+        ella, los títulos sin coincidencia exacta se comparan con los demás
+        eventos de esas fechas (o con todos, si no se indicaron fechas): una
+        segunda consulta solo cuando hace falta.
+        """
+        keys = {normalize_title(str(title)) for title in titles if title}
+        events = Event.objects.filter(title_key__in=keys)
+        if dates is not None:
+            dates = set(dates)
+            events = events.filter(date__in=dates)
+        events = list(events)
+
+        if fuzzy and keys - {event.title_key for event in events}:
+            candidates = Event.objects.exclude(pk__in=[event.pk for event in events])
+            if dates is not None:
+                candidates = candidates.filter(date__in=dates)
+            events.extend(candidates)
+
+        return cls(events, fuzzy=fuzzy, cutoff=cutoff)
+
+    def resolve(self, title, date=None):
+        """
+        Eventos que corresponden al título (y fecha). Una lista vacía si no hay
+        ninguno; más de uno si hay eventos homónimos y quien llama debe decidir.
+        """
+        key = normalize_title(str(title))
+        events = self._matching(key, date)
+        if events or not self.fuzzy:
+            return events
+
+        if (key, date) not in self.fuzzy_matches:
+            candidates = self.keys_by_date.get(date, ()) if date is not None else self.by_key.keys()
+            close = difflib.get_close_matches(key, list(candidates), n=2, cutoff=self.cutoff)
+            # Una sola llave parecida y con los mismos números, o ninguna
+            accepted = len(close) == 1 and _numbers(close[0]) == _numbers(key)
+            self.fuzzy_matches[(key, date)] = close[0] if accepted else None
+
+        match = self.fuzzy_matches[(key, date)]
+        return self._matching(match, date) if match else []
+
+    def is_fuzzy(self, title, event):
+        """Indica si el evento se asignó al título por similitud y no por coincidencia exacta"""
+        return event.title_key != normalize_title(str(title))
+
+    def _matching(self, key, date):
+        return [
+            event for event in self.by_key.get(key, ())
+            if date is None or event.date == date
+        ]
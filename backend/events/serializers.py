@@ -3,6 +3,18 @@ from .models import Event
 from authentication.models import ExternalUser
 
 class EventSerializer(serializers.ModelSerializer):
+    """
+    Acepta en el contexto 'fields' (lista de nombres) para devolver solo esos
+    campos, p. ej. para omitir la descripción en los listados (?fields=).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     class Meta:
         model = Event
         fields = [
@@ -0,0 +1,18 @@
+"""
+Señales para invalidar las cachés que dependen de la agenda de eventos.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Event
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_events_cache(sender, instance, **kwargs):
+    """
+    Cualquier alta, edición o baja de un evento invalida las respuestas en caché
+    (p. ej. /api/events/open/). Se espera al commit para que otro proceso no
+    guarde en caché la agenda anterior bajo la versión nueva.
+    """
+    transaction.on_commit(Event.invalidate_cache)
@@ -3,16 +3,44 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_ratelimit.decorators import ratelimit
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags, quote_etag
 from django.db import models
+from rest_framework.exceptions import ValidationError as DRFValidationError
 from .models import Event
+from .pagination import EventCursorPagination
 from authentication.models import ExternalUser
 from .serializers import EventSerializer, ExternalUserSerializer
+import hashlib
+import json
+import math
 import re
 
+def make_etag(text):
+    """ETag (entre comillas) de una versión de la respuesta; el hash no tiene uso de seguridad"""
+    return quote_etag(hashlib.md5(text.encode(), usedforsecurity=False).hexdigest())
+
 class EventListView(generics.ListCreateAPIView):
+    """
+    Agenda pública de eventos activos.
+
+    GET acepta:
+      ?from=YYYY-MM-DD&to=YYYY-MM-DD  rango de fechas (inclusivo)
+      ?fields=id,title,date           devolver solo esos campos
+      ?cursor= / ?page_size=          paginación por cursor (opcional)
+
+    Responde con un ETag calculado a partir de la versión de la agenda y de
+    la última modificación de los eventos; si el cliente ya tiene esa versión
+    se responde 304 sin consultar ni serializar la lista. No se envía
+    Last-Modified: eliminar el evento más reciente no lo cambiaría y un
+    cliente con If-Modified-Since recibiría un 304 con la lista anterior.
+    """
     queryset = Event.objects.filter(is_active=True)
     serializer_class = EventSerializer
+    pagination_class = EventCursorPagination
 
     def get_permissions(self):
         """Permitir lectura pública, pero creación solo para autenticados"""
@@ -20,8 +48,56 @@ class EventListView(generics.ListCreateAPIView):
             return [IsAuthenticated()]
         return [AllowAny()]
 
+    def get_requested_fields(self):
+        """Campos pedidos con ?fields= (solo los que existen en el serializer)"""
+        requested = self.request.query_params.get('fields')
+        if self.request.method != 'GET' or not requested:
+            return None
+        allowed = EventSerializer.Meta.fields
+        fields = [name for name in requested.split(',') if name.strip() in allowed]
+        return [name.strip() for name in fields] or None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
     def get_queryset(self):
-        return Event.objects.filter(is_active=True).order_by('date', 'start_time')
+        queryset = Event.objects.filter(is_active=True).order_by('date', 'start_time')
+
+        for param, lookup in (('from', 'date__gte'), ('to', 'date__lte')):
+            value = self.request.query_params.get(param)
+            if value:
+                date = parse_date(value)
+                if date is None:
+                    raise DRFValidationError({param: 'Fecha inválida, use el formato YYYY-MM-DD'})
+                queryset = queryset.filter(**{lookup: date})
+
+        fields = self.get_requested_fields()
+        if fields:
+            # Leer de la BD solo las columnas pedidas (la descripción puede ser larga)
+            queryset = queryset.only('id', 'date', 'start_time', *fields)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # Versión de la agenda: la de la caché (cambia al guardar o eliminar
+        # eventos), más la última modificación y el número de eventos activos
+        # (un solo agregado) para los cambios hechos con QuerySet.update()
+        stamp = Event.objects.aggregate(
+            last_modified=models.Max('updated_at'),
+            total=models.Count('id', filter=models.Q(is_active=True))
+        )
+        etag = make_etag(
+            f"{Event.cache_version()}:{stamp['last_modified']}:{stamp['total']}:{request.get_full_path()}"
+        )
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache'
+        return response
 
     def perform_create(self, serializer):
         """Verificar que solo asistentes puedan crear eventos"""
@@ -36,6 +112,81 @@ class EventListView(generics.ListCreateAPIView):
 
         serializer.save()
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='120/m', method='GET', block=True)
+def open_events(request):
+    """
+    Eventos abiertos para registro en este momento (hora del servidor).
+
+    La respuesta se guarda en la caché compartida hasta el siguiente cambio de
+    ventana de registro (o hasta que cambien los eventos o la configuración) y
+    se responde 304 si el cliente ya tiene la misma versión (ETag).
+    """
+    from authentication.models import SystemConfiguration
+    config = SystemConfiguration.get_config()
+
+    now = timezone.now()
+    cache_key = (
+        f'events:open:{Event.cache_version()}:'
+        f'{config.minutes_before_event}:{config.minutes_after_start}'
+    )
+    cached = cache.get(cache_key)
+
+    if cached is None or cached['next_change_at'] <= now:
+        events, next_change_at = Event.open_for_registration(now)
+        data = {
+            'minutes_before_event': config.minutes_before_event,
+            'minutes_after_start': config.minutes_after_start,
+            'next_change_at': next_change_at.isoformat(),
+            'results': EventSerializer(events, many=True).data,
+        }
+        etag = make_etag(json.dumps(data, sort_keys=True, default=str))
+        cached = {'data': data, 'etag': etag, 'next_change_at': next_change_at}
+        timeout = max(1, math.ceil((next_change_at - now).total_seconds()))
+        cache.set(cache_key, cached, timeout)
+
+    # nginx convierte el ETag en débil (W/) al comprimir con gzip
+    client_etags = [etag.removeprefix('W/') for etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+    if cached['etag'] in client_etags or '*' in client_etags:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(cached['data'])
+    response['ETag'] = cached['etag']
+    # El navegador debe revalidar siempre (la respuesta cambia al abrirse o cerrarse una ventana)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@ratelimit(key='user', rate='120/m', method='GET', block=True)
+def event_occupancy(request, event_id):
+    """
+    Ocupación actual de un evento, para consultarla periódicamente desde cada escáner.
+
+    Se lee del contador de asistentes del evento (Event.attendance_count) con
+    una sola consulta por llave primaria, sin contar asistencias.
+    """
+    from authentication.models import SystemConfiguration
+    config = SystemConfiguration.get_config()
+
+    row = Event.objects.filter(pk=event_id).values('id', 'attendance_count', 'max_capacity').first()
+    if row is None:
+        return Response({'error': 'Evento no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+    count, capacity = row['attendance_count'], row['max_capacity']
+    response = Response({
+        'event_id': row['id'],
+        'attendance_count': count,
+        'max_capacity': capacity,
+        'available_seats': max(capacity - count, 0),
+        'occupancy_percentage': round(count * 100 / capacity, 1) if capacity > 0 else None,
+        'is_full': count >= capacity,
+        'enforce_capacity': config.enforce_event_capacity
+    })
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 @ratelimit(key='user', rate='30/m', method='POST', block=True)
@@ -0,0 +1,53 @@
+"""
+Filtros del admin para llaves foráneas con muchas filas.
+
+Un list_filter sobre una llave foránea (RelatedFieldListFilter) consulta y
+lista en la barra lateral todas las filas del modelo relacionado: todos los
+eventos, o todos los perfiles para registered_by. TextInputFilter muestra en su
+lugar un campo de texto y filtra por lo que se escriba.
+"""
+from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+
+
+class TextInputFilter(admin.SimpleListFilter):
+    """
+    Filtro de texto libre. Las subclases definen title, parameter_name,
+    placeholder y queryset() (que solo se llama cuando hay un valor).
+
+    Uso:
+        class EventFilter(TextInputFilter):
+            title = 'evento'
+            parameter_name = 'evento'
+
+            def queryset(self, request, queryset):
+                if self.value():
+                    return queryset.filter(event__title__icontains=self.value())
+    """
+    template = 'admin/text_input_filter.html'
+    placeholder = ''
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def value(self):
+        value = super().value()
+        return value.strip() if value else None
+
+    def choices(self, changelist):
+        # Una sola "opción": el enlace para quitar el filtro, más los parámetros
+        # actuales que el formulario debe conservar al enviarse
+        yield {
+            'selected': self.value() is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': 'Todos',
+            'preserved_params': [
+                (key, value)
+                for key, values in changelist.filter_params.items()
+                if key not in (self.parameter_name, PAGE_VAR)
+                for value in values
+            ],
+        }
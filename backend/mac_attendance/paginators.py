@@ -0,0 +1,158 @@
+"""
+Paginación del admin para tablas muy grandes.
+
+El paginador por defecto del admin hace un COUNT(*) de todo el resultado y pide
+cada página con OFFSET, que recorre todas las filas anteriores: con decenas de
+millones de filas ambas cosas son lentas.
+
+- EstimatedCountPaginator: en PostgreSQL, por encima de
+  ADMIN_COUNT_ESTIMATE_THRESHOLD filas usa la estimación del planificador
+  (reltuples de la tabla, o las filas estimadas por EXPLAIN si hay filtros) en
+  lugar de COUNT(*)
+- KeysetChangeList: pide cada página "antes" o "después" de la última fila
+  vista, por (campo, pk), sobre el índice del campo, en lugar de con OFFSET
+"""
+import json
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+BEFORE_VAR = 'antes'
+AFTER_VAR = 'despues'
+
+
+def estimate_count(queryset):
+    """
+    Filas estimadas por PostgreSQL para el queryset, sin recorrerlo.
+
+    Returns:
+        Número estimado de filas, o None si la BD no es PostgreSQL o la tabla
+        aún no tiene estadísticas (nunca se ha analizado)
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row and row[0] > 0 else None
+
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que no cuenta las filas de resultados grandes.
+
+    Debajo del umbral (o en otras BD) el conteo es exacto. La estimación se
+    corrige sola con cada ANALYZE/autovacuum; is_estimate indica si el total
+    mostrado es aproximado.
+    """
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate >= settings.ADMIN_COUNT_ESTIMATE_THRESHOLD:
+            self.is_estimate = True
+            return estimate
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList paginado por llave en lugar de por número de página.
+
+    Con el orden por defecto las filas se muestran por (ModelAdmin.keyset_field,
+    pk) descendente y los enlaces de paginación llevan el cursor de la primera o
+    última fila de la página (?antes=... para las siguientes, ?despues=... para
+    las anteriores). Si se ordena por otra columna se vuelve a la paginación
+    por número de página, con el total del paginador del ModelAdmin.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        # El cursor no es un filtro: se quita antes de que el admin lo interprete
+        params = request.GET.copy()
+        self.before = params.pop(BEFORE_VAR, [None])[-1]
+        self.after = params.pop(AFTER_VAR, [None])[-1]
+        request.GET = params
+        super().__init__(request, *args, **kwargs)
+
+    def _parse_cursor(self, cursor):
+        field = self.model._meta.get_field(self.model_admin.keyset_field)
+        value, separator, pk = cursor.rpartition('_')
+        try:
+            return field.to_python(value), self.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise IncorrectLookupParameters(f'Cursor de paginación inválido: {cursor}')
+
+    def _cursor(self, obj):
+        field = self.model._meta.get_field(self.model_admin.keyset_field)
+        return f'{field.value_to_string(obj)}_{obj.pk}'
+
+    def get_results(self, request):
+        self.keyset = ORDER_VAR not in self.params
+        if not self.keyset:
+            return super().get_results(request)
+
+        field = self.model_admin.keyset_field
+        queryset = self.queryset.order_by(f'-{field}', '-pk')
+        if self.before:
+            value, pk = self._parse_cursor(self.before)
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+        elif self.after:
+            value, pk = self._parse_cursor(self.after)
+            queryset = queryset.filter(
+                Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk})
+            ).order_by(field, 'pk')
+
+        # Una fila de más indica si hay otra página en esa dirección
+        rows = list(queryset[:self.list_per_page + 1])
+        has_more = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if self.after:
+            rows.reverse()
+            has_older, has_newer = True, has_more
+        else:
+            has_older, has_newer = has_more, bool(self.before)
+
+        self.older_url = self.get_query_string({BEFORE_VAR: self._cursor(rows[-1])}) if has_older and rows else None
+        self.newer_url = self.get_query_string({AFTER_VAR: self._cursor(rows[0])}) if has_newer and rows else None
+        self.first_url = self.get_query_string() if self.before or self.after else None
+
+        # Total del filtro actual (estimado si es grande) solo para mostrarlo
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = paginator.count
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_older or has_newer
+        self.paginator = paginator
+
+
+class KeysetPaginationMixin:
+    """
+    Paginación por llave para un ModelAdmin.
+
+    Uso:
+        class AuditLogAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+            keyset_field = 'timestamp'
+    """
+    keyset_field = None
+    change_list_template = 'admin/keyset_change_list.html'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -9,6 +9,7 @@ from pathlib import Path
 from datetime import timedelta
 from decouple import config
 import os
+import tempfile
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -124,7 +125,7 @@ CSRF_EXEMPT_URLS = [r'^api/.*$']
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.ProfileJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',  # Mantener para Django admin
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -154,7 +155,85 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Caché compartida - la usan el rate limiting (RATELIMIT_USE_CACHE), la
+# configuración del sistema y las cachés de eventos/estadísticas.
+# CACHE_BACKEND elige el backend:
+#   'redis'  - compartida entre workers de gunicorn y entre servidores (producción)
+#   'file'   - compartida entre procesos del mismo servidor (pruebas sin Redis)
+#   'db'     - tabla en la BD, requiere `python manage.py createcachetable` (pruebas)
+#   'locmem' - solo por proceso (desarrollo con un único proceso)
+REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/1')
+CACHE_BACKENDS = {
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            # Si Redis no responde, tratar la caché como vacía en lugar de fallar la petición
+            'IGNORE_EXCEPTIONS': config('REDIS_IGNORE_EXCEPTIONS', default=False, cast=bool),
+        },
+        'KEY_PREFIX': 'mac',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_DIR', default=os.path.join(tempfile.gettempdir(), 'mac_attendance_cache')),
+        'KEY_PREFIX': 'mac',
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'mac_cache',
+        'KEY_PREFIX': 'mac',
+    },
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'mac-cache',
+    },
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+RATELIMIT_USE_CACHE = 'default'
+
 # Crear directorio de logs si no existe
 LOGS_DIR = BASE_DIR / 'logs'
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
+
+# Recálculo de estadísticas en segundo plano (ver attendance.models.StatsRecalculationJob)
+# Los cambios en eventos se agrupan: cada cambio pospone el recálculo DEBOUNCE segundos,
+# pero nunca más de MAX_WAIT segundos desde el primer cambio
+STATS_RECALC_DEBOUNCE_SECONDS = config('STATS_RECALC_DEBOUNCE_SECONDS', default=30, cast=int)
+STATS_RECALC_MAX_WAIT_SECONDS = config('STATS_RECALC_MAX_WAIT_SECONDS', default=300, cast=int)
+
+# Sincronización de escaneos hechos sin conexión (ver attendance.models.Attendance.sync_scans)
+# Se rechazan escaneos con más de MAX_AGE horas de antigüedad o con hora en el futuro
+# (más allá de la tolerancia de reloj del dispositivo)
+OFFLINE_SCAN_MAX_AGE_HOURS = config('OFFLINE_SCAN_MAX_AGE_HOURS', default=24, cast=int)
+OFFLINE_SCAN_CLOCK_SKEW_SECONDS = config('OFFLINE_SCAN_CLOCK_SKEW_SECONDS', default=120, cast=int)
+
+# Caché de SystemConfiguration (ver authentication.models.SystemConfiguration.get_config)
+# Cada proceso reutiliza su copia local hasta LOCAL_TTL segundos antes de comparar
+# la versión en la caché compartida
+SYSTEM_CONFIG_LOCAL_TTL = config('SYSTEM_CONFIG_LOCAL_TTL', default=5, cast=float)
+
+# Escritura de AuditLog en segundo plano (ver authentication.audit.AuditWriter)
+# Los registros se encolan y un hilo por proceso los inserta con bulk_create al juntar
+# BATCH_SIZE o cada FLUSH_INTERVAL_MS; si la BD falla o la cola se llena, se guardan en
+# archivos JSONL en SPOOL_DIR y se reinsertan en la siguiente escritura exitosa.
+# Con AUDIT_LOG_ASYNC=False cada registro se inserta en la petición, como antes
+AUDIT_LOG_ASYNC = config('AUDIT_LOG_ASYNC', default=True, cast=bool)
+AUDIT_LOG_BATCH_SIZE = config('AUDIT_LOG_BATCH_SIZE', default=200, cast=int)
+AUDIT_LOG_FLUSH_INTERVAL_MS = config('AUDIT_LOG_FLUSH_INTERVAL_MS', default=500, cast=int)
+AUDIT_LOG_QUEUE_SIZE = config('AUDIT_LOG_QUEUE_SIZE', default=10000, cast=int)
+AUDIT_LOG_SPOOL_DIR = LOGS_DIR / 'audit_spool'
+
+# Retención de AuditLog (ver authentication/management/commands/prune_audit_logs.py)
+# Los registros con más de RETENTION_DAYS días se mueven a archivos gzip JSONL
+# mensuales en ARCHIVE_DIR
+AUDIT_LOG_RETENTION_DAYS = config('AUDIT_LOG_RETENTION_DAYS', default=180, cast=int)
+AUDIT_LOG_ARCHIVE_DIR = Path(config('AUDIT_LOG_ARCHIVE_DIR', default=str(LOGS_DIR / 'audit_archive')))
+
+# Changelists del admin con tablas grandes (ver mac_attendance/paginators.py)
+# En PostgreSQL, a partir de este número de filas el total se estima en lugar de contarse
+ADMIN_COUNT_ESTIMATE_THRESHOLD = config('ADMIN_COUNT_ESTIMATE_THRESHOLD', default=10000, cast=int)
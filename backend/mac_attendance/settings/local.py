@@ -35,15 +35,9 @@ CSRF_COOKIE_SECURE = False
 
 # Rate Limiting - Desactivado en desarrollo
 RATELIMIT_ENABLE = False
-RATELIMIT_USE_CACHE = 'default'
 
-# Cache Configuration - LocMem para desarrollo
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'ratelimit-cache',
-    }
-}
+# Cache Configuration - LocMem por defecto en desarrollo; CACHE_BACKEND=redis
+# (docker-compose.dev.yml) o file para probar con varios procesos
 
 # Logging Configuration - Solo consola en desarrollo
 LOGGING = {
@@ -6,6 +6,7 @@ Hereda de base.py y sobreescribe/agrega configuraciones de producción.
 """
 
 from .base import *  # noqa
+from .base import CACHE_BACKENDS
 from decouple import config
 
 # SECURITY WARNING: don't run with debug turned on in production!
@@ -57,26 +58,15 @@ X_FRAME_OPTIONS = 'DENY'
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
 # Rate Limiting - ACTIVADO en producción
+# Los contadores viven en la caché compartida (Redis), así que el límite es el
+# mismo sin importar qué worker de gunicorn atienda la petición
 RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=True, cast=bool)
-RATELIMIT_USE_CACHE = 'default'
 
-# Cache Configuration - Puede usar Redis/Memcached en producción
+# Cache Configuration - Redis compartido entre workers (ver CACHE_BACKENDS en base.py)
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis')
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'ratelimit-cache',
-    }
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
 }
-# TODO: Para mejor rendimiento en producción, considerar Redis:
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django_redis.cache.RedisCache',
-#         'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
-#         'OPTIONS': {
-#             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
-#         }
-#     }
-# }
 
 # Logging Configuration - Archivos en producción
 LOGGING = {
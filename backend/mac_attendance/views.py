@@ -66,6 +66,12 @@ def api_root(request):
                     'description': 'Listar todos los eventos',
                     'auth_required': False,
                 },
+                'occupancy': {
+                    'url': '/api/events/<event_id>/occupancy/',
+                    'method': 'GET',
+                    'description': 'Ocupación actual del evento (asistentes y capacidad)',
+                    'auth_required': True,
+                },
                 'register_external': {
                     'url': '/api/events/external/register/',
                     'method': 'POST',
@@ -0,0 +1,161 @@
+"""
+Infraestructura de los benchmarks de la API.
+
+Cada benchmark mide, para un endpoint:
+  - queries: número de consultas SQL de la primera petición, con la caché vacía
+  - latency_ms: mejor tiempo de las siguientes peticiones (caché caliente); el
+    mínimo es mucho menos sensible que la media a la carga de la máquina
+
+y lo compara contra baselines.json. El test falla si el endpoint hace más
+consultas que su baseline, o si la latencia supera el baseline por más de
+BENCHMARK_LATENCY_TOLERANCE (0.5 = 50%, con un margen mínimo de
+LATENCY_SLACK_MS para endpoints muy rápidos). La latencia solo se compara
+cuando la escala del conjunto de datos es la misma con la que se grabaron los
+baselines.
+
+Variables de entorno:
+  BENCHMARK_SCALE=0.1             conjunto de datos reducido (corrida rápida)
+  BENCHMARK_REPEAT=10             peticiones para medir la latencia
+  BENCHMARK_LATENCY_TOLERANCE=0.5 regresión de latencia permitida
+  BENCHMARK_UPDATE_BASELINES=1    reescribir baselines.json con lo medido
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.models import UserProfile
+from tests.conftest import reset_caches
+
+from . import dataset
+
+BASELINES_FILE = Path(__file__).with_name('baselines.json')
+LATENCY_SLACK_MS = 10.0
+
+UPDATE_BASELINES = os.environ.get('BENCHMARK_UPDATE_BASELINES') == '1'
+REPEAT = int(os.environ.get('BENCHMARK_REPEAT', '10'))
+LATENCY_TOLERANCE = float(os.environ.get('BENCHMARK_LATENCY_TOLERANCE', '0.5'))
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Cargar el conjunto de datos una sola vez; cada test corre en una transacción que se revierte"""
+    with django_db_blocker.unblock():
+        dataset.seed()
+
+
+@pytest.fixture(scope='session')
+def benchmark_results():
+    """Mediciones de la sesión; con BENCHMARK_UPDATE_BASELINES=1 se guardan al terminar"""
+    results = {}
+    yield results
+    if UPDATE_BASELINES and results:
+        baselines = load_baselines()
+        baselines['scale'] = dataset.get_scale()
+        baselines['endpoints'].update(results)
+        baselines['endpoints'] = dict(sorted(baselines['endpoints'].items()))
+        BASELINES_FILE.write_text(json.dumps(baselines, indent=2, ensure_ascii=False) + '\n')
+
+
+def load_baselines():
+    if BASELINES_FILE.exists():
+        return json.loads(BASELINES_FILE.read_text())
+    return {'scale': dataset.get_scale(), 'endpoints': {}}
+
+
+class Benchmark:
+    def __init__(self, results):
+        self.results = results
+        self.baselines = load_baselines()
+
+    def measure(self, name, send, expected_status=200):
+        """
+        Medir un endpoint y compararlo contra su baseline.
+
+        Args:
+            name: Nombre del endpoint en baselines.json
+            send: Función send(i) que hace la i-ésima petición y devuelve la respuesta;
+                  recibe el índice para que los endpoints de escritura usen datos distintos
+            expected_status: Código HTTP esperado en todas las peticiones
+        """
+        reset_caches()
+        with CaptureQueriesContext(connection) as captured:
+            response = send(0)
+        self._check_status(name, response, expected_status)
+        queries = len(captured.captured_queries)
+
+        timings = []
+        for i in range(1, REPEAT + 1):
+            started = time.perf_counter()
+            response = send(i)
+            timings.append(time.perf_counter() - started)
+            self._check_status(name, response, expected_status)
+        latency_ms = round(min(timings) * 1000, 2)
+
+        self.results[name] = {'queries': queries, 'latency_ms': latency_ms}
+        if UPDATE_BASELINES:
+            return
+
+        baseline = self.baselines['endpoints'].get(name)
+        if baseline is None:
+            pytest.fail(f'{name}: no hay baseline; ejecutar con BENCHMARK_UPDATE_BASELINES=1')
+
+        sql = '\n'.join(f'  {query["sql"]}' for query in captured.captured_queries)
+        assert queries <= baseline['queries'], (
+            f'{name}: {queries} consultas, el baseline es {baseline["queries"]}\n{sql}'
+        )
+
+        if self.baselines.get('scale') == dataset.get_scale():
+            limit = max(baseline['latency_ms'] * (1 + LATENCY_TOLERANCE), baseline['latency_ms'] + LATENCY_SLACK_MS)
+            assert latency_ms <= limit, (
+                f'{name}: {latency_ms} ms, el baseline es {baseline["latency_ms"]} ms (límite {limit:.2f} ms)'
+            )
+
+    def _check_status(self, name, response, expected_status):
+        assert response.status_code == expected_status, (
+            f'{name}: HTTP {response.status_code} (se esperaba {expected_status}): '
+            f'{getattr(response, "data", response.content[:500])}'
+        )
+
+
+@pytest.fixture
+def benchmark(benchmark_results):
+    return Benchmark(benchmark_results)
+
+
+def jwt_client(profile):
+    client = APIClient()
+    token = RefreshToken.for_user(profile.user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture
+def assistant(db):
+    return UserProfile.objects.select_related('user').get(account_number=dataset.ASSISTANT_ACCOUNT)
+
+
+@pytest.fixture
+def student(db):
+    return UserProfile.objects.select_related('user').get(account_number=dataset.STUDENT_ACCOUNT)
+
+
+@pytest.fixture
+def assistant_client(assistant):
+    return jwt_client(assistant)
+
+
+@pytest.fixture
+def student_client(student):
+    return jwt_client(student)
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    client.force_login(django_user_model.objects.get(username=dataset.ADMIN_USERNAME))
+    return client
@@ -0,0 +1,154 @@
+"""
+Conjunto de datos realista para los benchmarks de la API.
+
+Con BENCHMARK_SCALE=1 (por defecto) se crean 300 eventos, 5,000 estudiantes,
+50,000 asistencias y 10,000 registros de auditoría; BENCHMARK_SCALE=0.1 crea
+una décima parte para una corrida rápida. Todo se inserta con bulk_create
+(sin señales) y al final se reconstruyen los bloques de horario y las
+estadísticas, igual que lo harían los comandos de carga.
+"""
+import os
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+from attendance.models import Attendance, AttendanceStats
+from authentication.audit import AuditLog
+from authentication.models import Asistente, SystemConfiguration, UserProfile
+from events.models import Event, EventSlot, normalize_title
+
+EVENTS = 300
+STUDENTS = 5000
+ATTENDANCES = 50000
+AUDIT_LOGS = 10000
+
+EVENTS_PER_DAY = 20
+FIRST_STUDENT_ACCOUNT = 30000000
+ASSISTANT_ACCOUNT = '11111111'
+STUDENT_ACCOUNT = str(FIRST_STUDENT_ACCOUNT)
+ADMIN_USERNAME = 'benchmark_admin'
+
+
+def get_scale():
+    return float(os.environ.get('BENCHMARK_SCALE', '1'))
+
+
+def seed(scale=None):
+    """Crear el conjunto de datos. Devuelve un diccionario con los tamaños creados."""
+    if scale is None:
+        scale = get_scale()
+    rng = random.Random(2024)
+
+    n_events = max(EVENTS_PER_DAY, int(EVENTS * scale))
+    n_students = max(100, int(STUDENTS * scale))
+    n_attendances = int(ATTENDANCES * scale)
+    n_audit_logs = int(AUDIT_LOGS * scale)
+
+    SystemConfiguration.get_config()
+
+    # Usuarios: superusuario para el admin, un asistente y un estudiante con cuenta Django
+    admin_user = User.objects.create_superuser(ADMIN_USERNAME, 'admin@example.com', 'benchmark')
+    assistant = UserProfile.objects.create(
+        user=User.objects.create_user(f'asist{ASSISTANT_ACCOUNT}'),
+        account_number=ASSISTANT_ACCOUNT,
+        user_type='assistant',
+        full_name='Asistente Benchmark'
+    )
+    Asistente.objects.create(user_profile=assistant)
+
+    UserProfile.objects.bulk_create([
+        UserProfile(
+            account_number=str(FIRST_STUDENT_ACCOUNT + i),
+            user_type='student',
+            full_name=f'Estudiante {i:05d}'
+        )
+        for i in range(n_students)
+    ], batch_size=2000)
+    student_ids = list(
+        UserProfile.objects.filter(user_type='student').order_by('account_number').values_list('id', flat=True)
+    )
+    UserProfile.objects.filter(pk=student_ids[0]).update(
+        user=User.objects.create_user(STUDENT_ACCOUNT)
+    )
+
+    # Eventos: varias semanas alrededor de hoy, con sesiones paralelas que se solapan
+    first_day = timezone.localdate() - timedelta(days=n_events // EVENTS_PER_DAY // 2)
+    events = []
+    for i in range(n_events):
+        day, position = divmod(i, EVENTS_PER_DAY)
+        start = time(8 + position // 2, 30 * (position % 2))
+        title = f'Conferencia {i:03d}'
+        events.append(Event(
+            title=title,
+            title_key=normalize_title(title),
+            description='Descripción de la conferencia ' * 10,
+            speaker=f'Ponente {i % 40}',
+            date=first_day + timedelta(days=day),
+            start_time=start,
+            end_time=time(start.hour + 1, start.minute),
+            location=f'Auditorio {position % 4 + 1}',
+            modality=('presencial', 'online', 'hybrid')[i % 3],
+        ))
+    Event.objects.bulk_create(events, batch_size=1000)
+    EventSlot.rebuild()
+    event_ids = list(Event.objects.values_list('id', flat=True))
+
+    # Asistencias válidas: pares (estudiante, evento) distintos. El último 10% de
+    # los estudiantes queda sin asistencias (para los benchmarks de registro)
+    attending_ids = student_ids[:int(n_students * 0.9)]
+    n_attendances = min(n_attendances, len(attending_ids) * n_events)
+    pairs = set()
+    while len(pairs) < n_attendances:
+        pairs.add((rng.choice(attending_ids), rng.choice(event_ids)))
+    start_ts = timezone.now() - timedelta(days=30)
+    Attendance.objects.bulk_create([
+        Attendance(
+            student_id=student_id,
+            event_id=event_id,
+            registered_by=assistant,
+            timestamp=start_ts + timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+        )
+        for student_id, event_id in pairs
+    ], batch_size=5000)
+    AttendanceStats.recalculate_bulk()
+    Event.recount_attendance()
+
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            timestamp=start_ts + timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+            category='AUTH',
+            action='LOGIN_SUCCESS',
+            user=admin_user,
+            username=admin_user.username,
+            ip_address='10.0.0.1',
+            message='Login exitoso',
+        )
+        for _ in range(n_audit_logs)
+    ], batch_size=5000)
+
+    return {
+        'events': n_events,
+        'students': n_students,
+        'attendances': n_attendances,
+        'audit_logs': n_audit_logs,
+    }
+
+
+def create_live_event():
+    """Evento activo cuya ventana de registro contiene la hora actual"""
+    now = timezone.localtime()
+    start = now - timedelta(minutes=5)
+    if start.date() != now.date():
+        start = datetime.combine(now.date(), time.min)
+    event = Event.objects.create(
+        title='Conferencia en curso',
+        speaker='Ponente en vivo',
+        date=now.date(),
+        start_time=start.time().replace(microsecond=0),
+        end_time=time(23, 59),
+    )
+    # Como lo haría el worker de estadísticas: el escaneo cae en un bloque
+    EventSlot.rebuild()
+    event.refresh_from_db()
+    return event
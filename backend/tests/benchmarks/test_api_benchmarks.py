@@ -0,0 +1,88 @@
+"""
+Benchmarks de consultas y latencia de los endpoints de la API y del admin.
+
+Uso:
+    make benchmark
+    BENCHMARK_SCALE=0.1 pytest tests/benchmarks --no-cov
+    BENCHMARK_UPDATE_BASELINES=1 pytest tests/benchmarks --no-cov
+"""
+import pytest
+from authentication.models import UserProfile
+
+from . import dataset
+
+pytestmark = [pytest.mark.slow, pytest.mark.django_db]
+
+
+def test_register_attendance(benchmark, assistant_client):
+    event = dataset.create_live_event()
+    # Estudiantes sin asistencias, para que no haya conflictos de horario
+    accounts = list(
+        UserProfile.objects.filter(user_type='student', attendance__isnull=True)
+        .order_by('account_number')
+        .values_list('account_number', flat=True)[:100]
+    )
+
+    benchmark.measure(
+        'register_attendance',
+        lambda i: assistant_client.post(
+            '/api/attendance/', {'event_id': event.id, 'account_number': accounts[i]}, format='json'
+        ),
+        expected_status=201
+    )
+
+
+def test_get_student_stats(benchmark, student_client, student):
+    benchmark.measure(
+        'get_student_stats',
+        lambda i: student_client.get('/api/attendance/stats/', {'account_number': student.account_number})
+    )
+
+
+def test_get_my_attendances(benchmark, student_client, student):
+    benchmark.measure(
+        'get_my_attendances',
+        lambda i: student_client.get('/api/attendance/my/', {'account_number': student.account_number})
+    )
+
+
+def test_get_recent_attendances(benchmark, assistant_client):
+    benchmark.measure(
+        'get_recent_attendances',
+        lambda i: assistant_client.get('/api/attendance/recent/')
+    )
+
+
+def test_event_list(benchmark, client):
+    benchmark.measure('event_list', lambda i: client.get('/api/events/'))
+
+
+def test_event_list_page(benchmark, client):
+    benchmark.measure(
+        'event_list_page',
+        lambda i: client.get('/api/events/', {'page_size': 50, 'fields': 'id,title,speaker,date,modality'})
+    )
+
+
+def test_login_view(benchmark, client):
+    benchmark.measure(
+        'login_view',
+        lambda i: client.post(
+            '/api/auth/login/', {'account_number': dataset.STUDENT_ACCOUNT}, content_type='application/json'
+        )
+    )
+
+
+@pytest.mark.parametrize('changelist', [
+    'attendance/attendance',
+    'attendance/attendancestats',
+    'authentication/student',
+    'authentication/asistente',
+    'authentication/auditlog',
+    'events/event',
+])
+def test_admin_changelist(benchmark, superuser_client, changelist):
+    benchmark.measure(
+        f'admin:{changelist}',
+        lambda i: superuser_client.get(f'/admin/{changelist}/')
+    )
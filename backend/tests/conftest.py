@@ -0,0 +1,34 @@
+"""
+Configuración común de pytest.
+
+Los tests usan la configuración local (DJANGO_ENV=local, ver tox.ini y el
+Makefile). Aquí además se desactiva el rate limiting, la auditoría se escribe
+en la misma petición (no en el hilo de fondo, fuera de la transacción del
+test) y se usa una caché en memoria limpia en cada test, para que los
+resultados no dependan de Redis ni del orden de ejecución.
+"""
+import pytest
+from django.core.cache import cache
+from authentication.models import SystemConfiguration
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings):
+    settings.RATELIMIT_ENABLE = False
+    settings.SECURE_SSL_REDIRECT = False
+    settings.AUDIT_LOG_ASYNC = False
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'mac-tests',
+        }
+    }
+    reset_caches()
+    yield settings
+    reset_caches()
+
+
+def reset_caches():
+    """Vaciar la caché compartida y la copia local de la configuración del sistema"""
+    cache.clear()
+    SystemConfiguration._local_cache.update(version=None, config=None, checked_at=0.0)
@@ -0,0 +1,133 @@
+"""
+Tests de la escritura de auditoría por lotes (AuditWriter).
+
+El hilo de fondo no se inicia: cada test llama a los mismos pasos que él
+(_next_batch, _flush, _replay_spool) para que todo quede dentro de la
+transacción del test.
+
+Uso:
+    pytest tests/test_audit.py --no-cov
+"""
+import json
+import os
+import queue
+import time
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from authentication import audit
+from authentication.audit import AuditLog, AuditWriter
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def writer(settings, tmp_path, monkeypatch):
+    settings.AUDIT_LOG_BATCH_SIZE = 3
+    settings.AUDIT_LOG_FLUSH_INTERVAL_MS = 50
+    settings.AUDIT_LOG_SPOOL_DIR = tmp_path / 'audit_spool'
+    # El hilo de fondo cierra su conexión; aquí es la del test, que debe seguir abierta
+    monkeypatch.setattr(audit, 'close_old_connections', lambda: None)
+    monkeypatch.setattr(audit.connection, 'close', lambda: None)
+
+    writer = AuditWriter()
+    writer._queue = queue.Queue()
+    return writer
+
+
+def make_log(number):
+    return AuditLog(category='AUTH', action='LOGIN_FAILED', message=f'Intento {number}', username='Anonymous')
+
+
+def enqueue(writer, logs):
+    for log in logs:
+        writer._queue.put((time.monotonic(), log))
+
+
+def saved_messages():
+    return sorted(AuditLog.objects.filter(message__startswith='Intento ').values_list('message', flat=True))
+
+
+@pytest.fixture
+def failing_db(monkeypatch):
+    def bulk_create(*args, **kwargs):
+        raise OperationalError('la base de datos no responde')
+
+    monkeypatch.setattr(AuditLog.objects, 'bulk_create', bulk_create)
+    return monkeypatch
+
+
+def test_flushes_in_batches_with_one_insert_each(writer):
+    enqueue(writer, [make_log(number) for number in range(5)])
+
+    first, stopping = writer._next_batch()
+    assert (len(first), stopping) == (3, False)
+    # El segundo lote no se llena: se escribe al vencer AUDIT_LOG_FLUSH_INTERVAL_MS
+    second, stopping = writer._next_batch()
+    assert (len(second), stopping) == (2, False)
+
+    with CaptureQueriesContext(connection) as captured:
+        writer._flush(first)
+    assert len(captured.captured_queries) == 1
+
+    writer._flush(second)
+    assert saved_messages() == [f'Intento {number}' for number in range(5)]
+    assert writer.counters['written'] == 5
+    assert writer.last_flush_lag_ms is not None
+
+
+def test_stop_marker_ends_the_batch(writer):
+    enqueue(writer, [make_log(0)])
+    writer._queue.put(AuditWriter._STOP)
+
+    batch, stopping = writer._next_batch()
+
+    assert (len(batch), stopping) == (1, True)
+
+
+def test_failed_flush_spools_the_batch(writer, settings, failing_db):
+    enqueue(writer, [make_log(number) for number in range(2)])
+    batch, stopping = writer._next_batch()
+
+    writer._flush(batch)
+
+    spool = settings.AUDIT_LOG_SPOOL_DIR / f'{os.getpid()}.jsonl'
+    records = [json.loads(line) for line in spool.read_text(encoding='utf-8').splitlines()]
+    assert [record['message'] for record in records] == ['Intento 0', 'Intento 1']
+    assert (writer.counters['flush_errors'], writer.counters['spooled'], writer.counters['written']) == (1, 2, 0)
+    failing_db.undo()
+    assert saved_messages() == []
+
+
+def test_spool_is_replayed_after_restart(writer, settings, failing_db):
+    logs = [make_log(number) for number in range(2)]
+    writer._spool(logs)
+    spool_dir = settings.AUDIT_LOG_SPOOL_DIR
+    # Línea incompleta: el proceso murió mientras escribía
+    with open(spool_dir / f'{os.getpid()}.jsonl', 'a', encoding='utf-8') as spool:
+        spool.write('{"category": "AUTH", "act')
+    failing_db.undo()
+
+    # Un proceso nuevo reinserta el spool al iniciar su hilo
+    restarted = AuditWriter()
+    restarted._replay_spool()
+
+    assert saved_messages() == ['Intento 0', 'Intento 1']
+    replayed = AuditLog.objects.get(message='Intento 0')
+    assert replayed.timestamp == logs[0].timestamp
+    assert (restarted.counters['replayed'], restarted.counters['dropped']) == (2, 1)
+    assert list(spool_dir.iterdir()) == []
+
+
+def test_spool_is_replayed_after_the_next_successful_flush(writer, settings, failing_db):
+    enqueue(writer, [make_log(0)])
+    writer._flush(writer._next_batch()[0])
+    failing_db.undo()
+
+    enqueue(writer, [make_log(1)])
+    writer._flush(writer._next_batch()[0])
+
+    assert saved_messages() == ['Intento 0', 'Intento 1']
+    assert (writer.counters['written'], writer.counters['replayed']) == (1, 1)
+    assert list(settings.AUDIT_LOG_SPOOL_DIR.glob('*.jsonl')) == []
@@ -0,0 +1,147 @@
+"""
+Tests de la carga de asistencias con ingest_attendance.
+
+Uso:
+    pytest tests/test_ingestion.py --no-cov
+"""
+import json
+from datetime import date, time
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from attendance.models import Attendance, AttendanceStats
+from authentication.models import UserProfile
+from events.models import Event
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def assistant():
+    return UserProfile.objects.create(account_number='20000001', user_type='assistant', full_name='Asistente')
+
+
+@pytest.fixture
+def student():
+    return UserProfile.objects.create(account_number='20000002', user_type='student', full_name='Ana López')
+
+
+@pytest.fixture
+def event():
+    event = Event(
+        title='Introducción a la IA',
+        description='Descripción',
+        speaker='Ponente',
+        date=date(2025, 10, 21),
+        start_time=time(10, 0),
+        end_time=time(11, 0),
+        location='Auditorio 1'
+    )
+    event.save(skip_validation=True)
+    return event
+
+
+@pytest.fixture
+def registros_file(tmp_path, student, event):
+    """Exportación del registro de asistencia (mapeo registros, sin columna de fecha)"""
+    path = tmp_path / 'registros.csv'
+    path.write_text(
+        'Attendee identifier,Attendee name,Evento,Hora de registro\n'
+        f'{student.account_number},{student.full_name},{event.title},2025-10-21 10:05:00\n',
+        encoding='utf-8'
+    )
+    return path
+
+
+def write_csv(tmp_path, name, lines):
+    path = tmp_path / name
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return path
+
+
+def ingest(path, assistant, report, mapping='registros', *args):
+    call_command(
+        'ingest_attendance', str(path), '--mapping', mapping, '--registrador', assistant.account_number,
+        '--skip-validation', '--report', str(report), *args
+    )
+    return json.loads(report.read_text(encoding='utf-8'))
+
+
+def test_reingesting_registros_rejects_existing_rows(tmp_path, registros_file, assistant, student, event):
+    first = ingest(registros_file, assistant, tmp_path / 'primera.json')
+    assert first['created'] == 1
+
+    # Sin --fecha las filas no traen fecha: los duplicados se detectan con la del evento
+    second = ingest(registros_file, assistant, tmp_path / 'segunda.json')
+    assert second['created'] == 0
+    assert [row['reason'] for row in second['diff']['reject']] == [Attendance.DUPLICATE_MESSAGE]
+    assert Attendance.objects.filter(student=student, event=event).count() == 1
+
+
+def test_asistencias_mapping(tmp_path, assistant, student, event):
+    path = write_csv(tmp_path, 'asistencias.csv', [
+        'numero_cuenta,nombre_completo,titulo_evento,fecha_evento,metodo_registro,notas',
+        f'{student.account_number},{student.full_name},{event.title},21/10/2025,barcode,Lista impresa',
+    ])
+
+    report = ingest(path, assistant, tmp_path / 'reporte.json', 'asistencias')
+
+    assert report['created'] == 1
+    attendance = Attendance.objects.get(student=student, event=event)
+    assert (attendance.registration_method, attendance.notes) == ('barcode', 'Lista impresa')
+
+
+def test_registros_mapping_keeps_the_registration_time(tmp_path, registros_file, assistant, student, event):
+    report = ingest(registros_file, assistant, tmp_path / 'reporte.json')
+
+    assert report['created'] == 1
+    timestamp = timezone.localtime(Attendance.objects.get(student=student, event=event).timestamp)
+    assert (timestamp.date(), timestamp.time()) == (date(2025, 10, 21), time(10, 5))
+
+
+def test_lista_mapping_uses_the_event_option(tmp_path, assistant, student, event):
+    path = write_csv(tmp_path, 'lista.csv', [
+        'account_number,full_name',
+        f'{student.account_number},{student.full_name}',
+    ])
+
+    report = ingest(
+        path, assistant, tmp_path / 'reporte.json', 'lista', '--evento', event.title, '--fecha', '2025-10-21'
+    )
+
+    assert report['created'] == 1
+    assert Attendance.objects.get(student=student, event=event).notes == 'Importado desde Excel: lista.csv'
+
+
+def test_invalid_and_unknown_accounts_are_rejected(tmp_path, assistant, student, event):
+    path = write_csv(tmp_path, 'lista.csv', [
+        'account_number,full_name',
+        f'{student.account_number},{student.full_name}',
+        ',Sin cuenta',
+        '20009999,Nadie',
+    ])
+
+    report = ingest(
+        path, assistant, tmp_path / 'reporte.json', 'lista', '--evento', event.title, '--fecha', '2025-10-21'
+    )
+
+    assert report['created'] == 1
+    assert [(row['row'], row['reason']) for row in report['diff']['reject']] == [
+        (3, 'Datos incompletos'),
+        (4, 'Estudiante 20009999 no encontrado'),
+    ]
+    assert Attendance.objects.filter(event=event).count() == 1
+
+
+def test_dry_run_leaves_the_database_unchanged(tmp_path, registros_file, assistant, student, event):
+    attendances = Attendance.objects.count()
+    stats = AttendanceStats.objects.count()
+
+    report = ingest(registros_file, assistant, tmp_path / 'reporte.json', 'registros', '--dry-run')
+
+    assert report['dry_run'] and report['created'] == 1
+    assert Attendance.objects.count() == attendances
+    assert AttendanceStats.objects.count() == stats
+    event.refresh_from_db()
+    assert event.attendance_count == 0
@@ -0,0 +1,191 @@
+"""
+Tests de los contadores incrementales de AttendanceStats y Event.attendance_count.
+
+Cada caso registra, invalida, revalida o elimina asistencias y compara los
+contadores guardados contra el recálculo completo de check_stats_consistency.
+
+Uso:
+    pytest tests/test_stats.py --no-cov
+"""
+from datetime import date, time, timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from attendance.models import Attendance, AttendanceStats, StatsRecalculationJob
+from authentication.models import UserProfile
+from events.models import Event, EventSlot
+
+pytestmark = pytest.mark.django_db
+
+DAY = date(2025, 10, 21)
+
+
+def make_event(title, start, end, event_date=DAY, is_active=True):
+    event = Event(
+        title=title,
+        description='Descripción',
+        speaker='Ponente',
+        date=event_date,
+        start_time=start,
+        end_time=end,
+        location='Auditorio 1',
+        is_active=is_active
+    )
+    event.save(skip_validation=True)
+    return event
+
+
+@pytest.fixture
+def assistant():
+    return UserProfile.objects.create(account_number='20000101', user_type='assistant', full_name='Asistente')
+
+
+@pytest.fixture
+def student():
+    return UserProfile.objects.create(account_number='20000102', user_type='student', full_name='Ana López')
+
+
+@pytest.fixture
+def events():
+    """
+    Dos bloques de horario: el de 9:30-12:00 (ancla "mañana") agrupa también a
+    las dos mitades, que no se traslapan entre sí, así que se puede asistir a
+    ambas; 14:00-15:00 es un bloque aparte.
+    """
+    created = {
+        'morning': make_event('Mañana', time(9, 30), time(12)),
+        'first_half': make_event('Primera mitad', time(10), time(11)),
+        'second_half': make_event('Segunda mitad', time(11), time(12)),
+        'afternoon': make_event('Tarde', time(14), time(15)),
+    }
+    EventSlot.rebuild()
+    for event in created.values():
+        event.refresh_from_db()
+    return created
+
+
+def attend(student, event, assistant):
+    attendance = Attendance(student=student, event=event, registered_by=assistant)
+    attendance.save(skip_validation=True)
+    return attendance
+
+
+def set_valid(attendance, is_valid):
+    attendance.is_valid = is_valid
+    attendance.save(skip_validation=True)
+
+
+def attended(student):
+    return AttendanceStats.objects.get(student=student).attended_events
+
+
+def assert_consistent(student):
+    """Los contadores guardados coinciden con el recálculo completo"""
+    out = StringIO()
+    call_command('check_stats_consistency', '--students', student.account_number, stdout=out)
+    assert 'Todas las estadísticas son consistentes' in out.getvalue(), out.getvalue()
+    for event in Event.objects.all():
+        assert event.attendance_count == event.attendance_set.filter(is_valid=True).count(), event.title
+
+
+def test_same_slot_counts_once(student, assistant, events):
+    assert events['first_half'].slot_id == events['second_half'].slot_id
+
+    first = attend(student, events['first_half'], assistant)
+    assert attended(student) == 1
+    assert_consistent(student)
+
+    second = attend(student, events['second_half'], assistant)
+    assert attended(student) == 1
+    assert_consistent(student)
+
+    # El bloque sigue cubierto por la otra asistencia
+    set_valid(second, False)
+    assert attended(student) == 1
+    assert_consistent(student)
+
+    set_valid(first, False)
+    assert attended(student) == 0
+    assert_consistent(student)
+
+    set_valid(first, True)
+    assert attended(student) == 1
+    assert_consistent(student)
+
+    first.delete()
+    assert attended(student) == 0
+    assert_consistent(student)
+
+
+def test_different_slots_count_separately(student, assistant, events):
+    assert events['first_half'].slot_id != events['afternoon'].slot_id
+
+    attend(student, events['first_half'], assistant)
+    afternoon = attend(student, events['afternoon'], assistant)
+    assert attended(student) == 2
+    assert_consistent(student)
+
+    set_valid(afternoon, False)
+    assert attended(student) == 1
+    assert_consistent(student)
+
+    set_valid(afternoon, True)
+    assert attended(student) == 2
+    assert_consistent(student)
+
+    afternoon.delete()
+    assert attended(student) == 1
+    assert_consistent(student)
+
+
+def test_delete_keeps_slot_covered_by_other_attendance(student, assistant, events):
+    first = attend(student, events['first_half'], assistant)
+    attend(student, events['second_half'], assistant)
+
+    first.delete()
+    assert attended(student) == 1
+    assert_consistent(student)
+
+
+def test_register_creates_stats_on_first_scan(student, assistant):
+    now = timezone.localtime()
+    event = make_event('En curso', (now - timedelta(minutes=5)).time(), (now + timedelta(minutes=55)).time(), now.date())
+    EventSlot.rebuild()
+
+    Attendance.register(event.id, student.account_number, assistant)
+    assert attended(student) == 1
+    assert_consistent(student)
+
+
+def test_attendance_outside_any_slot_still_creates_stats(student, assistant):
+    inactive = make_event('Cancelado', time(16), time(17), is_active=False)
+
+    attend(student, inactive, assistant)
+    stats = AttendanceStats.objects.get(student=student)
+    assert (stats.attended_events, stats.total_events) == (0, EventSlot.objects.count())
+    assert_consistent(student)
+
+
+def test_event_save_leaves_slot_rebuild_to_the_recalculation_job(student, assistant, events):
+    evening = make_event('Noche', time(18), time(19))
+    evening.refresh_from_db()
+    assert evening.slot_id is None
+
+    attend(student, evening, assistant)
+    assert attended(student) == 0
+
+    # enqueue() devuelve el trabajo pendiente que ya encoló la señal
+    assert StatsRecalculationJob.enqueue(reason='test').run()
+    evening.refresh_from_db()
+    assert evening.slot_id is not None
+    assert attended(student) == 1
+    assert_consistent(student)
+
+
+def test_percentage_rounds_half_up():
+    # 1/32 = 3.125 %: round() de Python daría 3.12, Round() de la BD 3.13
+    assert AttendanceStats.percentage(1, 32) == 3.13
+    assert AttendanceStats.percentage(1, 3) == 33.33
+    assert AttendanceStats.percentage(0, 0) == 0.0
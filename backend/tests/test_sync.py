@@ -0,0 +1,137 @@
+"""
+Tests del registro en bloque (register_batch) y de la sincronización de
+escaneos sin conexión (sync_scans): reenvíos idempotentes por client_scan_id y
+duplicados que solo se detectan en el INSERT, que se rechazan por escaneo sin
+revertir el resto del lote.
+
+Uso:
+    pytest tests/test_sync.py --no-cov
+"""
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from attendance.models import Attendance
+from authentication.models import UserProfile
+from events.models import Event, EventSlot
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def assistant():
+    return UserProfile.objects.create(account_number='20000201', user_type='assistant', full_name='Asistente')
+
+
+@pytest.fixture
+def students():
+    return [
+        UserProfile.objects.create(account_number='20000202', user_type='student', full_name='Ana López'),
+        UserProfile.objects.create(account_number='20000203', user_type='student', full_name='Luis Pérez'),
+    ]
+
+
+@pytest.fixture
+def event():
+    """Evento en curso, dentro de la ventana de registro"""
+    now = timezone.localtime()
+    event = Event(
+        title='Conferencia en curso',
+        description='Descripción',
+        speaker='Ponente',
+        date=now.date(),
+        start_time=(now - timedelta(minutes=5)).time(),
+        end_time=(now + timedelta(minutes=55)).time(),
+        location='Auditorio 1'
+    )
+    event.save(skip_validation=True)
+    EventSlot.rebuild()
+    event.refresh_from_db()
+    return event
+
+
+def scan(event, student, client_scan_id=None):
+    return {
+        'client_scan_id': client_scan_id or uuid.uuid4(),
+        'event_id': event.id,
+        'account_number': student.account_number,
+        'scanned_at': timezone.now()
+    }
+
+
+@pytest.fixture
+def stale_day(monkeypatch):
+    """
+    Simular que otro escáner registró la asistencia entre la validación y el
+    INSERT: la consulta de asistencias del día no ve las ya guardadas, así que
+    el duplicado solo lo detecta la restricción única de la BD.
+    """
+    monkeypatch.setattr(Attendance, '_valid_attendances_by_day', staticmethod(lambda student_ids, dates: {}))
+
+
+def test_resubmitting_synced_scans_is_idempotent(event, students, assistant):
+    scans = [scan(event, student) for student in students]
+
+    first = Attendance.sync_scans(scans, assistant)
+    assert [result['status'] for result in first] == ['registered', 'registered']
+
+    second = Attendance.sync_scans(scans, assistant)
+    assert [result['status'] for result in second] == ['already_synced', 'already_synced']
+    assert [result['attendance_id'] for result in second] == [result['attendance_id'] for result in first]
+
+    event.refresh_from_db()
+    assert event.attendance_count == 2
+    assert Attendance.objects.filter(event=event).count() == 2
+
+
+def test_same_client_scan_id_twice_in_one_batch(event, students, assistant):
+    client_scan_id = uuid.uuid4()
+    results = Attendance.sync_scans(
+        [scan(event, students[0], client_scan_id), scan(event, students[0], client_scan_id)], assistant
+    )
+
+    assert [result['status'] for result in results] == ['registered', 'already_synced']
+    assert Attendance.objects.filter(client_scan_id=client_scan_id).count() == 1
+
+
+def test_sync_rejects_only_the_duplicate_found_on_insert(event, students, assistant, stale_day):
+    Attendance(student=students[0], event=event, registered_by=assistant).save(skip_validation=True)
+
+    results = Attendance.sync_scans([scan(event, student) for student in students], assistant)
+
+    assert [result['status'] for result in results] == ['duplicate', 'registered']
+    assert Attendance.objects.filter(event=event, student=students[1]).exists()
+    event.refresh_from_db()
+    assert event.attendance_count == 2
+
+
+def test_sync_reports_concurrent_resubmit_as_already_synced(event, students, assistant, stale_day, monkeypatch):
+    existing = Attendance(
+        student=students[0], event=event, registered_by=assistant, client_scan_id=uuid.uuid4()
+    )
+    existing.save(skip_validation=True)
+
+    # El reenvío concurrente aún no era visible al buscar los client_scan_id sincronizados
+    original_filter = Attendance.objects.filter
+
+    def filter_without_synced(*args, **kwargs):
+        if 'client_scan_id__in' in kwargs:
+            return Attendance.objects.none()
+        return original_filter(*args, **kwargs)
+
+    monkeypatch.setattr(Attendance.objects, 'filter', filter_without_synced)
+    results = Attendance.sync_scans([scan(event, students[0], existing.client_scan_id)], assistant)
+
+    assert results[0]['status'] == 'already_synced'
+    assert results[0]['attendance_id'] == existing.id
+
+
+def test_batch_rejects_only_the_duplicate_found_on_insert(event, students, assistant, stale_day):
+    Attendance(student=students[0], event=event, registered_by=assistant).save(skip_validation=True)
+
+    results = Attendance.register_batch(event.id, [student.account_number for student in students], assistant)
+
+    assert [result['status'] for result in results] == ['duplicate', 'registered']
+    event.refresh_from_db()
+    assert event.attendance_count == 2
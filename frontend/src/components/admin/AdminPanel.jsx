@@ -27,7 +27,8 @@ const AdminPanel = () => {
 
     const fetchEvents = async () => {
         try {
-            const response = await apiRequest('/events/')
+            // Solo las columnas de la tabla (sin la descripción completa)
+            const response = await apiRequest('/events/?fields=id,title,speaker,date,modality')
             setEvents(response.results || response)
         } catch (error) {
             console.error('Error fetching events:', error)
@@ -1,5 +1,9 @@
 import { useState, useEffect, useRef } from 'react'
 import { apiRequest } from '../../services/api'
+import { scanQueue, generateScanId } from '../../services/scanQueue'
+
+// Máximo de escaneos por lote (igual que BATCH_MAX_SIZE en el backend)
+const BATCH_MAX_SIZE = 500
 
 const AttendancePanel = () => {
     const [selectedEvent, setSelectedEvent] = useState('')
@@ -18,6 +22,11 @@ const AttendancePanel = () => {
     const [searching, setSearching] = useState(false)
     const [isEventFixed, setIsEventFixed] = useState(false)
     const inputRef = useRef(null)
+    // Escaneos pendientes: se guardan en IndexedDB (services/scanQueue.js);
+    // en memoria solo si IndexedDB no está disponible
+    const memoryQueueRef = useRef([])
+    const flushingRef = useRef(false)
+    const [queuedCount, setQueuedCount] = useState(0)
     // Estados para el escáner removidos - ahora se usa escáner USB físico
 
     useEffect(() => {
@@ -29,7 +38,18 @@ const AttendancePanel = () => {
             fetchEvents()
         }, 60000) // 60 segundos
 
-        return () => clearInterval(intervalId)
+        // Enviar los escaneos que quedaron en cola (de esta sesión o de una anterior)
+        flushScanQueue()
+        const retryId = setInterval(() => {
+            flushScanQueue()
+        }, 15000) // 15 segundos
+        window.addEventListener('online', flushScanQueue)
+
+        return () => {
+            clearInterval(intervalId)
+            clearInterval(retryId)
+            window.removeEventListener('online', flushScanQueue)
+        }
     }, [])
 
     // Auto-seleccionar el primer evento cuando la lista de eventos cambie (solo si no está fijado)
@@ -57,57 +77,10 @@ const AttendancePanel = () => {
 
     const fetchEvents = async () => {
         try {
-            // Primero obtenemos la configuración del sistema
-            const configResponse = await apiRequest('/auth/system-config/')
-            const config = configResponse
-
-            const response = await apiRequest('/events/')
-            const allEvents = response.results || response
-
-            console.log('📅 Todos los eventos recibidos:', allEvents)
-            console.log('⚙️ Configuración del sistema:', config)
-
-            // Obtener la hora actual del navegador
-            const now = new Date()
-            console.log('🕐 Hora actual (navegador):', now)
-
-            // Usar valores por defecto si no hay configuración
-            const minutesBefore = config?.minutes_before_event || 10
-            const minutesAfter = config?.minutes_after_start || 25
-
-            const activeEvents = allEvents.filter(event => {
-                // Crear fecha del evento en zona horaria local
-                const eventDate = new Date(event.date + 'T00:00:00')
-                const startTime = new Date(event.date + 'T' + event.start_time)
-                const endTime = new Date(event.date + 'T' + event.end_time)
-
-                // Calcular ventana de registro según configuración
-                const registrationStart = new Date(startTime.getTime() - (minutesBefore * 60 * 1000))
-                const registrationEnd = new Date(startTime.getTime() + (minutesAfter * 60 * 1000))
-
-                // Obtener solo la fecha sin hora para comparación
-                const eventDateOnly = new Date(eventDate.getFullYear(), eventDate.getMonth(), eventDate.getDate())
-                const nowDateOnly = new Date(now.getFullYear(), now.getMonth(), now.getDate())
-
-                // Evento activo si es hoy y está en la ventana de registro
-                const isToday = eventDateOnly.getTime() === nowDateOnly.getTime()
-                const isInRegistrationWindow = now >= registrationStart && now <= registrationEnd
-
-                console.log(`📌 Evento: ${event.title}`)
-                console.log(`   Fecha evento: ${eventDateOnly}`)
-                console.log(`   Fecha hoy: ${nowDateOnly}`)
-                console.log(`   Es hoy: ${isToday}`)
-                console.log(`   Inicio evento: ${startTime}`)
-                console.log(`   Ventana registro: ${registrationStart} - ${registrationEnd}`)
-                console.log(`   Ahora: ${now}`)
-                console.log(`   En ventana de registro: ${isInRegistrationWindow}`)
-                console.log(`   Activo: ${isToday && isInRegistrationWindow}`)
-
-                return isToday && isInRegistrationWindow
-            })
-
-            console.log('✅ Eventos disponibles para registro:', activeEvents)
-            setEvents(activeEvents)
+            // El servidor filtra por su propia hora y la ventana de registro
+            // configurada; responde 304 (caché del navegador) si no hubo cambios
+            const response = await apiRequest('/events/open/')
+            setEvents(response.results)
         } catch (error) {
             console.error('Error fetching events:', error)
         }
@@ -129,26 +102,86 @@ const AttendancePanel = () => {
             return
         }
 
+        // Guardar el escaneo en la cola persistente y liberar el campo de
+        // inmediato para el siguiente; el envío ocurre en segundo plano
+        const scan = {
+            client_scan_id: generateScanId(),
+            event_id: selectedEvent,
+            account_number: studentAccount,
+            scanned_at: new Date().toISOString()
+        }
+        setStudentAccount('')
+
         try {
-            const response = await apiRequest('/attendance/', {
-                method: 'POST',
-                body: {
-                    event_id: selectedEvent,
-                    account_number: studentAccount,
-                    registration_method: 'manual'
-                }
-            })
+            await scanQueue.add(scan)
+        } catch (error) {
+            // Sin IndexedDB (p. ej. navegación privada): mantener el escaneo en memoria
+            console.error('Error guardando escaneo en la cola:', error)
+            memoryQueueRef.current.push(scan)
+        }
 
-            setMessage(response.message)
-            setMessageType('success')
-            setStudentAccount('')
+        flushScanQueue()
+    }
 
-            fetchRecentAttendances()
+    // Enviar los escaneos pendientes al endpoint de sincronización. Es
+    // idempotente: si la conexión se cae a mitad del envío, reenviar la cola
+    // no duplica asistencias.
+    const flushScanQueue = async () => {
+        if (flushingRef.current) return
+        flushingRef.current = true
+        let sent = false
 
-        } catch (error) {
-            const errorMessage = error.response?.data?.error || 'Error de conexión'
-            setMessage(`Error: ${errorMessage}`)
-            setMessageType('error')
+        try {
+            while (true) {
+                const persisted = await scanQueue.getAll().catch(() => [])
+                const pending = [...persisted, ...memoryQueueRef.current]
+                setQueuedCount(pending.length)
+                if (pending.length === 0) break
+
+                const batch = pending.slice(0, BATCH_MAX_SIZE)
+                let response
+                try {
+                    response = await apiRequest('/attendance/sync/', {
+                        method: 'POST',
+                        body: { scans: batch }
+                    })
+                } catch (error) {
+                    if (!error.response || error.response.status >= 500) {
+                        // Sin conexión o error del servidor: reintentar más tarde
+                        setMessage(`Sin conexión. ${pending.length} escaneo(s) en cola, se enviarán al reconectar.`)
+                        setMessageType('error')
+                        break
+                    }
+                    // Lote rechazado completo (p. ej. sesión expirada): no reintentar en bucle
+                    const errorMessage = error.response?.data?.error || 'Error de conexión'
+                    setMessage(`Error: ${errorMessage}`)
+                    setMessageType('error')
+                    break
+                }
+
+                sent = true
+                // Cada escaneo con resultado es definitivo y sale de la cola
+                const doneIds = response.results.map(result => result.client_scan_id)
+                await scanQueue.remove(doneIds).catch(() => {})
+                memoryQueueRef.current = memoryQueueRef.current.filter(scan => !doneIds.includes(scan.client_scan_id))
+
+                const failed = response.results.filter(
+                    result => !['registered', 'already_synced'].includes(result.status)
+                )
+                if (batch.length === 1 && failed.length === 0) {
+                    setMessage(response.results[0].message)
+                    setMessageType('success')
+                } else {
+                    const details = failed.map(result => `${result.account_number}: ${result.message}`).join(' | ')
+                    setMessage(failed.length > 0 ? `${response.message}. ${details}` : response.message)
+                    setMessageType(failed.length > 0 ? 'error' : 'success')
+                }
+            }
+        } finally {
+            flushingRef.current = false
+            if (sent) {
+                fetchRecentAttendances()
+            }
         }
     }
 
@@ -322,6 +355,11 @@ const AttendancePanel = () => {
                         <p style={{ fontSize: '0.75rem', color: '#6b7280', marginTop: '0.5rem', textAlign: 'center' }}>
                             Usa el escáner USB o escribe manualmente
                         </p>
+                        {queuedCount > 0 && (
+                            <p style={{ fontSize: '0.875rem', color: '#b45309', marginTop: '0.5rem', fontWeight: '500', textAlign: 'center' }}>
+                                ⏳ {queuedCount} escaneo(s) en cola por enviar
+                            </p>
+                        )}
                     </div>
 
                     {/* Botón de registro manual */}
@@ -16,17 +16,35 @@ const StudentPanel = () => {
         ? user.username.substring(4)  // Remover prefijo "ext_"
         : user.profile?.account_number
 
+    // Usar endpoints diferentes según el tipo de usuario
+    const statsEndpoint = isExternalUser
+        ? `/attendance/external/stats/?account_number=${accountNumber}`
+        : `/attendance/stats/?account_number=${accountNumber}`
+
     useEffect(() => {
         fetchStudentData()
+
+        // Al volver a la pestaña, revalidar las estadísticas: el servidor
+        // responde 304 (caché del navegador, por ETag) si no cambiaron
+        const handleVisibilityChange = () => {
+            if (document.visibilityState === 'visible') {
+                refreshStats()
+            }
+        }
+        document.addEventListener('visibilitychange', handleVisibilityChange)
+        return () => document.removeEventListener('visibilitychange', handleVisibilityChange)
     }, [])
 
-    const fetchStudentData = async () => {
+    const refreshStats = async () => {
         try {
-            // Usar endpoints diferentes según el tipo de usuario
-            const statsEndpoint = isExternalUser
-                ? `/attendance/external/stats/?account_number=${accountNumber}`
-                : `/attendance/stats/?account_number=${accountNumber}`
+            setAttendanceStats(await apiRequest(statsEndpoint))
+        } catch (error) {
+            console.error('Error fetching stats:', error)
+        }
+    }
 
+    const fetchStudentData = async () => {
+        try {
             const attendancesEndpoint = isExternalUser
                 ? `/attendance/external/my/?account_number=${accountNumber}`
                 : `/attendance/my/?account_number=${accountNumber}`
@@ -0,0 +1,72 @@
+// Cola persistente de escaneos en IndexedDB
+// Los escaneos se guardan aquí antes de enviarse, así sobreviven a caídas del
+// Wi-Fi y a recargas de la página. El backend los deduplica por client_scan_id.
+
+const DB_NAME = 'mac-attendance'
+const DB_VERSION = 1
+const STORE_NAME = 'scanQueue'
+
+let dbPromise = null
+
+const openDatabase = () => {
+    if (!dbPromise) {
+        dbPromise = new Promise((resolve, reject) => {
+            const request = indexedDB.open(DB_NAME, DB_VERSION)
+            request.onupgradeneeded = () => {
+                const store = request.result.createObjectStore(STORE_NAME, { keyPath: 'client_scan_id' })
+                store.createIndex('scanned_at', 'scanned_at')
+            }
+            request.onsuccess = () => resolve(request.result)
+            request.onerror = () => {
+                dbPromise = null
+                reject(request.error)
+            }
+        })
+    }
+    return dbPromise
+}
+
+// Ejecutar una operación dentro de una transacción y esperar a que termine
+const withStore = async (mode, operation) => {
+    const db = await openDatabase()
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(STORE_NAME, mode)
+        const result = operation(transaction.objectStore(STORE_NAME))
+        transaction.oncomplete = () => resolve(result?.result)
+        transaction.onerror = () => reject(transaction.error)
+        transaction.onabort = () => reject(transaction.error)
+    })
+}
+
+// UUID del escaneo; crypto.randomUUID solo existe en contextos seguros (HTTPS/localhost)
+export const generateScanId = () => {
+    if (window.crypto?.randomUUID) {
+        return window.crypto.randomUUID()
+    }
+    const bytes = window.crypto.getRandomValues(new Uint8Array(16))
+    bytes[6] = (bytes[6] & 0x0f) | 0x40
+    bytes[8] = (bytes[8] & 0x3f) | 0x80
+    const hex = Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('')
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`
+}
+
+export const scanQueue = {
+    // Guardar un escaneo: { client_scan_id, event_id, account_number, scanned_at }
+    add: (scan) => withStore('readwrite', store => store.put(scan)),
+
+    // Escaneos pendientes en orden de escaneo
+    getAll: async () => {
+        const scans = await withStore('readonly', store => store.index('scanned_at').getAll())
+        return scans || []
+    },
+
+    count: async () => {
+        const total = await withStore('readonly', store => store.count())
+        return total || 0
+    },
+
+    // Quitar los escaneos que ya tienen un resultado del servidor
+    remove: (clientScanIds) => withStore('readwrite', store => {
+        clientScanIds.forEach(id => store.delete(id))
+    }),
+}